@@ -0,0 +1,90 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+
+# Scoring requests one worker runs at once; the rest are shed with 503
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 32))
+# Low-priority work (benign-flow submissions, CSV uploads) may only use this share of it
+LOW_PRIORITY_SHARE = float(os.getenv("ADMISSION_LOW_PRIORITY_SHARE", 0.5))
+# Per-client token bucket: sustained requests/sec and burst size (0 disables)
+CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", 200))
+CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", 400))
+MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", 10000))
+# Agent registrations per peer address: sustained per second and burst
+REGISTER_RATE = float(os.getenv("ADMISSION_REGISTER_RATE", 0.1))
+REGISTER_BURST = float(os.getenv("ADMISSION_REGISTER_BURST", 5))
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "last")
+
+    def __init__(self, capacity, now):
+        self.tokens = capacity
+        self.last = now
+
+
+class AdmissionController:
+    """
+    Per-worker admission for scoring routes. A request must get a token
+    from its client's bucket (else 429) and a slot under the in-flight
+    bound (else 503); low-priority requests only get slots from the
+    low-priority share, so they are shed first when the worker is busy.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, low_priority_share=LOW_PRIORITY_SHARE,
+                 client_rate=CLIENT_RATE, client_burst=CLIENT_BURST, max_clients=MAX_CLIENTS):
+        self.max_in_flight = max_in_flight
+        self.low_priority_limit = max(1, int(max_in_flight * low_priority_share))
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def _take_token(self, client, now):
+        """Seconds until the client may retry, or 0 if a token was taken."""
+        if self.client_rate <= 0:
+            return 0
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            bucket = self.buckets[client] = TokenBucket(self.client_burst, now)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client)
+        bucket.tokens = min(self.client_burst, bucket.tokens + (now - bucket.last) * self.client_rate)
+        bucket.last = now
+        if bucket.tokens < 1:
+            return (1 - bucket.tokens) / self.client_rate
+        bucket.tokens -= 1
+        return 0
+
+    def admit(self, client, priority="high", now=None):
+        """
+        Returns (status, retry_after): status is "accepted", "rate_limited"
+        (429) or "overloaded" (503). Accepted requests must call release().
+        """
+        now = time.monotonic() if now is None else now
+        limit = self.max_in_flight if priority == "high" else self.low_priority_limit
+        with self.lock:
+            if self.in_flight >= limit:
+                return "overloaded", 1
+            wait = self._take_token(client, now)
+            if wait:
+                return "rate_limited", max(1, math.ceil(wait))
+            self.in_flight += 1
+            return "accepted", 0
+
+    def throttle(self, client, now=None):
+        """Rate limit only (no in-flight slot): seconds until retry, or 0 if allowed."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            wait = self._take_token(client, now)
+        return max(1, math.ceil(wait)) if wait else 0
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
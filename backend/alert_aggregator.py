@@ -0,0 +1,76 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+# Flows with the same key within this many seconds share one alert
+ALERT_WINDOW = float(os.getenv("ALERT_WINDOW", 60))
+ALERT_MAX_KEYS = int(os.getenv("ALERT_MAX_KEYS", 5000))
+
+
+class AlertAggregator:
+    """
+    Folds per-flow results into one alert per (source IP, destination IP,
+    protocol, model) and time window. A repeat flow only bumps counters on
+    the existing alert; a new alert object is created when a key is first
+    seen or its window has lapsed. Keys live in a bounded LRU.
+    """
+
+    def __init__(self, window=ALERT_WINDOW, max_keys=ALERT_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self.groups = OrderedDict()   # key -> (alert dict, last seen epoch)
+        self.lock = threading.Lock()
+        self.evicted = 0
+
+    def record(self, source_ip, destination_ip, protocol, model, prediction,
+               score=None, count=1, now=None):
+        """Return (alert, is_new). The alert dict is updated in place later on."""
+        now = time.time() if now is None else now
+        key = (source_ip, destination_ip, protocol, model)
+
+        with self.lock:
+            entry = self.groups.get(key)
+            if entry is not None and now - entry[1] <= self.window:
+                alert = entry[0]
+                alert["count"] += count
+                alert["last_seen"] = pd.Timestamp.fromtimestamp(now).isoformat()
+                alert["timestamp"] = alert["last_seen"]
+                if prediction == 1:
+                    alert["attack_count"] += count
+                    if alert["prediction"] == 0:
+                        alert["prediction"], alert["label"] = 1, "DDoS Attack"
+                if score is not None and (alert["max_score"] is None or score > alert["max_score"]):
+                    alert["max_score"] = score
+                self.groups[key] = (alert, now)
+                self.groups.move_to_end(key)
+                return alert, False
+
+            seen = pd.Timestamp.fromtimestamp(now).isoformat()
+            alert = {
+                "model_used": model,
+                "prediction": prediction,
+                "label": "DDoS Attack" if prediction == 1 else "Normal",
+                "timestamp": seen,
+                "source_ip": source_ip,
+                "destination_ip": destination_ip,
+                "protocol": protocol,
+                "count": count,
+                "attack_count": count if prediction == 1 else 0,
+                "first_seen": seen,
+                "last_seen": seen,
+                "max_score": score
+            }
+            self.groups[key] = (alert, now)
+            self.groups.move_to_end(key)
+            if len(self.groups) > self.max_keys:
+                self.groups.popitem(last=False)
+                self.evicted += 1
+            return alert, True
+
+    def __len__(self):
+        return len(self.groups)
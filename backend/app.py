@@ -1,11 +1,19 @@
 import os
 import sys
+import hmac
+import time
 import logging
+import threading
 from collections import deque
-import joblib
-import pandas as pd
-from flask import Flask, request, jsonify, redirect
+
+# Module initialisation time (imports, model loading in eager mode) for /api/metrics
+APP_INIT_START = time.perf_counter()
+
+import numpy as np
+from flask import Flask, request, jsonify, redirect, g, send_file
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 app = Flask(__name__)
 CORS(app, origins=["https://cyber-sentinel-evxklgflx-danish-sheikhs-projects.vercel.app"])  
@@ -18,6 +26,12 @@ alerts = deque(maxlen=200)
 stats = {"total_flows": 0, "normal": 0, "attacks": 0}
 recent_predictions = deque(maxlen=50)
 
+from config import STARTUP_MODE, TRUSTED_PROXIES, ADMIN_TOKEN
+from utils.lazy_imports import lazy_import, preload, import_times
+
+# Deferred in STARTUP_MODE=fast so read-only routes never pay for it
+pd = lazy_import("pandas")
+
 try:
     from utils.preprocess_input import preprocess_input
 except ImportError:
@@ -29,29 +43,169 @@ except ImportError:
             df = df[feature_names]
         return df
 
-MODEL_DIR = os.path.join(BASE_DIR, "saved_models")
+from online_learning import FeedbackBuffer, update_from_buffer
+from model_registry import registry
+from metrics import metrics, profiler
+from sketch_store import SketchStore
+from fleet import FleetStore, UnknownAgent, InvalidSecret, FLEET_ENROLL_TOKEN, FLEET_OPEN_ENROLLMENT
+from alert_aggregator import AlertAggregator
+from event_store import EventStore
+from inference_cache import InferenceCache
+from cascade_router import CascadeRouter
+from admission import AdmissionController, REGISTER_RATE, REGISTER_BURST
+from csv_jobs import JobQueue, read_status, results_path
+from utils.flood_detector import FLOOD_KINDS
+from wire_format import (
+    MSGPACK_MIME, SchemaMismatch, msgpack,
+    wire_columns, describe_schema, decode_flows
+)
+
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s",
     handlers=[logging.FileHandler(os.path.join(LOG_DIR, "app.log")), logging.StreamHandler(sys.stdout)])
 
-MODEL_PATHS = {
-    "xgboost": "xgboost_ddos.joblib",
-    "lightgbm": "lightgbm_ddos.joblib",
-    "random_forest": "random_forest_ddos.joblib",
-    "logistic_regression": "logistic_regression_ddos.joblib"
-}
-
-MODELS = {}
-for name, file in MODEL_PATHS.items():
-    path = os.path.join(MODEL_DIR, file)
-    if os.path.exists(path):
-        try:
-            MODELS[name] = joblib.load(path)
-            logging.info(f"Loaded model: {name}")
-        except Exception as e:
-            logging.error(f"Failed loading {name}: {e}")
+if TRUSTED_PROXIES:
+    # request.remote_addr becomes the address the outermost trusted proxy saw
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Models are served from the versioned registry; new versions are picked
+# up by a background poller and swapped in without a restart
+if STARTUP_MODE == "fast":
+    # Health and dashboard routes answer while models and pandas load
+    registry.load_all_async()
+    preload(["pandas"])
+else:
+    registry.load_all()
+registry.start_watcher()
+
+metrics.start_flusher()
+if os.getenv("PROFILER_ENABLED", "False") == "True":
+    profiler.start()
+
+# Continual learning: labeled live flows + per-model update status
+feedback = FeedbackBuffer()
+update_status = {}
+update_lock = threading.Lock()
+
+# One alert per (source, destination, protocol, model) and time window
+alert_groups = AlertAggregator()
+
+# Repeated flow vectors (floods) skip preprocessing and the model
+inference_cache = InferenceCache()
+
+# Bounded scoring concurrency + per-client rate limits for /api/predict*
+admission = AdmissionController()
+# Route -> default priority; clients can downgrade with X-Flow-Priority: low
+SCORING_PRIORITY = {"/api/predict": "high", "/api/predict-batch": "high",
+                    "/api/predict-csv": "low", "/api/jobs": "low", "/api/alerts": "high"}
+# Agent registrations per peer address, so enrolling cannot mint buckets freely
+enrollment = AdmissionController(client_rate=REGISTER_RATE, client_burst=REGISTER_BURST)
+
+# Large CSV uploads are scored as background jobs on a process pool
+csv_jobs = JobQueue()
+# Uploads above this size never score inside the request
+CSV_SYNC_MAX_BYTES = int(os.getenv("CSV_SYNC_MAX_BYTES", 5 * 1024 * 1024))
+
+# ?model=cascade: cheap model first, experts only for uncertain flows
+cascade = CascadeRouter()
+
+# Durable prediction / alert history, written in batches off the request path
+events = EventStore()
+events.start()
+
+# Top-talker / distinct-source sketches merged from capture agents
+sketches = SketchStore()
+# Registered capture agents and their per-interval summaries
+fleet = FleetStore()
+
+startup_seconds = time.perf_counter() - APP_INIT_START
+logging.info(f"Backend initialised in {startup_seconds:.2f}s (STARTUP_MODE={STARTUP_MODE})")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.add_gauge("in_flight_requests", 1)
+
+@app.after_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+    metrics.observe("request_seconds", elapsed, route=route)
+    metrics.inc("requests", route=route, method=request.method, status=response.status_code)
+    if response.status_code >= 400:
+        metrics.inc("errors", route=route, status=response.status_code)
+    return response
+
+def _token_matches(given, expected):
+    return bool(expected) and hmac.compare_digest((given or "").encode(), expected.encode())
+
+def verified_agent():
+    """agent_id of a request that proves its X-Agent-Secret, else None."""
+    agent_id = request.headers.get("X-Agent-Id")
+    if agent_id and fleet.verify(agent_id, request.headers.get("X-Agent-Secret")):
+        return agent_id
+    return None
+
+def _unauthorized(allow_agents=False):
+    """401 response unless the request has X-Admin-Token (or, if allowed, a verified agent secret)."""
+    if _token_matches(request.headers.get("X-Admin-Token"), ADMIN_TOKEN):
+        return None
+    if allow_agents and verified_agent():
+        return None
+    error = "Admin token or agent secret required" if allow_agents else "Admin token required"
+    return jsonify({"error": error}), 401
+
+def client_key():
+    """
+    Rate-limit key: the peer address (the client's, via ProxyFix, behind
+    TRUSTED_PROXIES). An agent that proves its secret gets its own bucket
+    only when enrollment needs FLEET_ENROLL_TOKEN; with open enrollment
+    anyone could register fresh ids, so agents share their address's bucket.
+    """
+    agent_id = verified_agent() if FLEET_ENROLL_TOKEN else None
+    if agent_id:
+        return f"agent:{agent_id}"
+    return request.remote_addr or "unknown"
+
+def _limited(code, message, retry_after):
+    response = jsonify({"error": message})
+    response.status_code = code
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+@app.before_request
+def admit_request():
+    """Shed scoring work (low priority first) before it is parsed."""
+    route = request.url_rule.rule if request.url_rule else None
+    if route == "/api/agents/register":
+        retry_after = enrollment.throttle(request.remote_addr or "unknown")
+        metrics.inc("admission", route=route, priority="enrollment",
+                    result="rate_limited" if retry_after else "accepted")
+        return _limited(429, "Too many registrations", retry_after) if retry_after else None
+    # Only POSTs do work (GET /api/alerts is a dashboard read)
+    priority = SCORING_PRIORITY.get(route) if request.method == "POST" else None
+    if priority is None:
+        return None
+    if request.headers.get("X-Flow-Priority") == "low":
+        priority = "low"
+    client = client_key()
+
+    status, retry_after = admission.admit(client, priority)
+    metrics.inc("admission", route=route, priority=priority, result=status)
+    if status == "accepted":
+        g.admitted = True
+        return None
+    if status == "rate_limited":
+        return _limited(429, "Too many requests", retry_after)
+    return _limited(503, "Server overloaded, retry later", retry_after)
+
+@app.teardown_request
+def finish_request(exc):
+    metrics.add_gauge("in_flight_requests", -1)
+    if g.pop("admitted", False):
+        admission.release()
 
 @app.route("/", methods=["GET"])
 def root():
@@ -59,66 +213,272 @@ def root():
 
 @app.route("/api/", methods=["GET"])
 def home():
-    return jsonify({"status": "Cyber Sentinel AI Backend Running", "available_models": list(MODELS.keys())})
+    return jsonify({"status": "Cyber Sentinel AI Backend Running", "available_models": registry.available()})
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "ok", "available_models": list(MODELS.keys())})
+    return jsonify({"status": "ok", "available_models": registry.available(), "cascade": cascade.models(),
+                    "models_loading": registry.loading})
+
+def _score_flow(route, model_name, data):
+    """(prediction, score, version) for one flow from one served model, or None if not loaded."""
+    with registry.acquire(model_name) as served:
+        if served is None:
+            return None
+        cache_key = inference_cache.key(model_name, served.signature, data, served.features)
+        cached = inference_cache.get(cache_key)
+        metrics.inc("inference_cache", model=model_name, result="hit" if cached else "miss")
+        if cached is None:
+            with metrics.stage(route, model_name, "preprocess"):
+                processed = preprocess_input(pd.DataFrame([data]), served.features)
+            with metrics.stage(route, model_name, "inference"):
+                predictions, scores = served.predict_with_score(processed)
+            cached = (int(predictions[0]), round(float(scores[0]), 4) if scores is not None else None)
+            inference_cache.put(cache_key, cached)
+        return cached[0], cached[1], served.version
+
+def _score_batch(route, model_name, df):
+    """Attack probabilities for a DataFrame of flows from one served model."""
+    with registry.acquire(model_name) as served:
+        if served is None:
+            raise KeyError(f"Model not loaded: {model_name}")
+        with metrics.stage(route, model_name, "preprocess"):
+            processed = preprocess_input(df, served.features)
+        with metrics.stage(route, model_name, "inference"):
+            predictions, scores = served.predict_with_score(processed)
+    return scores if scores is not None else predictions
+
+def _record_cascade(escalated, timings):
+    n_expert = int(escalated.sum())
+    n_cheap = len(escalated) - n_expert
+    metrics.inc("cascade_flows", n_cheap, stage="cheap")
+    metrics.inc("cascade_flows", n_expert, stage="expert")
+    metrics.inc("cascade_seconds", timings["cheap"] + timings["expert"])
+    metrics.inc("cascade_seconds_saved", cascade.seconds_saved(n_cheap))
+
+def _score_cascade(route, data):
+    def score_fn(model_name, rows):
+        scored = _score_flow(route, model_name, rows[0])
+        if scored is None:
+            raise KeyError(f"Model not loaded: {model_name}")
+        return [scored[1] if scored[1] is not None else scored[0]]
+
+    predictions, scores, escalated, timings = cascade.score([data], score_fn)
+    _record_cascade(escalated, timings)
+    return int(predictions[0]), round(float(scores[0]), 4), None
+
+PROTOCOL_NAMES = {6: "TCP", 17: "UDP", 1: "ICMP"}
+
+def _record_flow(model_name, model_version, prediction, score, source_ip, destination_ip, protocol):
+    """Update stats, alerts and the event log for one scored flow. Returns (label, protocol, alert)."""
+    label = "DDoS Attack" if prediction == 1 else "Normal"
+    stats["total_flows"] += 1
+    if prediction == 1:
+        stats["attacks"] += 1
+    else:
+        stats["normal"] += 1
+    recent_predictions.append(prediction)
+    metrics.inc("predictions", model=model_name, label=label)
+    try:
+        protocol = int(protocol)
+    except (TypeError, ValueError):
+        pass
+    proto_str = PROTOCOL_NAMES.get(protocol, str(protocol))
+    # Repeat flows only bump the counters of their existing alert
+    alert, is_new = alert_groups.record(source_ip, destination_ip, proto_str, model_name, prediction, score)
+    if is_new:
+        alerts.append(alert)
+    metrics.inc("alerts", result="new" if is_new else "merged")
+    events.record("prediction", model=model_name, model_version=model_version,
+                  source_ip=source_ip, destination_ip=destination_ip, protocol=proto_str,
+                  prediction=prediction, label=label, score=score)
+    return label, proto_str, alert
 
 @app.route("/api/predict", methods=["POST"])
 def predict():
+    route = "/api/predict"
     try:
         model_name = request.args.get("model", "xgboost")
-        model = MODELS.get(model_name)
-        if not model:
-            return jsonify({"error": "Model not found"}), 400
-        data = request.get_json()
-        df = pd.DataFrame([data])
-        processed = preprocess_input(df, getattr(model, "feature_names_in_", None))
-        prediction = int(model.predict(processed)[0])
-        label = "DDoS Attack" if prediction == 1 else "Normal"
-        stats["total_flows"] += 1
-        if prediction == 1:
-            stats["attacks"] += 1
+        with metrics.stage(route, model_name, "parse"):
+            data = request.get_json()
+        if model_name == "cascade":
+            scored = _score_cascade(route, data)
         else:
-            stats["normal"] += 1
-        recent_predictions.append(prediction)
-        protocol_map = {6: "TCP", 17: "UDP", 1: "ICMP"}
-        proto_str = protocol_map.get(data.get("Protocol", 0), str(data.get("Protocol", 0)))
+            scored = _score_flow(route, model_name, data)
+        if scored is None:
+            return jsonify({"error": "Model not found"}), 400
+        prediction, score, model_version = scored
+        source_ip, destination_ip = data.get("Source IP", "N/A"), data.get("Destination IP", "N/A")
+        label, proto_str, alert = _record_flow(
+            model_name, model_version, prediction, score,
+            source_ip, destination_ip, data.get("Protocol", 0)
+        )
         result = {
-            "model_used": model_name, "prediction": prediction, "label": label,
-            "timestamp": pd.Timestamp.now().isoformat(),
-            "source_ip": data.get("Source IP", "N/A"), "destination_ip": data.get("Destination IP", "N/A"),
-            "protocol": proto_str
+            "model_used": model_name, "model_version": model_version, "prediction": prediction, "label": label,
+            "score": score, "timestamp": alert["last_seen"],
+            "source_ip": source_ip, "destination_ip": destination_ip,
+            "protocol": proto_str,
+            "flow_id": feedback.remember(data),
+            "alert_count": alert["count"]
         }
         latest_prediction.clear()
         latest_prediction.update(result)
-        alerts.append(result)
-        return jsonify(result)
+        with metrics.stage(route, model_name, "serialize"):
+            return jsonify(result)
     except Exception as e:
         logging.error(f"Prediction Error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/predict-csv", methods=["POST"])
 def predict_csv():
+    route = "/api/predict-csv"
     try:
         model_name = request.args.get("model", "xgboost")
-        model = MODELS.get(model_name)
-        if not model:
+        if not registry.has(model_name) and model_name != "cascade":
             return jsonify({"error": "Invalid model name"}), 400
         if "file" not in request.files:
             return jsonify({"error": "CSV file missing"}), 400
         file = request.files["file"]
-        df = pd.read_csv(file)
-        processed = preprocess_input(df, getattr(model, "feature_names_in_", None))
-        predictions = model.predict(processed)
-        return jsonify({
-            "model_used": model_name, "total_rows": len(predictions),
-            "ddos_detected": int((predictions == 1).sum()), "normal": int((predictions == 0).sum())
-        })
+        if request.args.get("async") == "1" or (request.content_length or 0) > CSV_SYNC_MAX_BYTES:
+            if model_name == "cascade":
+                return jsonify({"error": "Cascade is not available for background jobs"}), 400
+            return _submit_job(file, model_name)
+        with metrics.stage(route, model_name, "parse"):
+            df = pd.read_csv(file)
+        if model_name == "cascade":
+            predictions, _, escalated, timings = cascade.score(
+                df, lambda name, rows: _score_batch(route, name, rows)
+            )
+            _record_cascade(escalated, timings)
+        else:
+            with registry.acquire(model_name) as served:
+                with metrics.stage(route, model_name, "preprocess"):
+                    processed = preprocess_input(df, served.features)
+                with metrics.stage(route, model_name, "inference"):
+                    predictions = served.predict(processed)
+        metrics.inc("csv_rows", len(predictions), model=model_name)
+        with metrics.stage(route, model_name, "serialize"):
+            return jsonify({
+                "model_used": model_name, "total_rows": len(predictions),
+                "ddos_detected": int((predictions == 1).sum()), "normal": int((predictions == 0).sum())
+            })
     except Exception as e:
         return jsonify({"error": "CSV prediction failed"}), 500
 
+def _submit_job(file, model_name):
+    status = csv_jobs.submit(file, model_name)
+    metrics.inc("csv_jobs", model=model_name)
+    job_id = status["job_id"]
+    return jsonify({
+        **status,
+        "status_url": f"/api/jobs/{job_id}",
+        "results_url": f"/api/jobs/{job_id}/results"
+    }), 202
+
+@app.route("/api/jobs", methods=["POST"])
+def create_job():
+    """Spool a CSV upload and score it in the background; poll /api/jobs/<id>."""
+    model_name = request.args.get("model", "xgboost")
+    if not registry.has(model_name):
+        return jsonify({"error": "Invalid model name"}), 400
+    if "file" not in request.files:
+        return jsonify({"error": "CSV file missing"}), 400
+    return _submit_job(request.files["file"], model_name)
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    try:
+        status = read_status(job_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+@app.route("/api/jobs/<job_id>/results", methods=["GET"])
+def get_job_results(job_id):
+    """Per-row predictions as gzip-compressed CSV once the job is done."""
+    try:
+        status = read_status(job_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status["state"] != "done":
+        return jsonify({"error": f"Job is {status['state']}", "progress": status.get("progress")}), 409
+    return send_file(results_path(job_id), mimetype="application/gzip",
+                     as_attachment=True, download_name=f"predictions_{job_id}.csv.gz")
+
+@app.route("/api/schema", methods=["GET"])
+def get_schema():
+    """Column order and schema id for the binary /api/predict-batch encoding."""
+    model_name = request.args.get("model", "xgboost")
+    with registry.acquire(model_name) as served:
+        if served is None or served.features is None:
+            return jsonify({"error": "Model not found"}), 400
+        schema = describe_schema(served.features)
+        schema.update({"model": model_name, "model_version": served.version, "msgpack": msgpack is not None})
+    return jsonify(schema)
+
+@app.route("/api/predict-batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many flows in one request. Accepts MessagePack (see wire_format)
+    or JSON {"flows": [...]}; answers in MessagePack when asked via Accept.
+    """
+    route = "/api/predict-batch"
+    model_name = request.args.get("model", "xgboost")
+    binary = request.mimetype == MSGPACK_MIME
+    if binary and msgpack is None:
+        return jsonify({"error": "msgpack is not installed on the server"}), 415
+    try:
+        with registry.acquire(model_name) as served:
+            if served is None or served.features is None:
+                return jsonify({"error": "Model not found"}), 400
+            try:
+                with metrics.stage(route, model_name, "parse"):
+                    if binary:
+                        df, source_ips, destination_ips = decode_flows(
+                            request.get_data(cache=False), wire_columns(served.features)
+                        )
+                    else:
+                        df = pd.DataFrame((request.get_json() or {}).get("flows", []))
+                        source_ips = df.pop("Source IP").tolist() if "Source IP" in df else ["N/A"] * len(df)
+                        destination_ips = df.pop("Destination IP").tolist() if "Destination IP" in df else ["N/A"] * len(df)
+                protocols = df["Protocol"].tolist() if "Protocol" in df else [0] * len(df)
+                with metrics.stage(route, model_name, "preprocess"):
+                    processed = preprocess_input(df, served.features)
+            except SchemaMismatch:
+                raise
+            except (KeyError, TypeError, ValueError) as e:
+                # Malformed payloads are the client's fault; inference errors below are not
+                return jsonify({"error": f"Invalid batch: {e}"}), 400
+            with metrics.stage(route, model_name, "inference"):
+                predictions, scores = served.predict_with_score(processed)
+            model_version = served.version
+    except SchemaMismatch as e:
+        schema = describe_schema(served.features) if served is not None else {}
+        return jsonify({"error": str(e), **schema}), 409
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Batch Prediction Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    predictions = predictions.astype(int).tolist()
+    scores = np.round(scores, 4).tolist() if scores is not None else None
+    for i, prediction in enumerate(predictions):
+        _record_flow(model_name, model_version, prediction, scores[i] if scores else None,
+                     source_ips[i], destination_ips[i], protocols[i])
+    metrics.inc("batch_rows", len(predictions), model=model_name, encoding="msgpack" if binary else "json")
+
+    result = {"model_used": model_name, "model_version": model_version,
+              "predictions": predictions, "scores": scores}
+    with metrics.stage(route, model_name, "serialize"):
+        if msgpack is not None and MSGPACK_MIME in request.headers.get("Accept", ""):
+            return app.response_class(msgpack.packb(result), mimetype=MSGPACK_MIME)
+        return jsonify(result)
+
 @app.route("/api/latest", methods=["GET"])
 def get_latest():
     return jsonify(latest_prediction)
@@ -136,6 +496,254 @@ def get_stats():
 def get_alerts():
     return jsonify(list(alerts))
 
+@app.route("/api/alerts", methods=["POST"])
+def record_alert():
+    """Pre-classified alert from a capture agent's rate-based fast path."""
+    if verified_agent() is None:
+        return jsonify({"error": "Agent secret required", "register": "/api/agents/register"}), 401
+    data = request.get_json(silent=True) or {}
+    flows, kind = data.get("flows", 0), data.get("kind", FLOOD_KINDS[-1])
+    if type(flows) is not int or flows < 0:
+        return jsonify({"error": "flows must be an integer >= 0"}), 400
+    if kind not in FLOOD_KINDS:
+        return jsonify({"error": f"kind must be one of {list(FLOOD_KINDS)}"}), 400
+    stats["total_flows"] += flows
+    stats["attacks"] += flows
+    if flows:
+        recent_predictions.extend([1] * min(flows, recent_predictions.maxlen))
+    metrics.inc("fast_path_flows", flows, kind=kind)
+    alert, is_new = alert_groups.record(
+        data.get("source_ip", "multiple"), data.get("destination_ip", "N/A"),
+        data.get("protocol", "N/A"), "fast_path", 1, count=flows
+    )
+    alert.update({"label": kind,
+                  "rate_pps": data.get("rate_pps"), "syn_ratio": data.get("syn_ratio")})
+    if is_new:
+        alerts.append(alert)
+    metrics.inc("alerts", result="new" if is_new else "merged")
+    events.record("fast_path", model="fast_path", source_ip=alert["source_ip"],
+                  destination_ip=alert["destination_ip"], protocol=alert["protocol"],
+                  prediction=1, label=alert["label"], count=flows,
+                  data={"rate_pps": data.get("rate_pps"), "syn_ratio": data.get("syn_ratio")})
+    latest_prediction.clear()
+    latest_prediction.update(alert)
+    return jsonify(alert)
+
+def _event_filters(args):
+    """Query-string filters for the event store; times as epoch seconds or ISO strings."""
+    filters = {key: args.get(key) for key in ["source_ip", "destination_ip", "label", "kind", "model"]}
+    for key in ["start", "end"]:
+        value = args.get(key)
+        if value is not None:
+            try:
+                value = float(value)
+            except ValueError:
+                value = pd.Timestamp(value).to_pydatetime().timestamp()
+        filters[key] = value
+    return filters
+
+@app.route("/api/events", methods=["GET"])
+def get_events():
+    """Page through stored predictions and alerts, newest first."""
+    try:
+        filters = _event_filters(request.args)
+        limit = min(request.args.get("limit", 100, type=int), 1000)
+        before_id = request.args.get("before_id", type=int)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page = events.query(limit=limit, before_id=before_id, **filters)
+    return jsonify({
+        "events": page,
+        "next_before_id": page[-1]["id"] if len(page) == limit else None
+    })
+
+@app.route("/api/events/summary", methods=["GET"])
+def get_events_summary():
+    try:
+        filters = _event_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(events.summary(**filters))
+
+@app.route("/api/sketches", methods=["POST"])
+def ingest_sketch():
+    """Merge a per-interval TrafficSketch posted by a capture agent."""
+    if verified_agent() is None:
+        return jsonify({"error": "Agent secret required", "register": "/api/agents/register"}), 401
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Sketch payload missing"}), 400
+    try:
+        sketches.ingest(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid sketch: {e}"}), 400
+    return jsonify({"status": "merged"})
+
+@app.route("/api/top-talkers", methods=["GET"])
+def top_talkers():
+    n = request.args.get("n", 10, type=int)
+    return jsonify(sketches.top_talkers(n))
+
+@app.route("/api/agents/register", methods=["POST"])
+def register_agent():
+    """Register (or re-register) a capture agent under its agent_id."""
+    if FLEET_ENROLL_TOKEN:
+        if not _token_matches(request.headers.get("X-Enroll-Token"), FLEET_ENROLL_TOKEN):
+            return jsonify({"error": "Invalid enrollment token"}), 403
+    elif not FLEET_OPEN_ENROLLMENT:
+        return jsonify({"error": "Agent enrollment is disabled: set FLEET_ENROLL_TOKEN"}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        agent, secret = fleet.register(data.get("agent_id"), segment=data.get("segment"), hostname=data.get("hostname"),
+                                       interval_s=data.get("interval_s"), model=data.get("model"),
+                                       secret=request.headers.get("X-Agent-Secret"),
+                                       enrolled=bool(FLEET_ENROLL_TOKEN))
+    except InvalidSecret as e:
+        return jsonify({"error": str(e)}), 401
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    logging.info(f"Capture agent registered: {agent['agent_id']} ({agent.get('segment')})")
+    return jsonify({"status": "registered", "agent": agent, "secret": secret})
+
+@app.route("/api/agents/<agent_id>/summary", methods=["POST"])
+def ingest_agent_summary(agent_id):
+    """One capture interval from one agent: counts plus its TrafficSketch."""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Summary payload missing"}), 400
+    if fleet.agent_exists(agent_id) and not fleet.verify(agent_id, request.headers.get("X-Agent-Secret")):
+        return jsonify({"error": "Invalid agent secret", "register": "/api/agents/register"}), 401
+    try:
+        summary = fleet.ingest(agent_id, data)
+        if data.get("sketch"):
+            sketches.ingest(data["sketch"])
+    except UnknownAgent as e:
+        return jsonify({"error": str(e), "register": "/api/agents/register"}), 404
+    except KeyError as e:
+        return jsonify({"error": f"Invalid summary: missing field {e}"}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid summary: {e}"}), 400
+    metrics.inc("fleet_summaries", agent=agent_id)
+    metrics.inc("fleet_flows", summary["flows"], agent=agent_id)
+    return jsonify({"status": "merged", "attack_rate": summary["attack_rate"]})
+
+@app.route("/api/agents", methods=["GET"])
+def list_agents():
+    return jsonify(fleet.sensors())
+
+@app.route("/api/agents/<agent_id>", methods=["GET"])
+def get_agent(agent_id):
+    try:
+        view = fleet.sensor(agent_id, request.args.get("n", 10, type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if view is None:
+        return jsonify({"error": "Agent not found"}), 404
+    return jsonify(view)
+
+@app.route("/api/fleet", methods=["GET"])
+def get_fleet():
+    """Global view merged over all registered agents."""
+    return jsonify(fleet.fleet(request.args.get("n", 10, type=int)))
+
+@app.route("/api/feedback", methods=["POST"])
+def submit_feedback():
+    """Label a recent flow (by flow_id) or submit a labeled feature dict."""
+    # Labels feed model updates: only admins and enrolled agents may submit them
+    denied = _unauthorized(allow_agents=True)
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    if data.get("label") not in (0, 1):
+        return jsonify({"error": "label must be 0 or 1"}), 400
+    stored = feedback.label(data["label"], flow_id=data.get("flow_id"), features=data.get("features"))
+    if not stored:
+        return jsonify({"error": "Unknown or expired flow_id"}), 404
+    return jsonify({"status": "stored", "labeled_flows": len(feedback)})
+
+def _run_model_update(model_name):
+    status = update_status[model_name]
+    start = time.time()
+    try:
+        with registry.acquire(model_name) as served:
+            base_version, features = served.version, served.features
+            metadata = {k: v for k, v in served.metadata.items() if k in ("features", "threshold")}
+            updated = update_from_buffer(served.native_model(), feedback, preprocess_input, features)
+        metadata["parent_version"] = base_version
+        metadata["metrics"] = {"online_update_samples": status["labeled_flows"]}
+        # Published as a new version: this worker swaps now, the others on their next poll
+        status["version"] = registry.publish(model_name, updated, metadata)
+        status.update({"state": "done", "error": None})
+        logging.info(f"Incrementally updated model: {model_name}")
+    except Exception as e:
+        status.update({"state": "failed", "error": str(e)})
+        logging.error(f"Incremental update failed for {model_name}: {e}")
+    finally:
+        status.update({"finished": time.time(), "duration_s": round(time.time() - start, 3)})
+
+@app.route("/api/models/<model_name>/update", methods=["GET", "POST"])
+def model_update(model_name):
+    if not registry.has(model_name):
+        return jsonify({"error": "Model not found"}), 400
+    if request.method == "GET":
+        return jsonify(update_status.get(model_name, {"state": "idle"}))
+    denied = _unauthorized()
+    if denied:
+        return denied
+    with update_lock:
+        if update_status.get(model_name, {}).get("state") == "running":
+            return jsonify({"error": "Update already running"}), 409
+        update_status[model_name] = {"state": "running", "started": time.time(), "labeled_flows": len(feedback)}
+    threading.Thread(target=_run_model_update, args=(model_name,), daemon=True).start()
+    return jsonify(update_status[model_name]), 202
+
+@app.route("/api/models", methods=["GET"])
+def list_models():
+    return jsonify(registry.describe())
+
+@app.route("/api/models/reload", methods=["POST"])
+def reload_models():
+    denied = _unauthorized()
+    if denied:
+        return denied
+    return jsonify({"swapped": registry.refresh(), "models": registry.describe()})
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus text format, merged across all gunicorn workers."""
+    for name, info in registry.describe().items():
+        metrics.set_gauge("model_load_seconds", info["load_time_s"], model=name, worker=os.getpid())
+        metrics.set_gauge("model_version", info["version"], model=name, worker=os.getpid())
+    metrics.set_gauge("alert_groups", len(alert_groups), worker=os.getpid())
+    metrics.set_gauge("alert_groups_evicted", alert_groups.evicted, worker=os.getpid())
+    metrics.set_gauge("admission_in_flight", admission.in_flight, worker=os.getpid())
+    metrics.set_gauge("inference_cache_entries", len(inference_cache), worker=os.getpid())
+    metrics.set_gauge("event_queue_depth", events.queue.qsize(), worker=os.getpid())
+    metrics.set_gauge("events_written", events.written, worker=os.getpid())
+    metrics.set_gauge("events_dropped", events.dropped, worker=os.getpid())
+    metrics.set_gauge("startup_seconds", round(startup_seconds, 4), mode=STARTUP_MODE, worker=os.getpid())
+    for module, seconds in import_times.items():
+        metrics.set_gauge("deferred_import_seconds", seconds, module=module, worker=os.getpid())
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/metrics/profiler", methods=["GET", "POST"])
+def metrics_profiler():
+    """Toggle the sampling profiler (this worker) or fetch folded stacks."""
+    denied = _unauthorized()
+    if denied:
+        return denied
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if data.get("enabled", True):
+            try:
+                profiler.start(data.get("interval"))
+            except (TypeError, ValueError):
+                return jsonify({"error": "interval must be a number of seconds"}), 400
+        else:
+            profiler.stop()
+        return jsonify({"running": profiler.running, "interval": profiler.interval, "pid": os.getpid()})
+    return app.response_class(profiler.folded(), mimetype="text/plain")
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
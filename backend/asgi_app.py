@@ -0,0 +1,81 @@
+"""
+ASGI serving mode for the same /api/* routes.
+
+    cd backend && gunicorn -w 4 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:$PORT asgi_app:app
+    cd backend && uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+The Flask app is mounted twice behind an async dispatcher. Scoring routes
+run on an inference pool sized to the cores, and everything else (stats,
+alerts, latest, health and the other read endpoints) runs on its own
+pool. A long CSV upload can only occupy inference threads, so dashboard
+polls never queue behind it, and scoring requests beyond the admission
+bound are shed with 503 before they join the inference queue. Model code
+releases the GIL in its native parts, so threads are enough here and
+models are loaded once per worker.
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app, SCORING_PRIORITY
+from metrics import metrics
+from admission import AdmissionController
+
+# Routes whose handlers run preprocessing + model inference
+SCORING_PATHS = {"/api/predict", "/api/predict-csv", "/api/predict-batch"}
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", os.cpu_count() or 1))
+GENERAL_WORKERS = int(os.getenv("GENERAL_WORKERS", 8))
+
+inference = WSGIMiddleware(flask_app, workers=INFERENCE_WORKERS)
+general = WSGIMiddleware(flask_app, workers=GENERAL_WORKERS)
+
+# Flask's admission only sees requests an inference thread has picked up
+# (at most INFERENCE_WORKERS), so the in-flight bound (queued + running)
+# and load shedding are applied here, before a request joins the queue.
+# Per-client rate limits still run in Flask.
+dispatch = AdmissionController(client_rate=0)
+OVERLOADED = b'{"error": "Server overloaded, retry later"}'
+
+
+async def shed(send):
+    await send({"type": "http.response.start", "status": 503, "headers": [
+        (b"content-type", b"application/json"), (b"retry-after", b"1"),
+        (b"content-length", str(len(OVERLOADED)).encode())
+    ]})
+    await send({"type": "http.response.body", "body": OVERLOADED})
+
+
+def priority(scope):
+    if (b"x-flow-priority", b"low") in scope.get("headers", []):
+        return "low"
+    return SCORING_PRIORITY.get(scope["path"], "high")
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        # Startup work already happened when the Flask module was imported
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["path"] in SCORING_PATHS:
+        level = priority(scope)
+        status, _ = dispatch.admit(None, level)
+        if status != "accepted":
+            metrics.inc("admission", route=scope["path"], priority=level, result=status)
+            await shed(send)
+            return
+        # Scoring requests queued for or running on an inference thread
+        metrics.add_gauge("scoring_requests", 1, worker=os.getpid())
+        try:
+            await inference(scope, receive, send)
+        finally:
+            metrics.add_gauge("scoring_requests", -1, worker=os.getpid())
+            dispatch.release()
+    else:
+        await general(scope, receive, send)
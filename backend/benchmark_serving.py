@@ -0,0 +1,260 @@
+"""
+Offline latency / throughput benchmark for the serving path.
+
+Measures, per model in MODEL_PATHS, three layers on synthetic flows:
+  preprocess  - utils.preprocess_input alone
+  predict     - model prediction on an already preprocessed matrix
+  end_to_end  - the Flask handlers via the test client
+                (/api/predict for single rows, /api/predict-csv for batches);
+                single rows are all distinct so they miss the inference
+                cache, single_cached repeats one row to time cache hits
+
+With --wire it also compares the /api/predict-batch encodings (JSON vs
+MessagePack): bytes per flow, server-side parse time and end-to-end time.
+
+Results are written as JSON so runs can be diffed between commits:
+
+    cd backend && python benchmark_serving.py --iterations 200 --output bench.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import warnings
+
+# Benchmarks must not start the background model poller
+os.environ.setdefault("MODEL_POLL_INTERVAL", "0")
+# The benchmark is the only client: per-client rate limits would answer
+# 429 after ADMISSION_CLIENT_BURST calls and abort the run
+os.environ["ADMISSION_CLIENT_RATE"] = "0"
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BASE_DIR))
+
+from config import MODEL_PATHS
+from model_registry import ModelRegistry
+from utils.preprocess_input import preprocess_input
+from wire_format import MSGPACK_MIME, msgpack, wire_columns, encode_flows, decode_flows
+
+warnings.filterwarnings("ignore")
+
+
+# ================= SYNTHETIC FLOWS =================
+def synthetic_flows(feature_names, n_rows, seed=42):
+    """Non-negative flow feature rows (log features stay finite)."""
+    rng = np.random.default_rng(seed)
+    values = np.abs(rng.normal(loc=0.5, scale=1.0, size=(n_rows, len(feature_names))))
+    df = pd.DataFrame(values, columns=feature_names)
+    df["Source IP"] = "10.0.0.1"
+    df["Destination IP"] = "10.0.0.2"
+    return df
+
+
+# ================= TIMING =================
+def summarize(samples, rows_per_call):
+    samples = np.asarray(samples)
+    total = samples.sum()
+    return {
+        "calls": len(samples),
+        "rows_per_call": rows_per_call,
+        "mean_ms": round(float(samples.mean()) * 1000, 4),
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 4),
+        "p90_ms": round(float(np.percentile(samples, 90)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 4),
+        "rows_per_sec": round(len(samples) * rows_per_call / total, 2) if total > 0 else None
+    }
+
+
+def time_calls(fn, iterations, warmup, rows_per_call):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, rows_per_call)
+
+
+# ================= LAYERS =================
+def bench_model(name, served, client, args):
+    features = list(served.features)
+
+    single = synthetic_flows(features, 1)
+    batch = synthetic_flows(features, args.batch_size, seed=7)
+    single_payload = single.iloc[0].to_dict()
+
+    single_processed = preprocess_input(single, features)
+    batch_processed = preprocess_input(batch, features)
+
+    results = {
+        "preprocess": {
+            "single": time_calls(lambda: preprocess_input(single, features),
+                                 args.iterations, args.warmup, 1),
+            "batch": time_calls(lambda: preprocess_input(batch, features),
+                                args.batch_iterations, 1, args.batch_size)
+        },
+        "predict": {
+            "single": time_calls(lambda: served.predict(single_processed),
+                                 args.iterations, args.warmup, 1),
+            "batch": time_calls(lambda: served.predict(batch_processed),
+                                args.batch_iterations, 1, args.batch_size)
+        }
+    }
+
+    if client is not None:
+        csv_bytes = batch.to_csv(index=False).encode()
+        # A distinct row per call, so the inference cache never answers;
+        # single_cached repeats one row to time the cache-hit path
+        fresh_rows = iter(synthetic_flows(features, args.iterations + args.warmup, seed=3)
+                          .to_dict(orient="records"))
+
+        def post_single(payload):
+            resp = client.post(f"/api/predict?model={name}", json=payload)
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+
+        def post_batch():
+            resp = client.post(
+                f"/api/predict-csv?model={name}",
+                data={"file": (io.BytesIO(csv_bytes), "flows.csv")},
+                content_type="multipart/form-data"
+            )
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+
+        results["end_to_end"] = {
+            "single": time_calls(lambda: post_single(next(fresh_rows)), args.iterations, args.warmup, 1),
+            "single_cached": time_calls(lambda: post_single(single_payload), args.iterations, args.warmup, 1),
+            "batch": time_calls(post_batch, args.batch_iterations, 1, args.batch_size)
+        }
+
+    return results
+
+
+def bench_wire(name, served, client, args):
+    """Bytes per flow and parse cost of the JSON vs MessagePack batch encodings."""
+    columns = wire_columns(served.features)
+    results = {}
+    for rows in (1, args.batch_size):
+        flows = synthetic_flows(columns, rows, seed=11)
+        source_ips = flows.pop("Source IP").tolist()
+        destination_ips = flows.pop("Destination IP").tolist()
+        records = [dict(rec, **{"Source IP": s, "Destination IP": d})
+                   for rec, s, d in zip(flows.to_dict(orient="records"), source_ips, destination_ips)]
+
+        json_body = json.dumps({"flows": records}).encode()
+        packed = encode_flows(flows.to_numpy(), columns, source_ips, destination_ips)
+
+        def parse_json():
+            df = pd.DataFrame(json.loads(json_body)["flows"])
+            df.pop("Source IP"), df.pop("Destination IP")
+            return df
+
+        iterations = args.iterations if rows == 1 else args.batch_iterations
+        entry = {
+            "json": {
+                "bytes_per_flow": round(len(json_body) / rows, 1),
+                "parse": time_calls(parse_json, iterations, 1, rows)
+            },
+            "msgpack": {
+                "bytes_per_flow": round(len(packed) / rows, 1),
+                "parse": time_calls(lambda: decode_flows(packed, columns), iterations, 1, rows)
+            }
+        }
+
+        if client is not None:
+            def post(body, mimetype):
+                resp = client.post(f"/api/predict-batch?model={name}", data=body, content_type=mimetype)
+                assert resp.status_code == 200, resp.get_data(as_text=True)
+
+            entry["json"]["end_to_end"] = time_calls(
+                lambda: post(json_body, "application/json"), iterations, 1, rows)
+            entry["msgpack"]["end_to_end"] = time_calls(
+                lambda: post(packed, MSGPACK_MIME), iterations, 1, rows)
+
+        results["single" if rows == 1 else "batch"] = entry
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=BASE_DIR
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serving path latency/throughput benchmark")
+    parser.add_argument("--models", nargs="*", default=list(MODEL_PATHS))
+    parser.add_argument("--iterations", type=int, default=200, help="single-row calls per layer")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--skip-e2e", action="store_true", help="skip the Flask handler layer")
+    parser.add_argument("--wire", action="store_true", help="compare JSON and MessagePack batch encodings")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(names=args.models, poll_interval=0)
+    registry.load_all()
+
+    client = None
+    if not args.skip_e2e:
+        import app as backend_app
+        client = backend_app.app.test_client()
+
+    report = {"environment": environment_info(), "config": vars(args), "models": {}}
+    for name in args.models:
+        with registry.acquire(name) as served:
+            if served is None:
+                print(f"Skipping {name}: model not available")
+                continue
+            if served.features is None:
+                print(f"Skipping {name}: no feature schema in model or metadata")
+                continue
+            print(f"Benchmarking {name} (v{served.version})...")
+            report["models"][name] = bench_model(name, served, client, args)
+            report["models"][name]["load_time_s"] = round(served.load_time, 4)
+            if args.wire:
+                if msgpack is None:
+                    print("Skipping wire benchmark: msgpack not installed")
+                else:
+                    report["models"][name]["wire"] = bench_wire(name, served, client, args)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Model':<22} {'Layer':<12} {'p50 ms':>9} {'p99 ms':>9} {'batch rows/s':>14}")
+    for name, layers in report["models"].items():
+        for layer in ("preprocess", "predict", "end_to_end"):
+            if layer in layers:
+                single, batch = layers[layer]["single"], layers[layer]["batch"]
+                print(f"{name:<22} {layer:<12} {single['p50_ms']:>9.3f} "
+                      f"{single['p99_ms']:>9.3f} {batch['rows_per_sec']:>14.0f}")
+    if args.wire:
+        print(f"\n{'Model':<22} {'Encoding':<9} {'bytes/flow':>11} {'parse rows/s':>13}")
+        for name, layers in report["models"].items():
+            for encoding, entry in layers.get("wire", {}).get("batch", {}).items():
+                print(f"{name:<22} {encoding:<9} {entry['bytes_per_flow']:>11.1f} "
+                      f"{entry['parse']['rows_per_sec']:>13.0f}")
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+
+import numpy as np
+
+try:
+    from config import MODEL_DIR
+except ImportError:
+    from backend.config import MODEL_DIR
+
+CASCADE_PATH = os.path.join(MODEL_DIR, "cascade.json")
+# Used until training has written learned thresholds
+DEFAULT_CASCADE = {
+    "cheap": "logistic_regression",
+    "experts": {"xgboost": 0.5, "random_forest": 0.5},
+    "low": 0.1,
+    "high": 0.9,
+    "threshold": 0.5
+}
+# Weight of the newest escalation in the running expert-cost estimate
+COST_ALPHA = 0.05
+
+
+class CascadeRouter:
+    """
+    Cheap model first: flows whose cheap-model probability falls inside
+    the uncertain band [low, high] are re-scored by a weighted ensemble of
+    the expert models, the rest are decided by the cheap model alone.
+    Thresholds come from cascade.json written by src/train1.py.
+    """
+
+    def __init__(self, path=CASCADE_PATH):
+        self.path = path
+        self.config = dict(DEFAULT_CASCADE)
+        self.mtime = None
+        self.checked = 0.0
+        # Running per-row cost of the expert stage, for cost-saved reporting
+        self.expert_cost = None
+        self.refresh()
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        try:
+            with open(self.path) as f:
+                self.config = {**DEFAULT_CASCADE, **json.load(f)}
+            self.mtime = mtime
+            logging.info(f"Loaded cascade: band=[{self.config['low']}, {self.config['high']}]")
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed loading cascade config: {e}")
+            return False
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self.checked > 1.0:
+            self.checked = now
+            self.refresh()
+
+    def models(self):
+        return [self.config["cheap"], *self.config["experts"]]
+
+    def score(self, rows, score_fn):
+        """
+        score_fn(model_name, rows) -> attack probabilities for those rows.
+        Returns (predictions, scores, escalated mask, timings) where
+        timings holds the seconds spent in each stage.
+        """
+        self._maybe_refresh()
+        config = self.config
+
+        start = time.perf_counter()
+        p = np.asarray(score_fn(config["cheap"], rows), dtype=float)
+        timings = {"cheap": time.perf_counter() - start, "expert": 0.0}
+
+        uncertain = (p >= config["low"]) & (p <= config["high"])
+        scores = p.copy()
+        if uncertain.any():
+            subset = rows if uncertain.all() else _take(rows, uncertain)
+            start = time.perf_counter()
+            total = sum(config["experts"].values())
+            blended = sum(
+                weight * np.asarray(score_fn(name, subset), dtype=float)
+                for name, weight in config["experts"].items()
+            ) / total
+            timings["expert"] = time.perf_counter() - start
+            scores[uncertain] = blended
+
+            per_row = timings["expert"] / int(uncertain.sum())
+            self.expert_cost = per_row if self.expert_cost is None else \
+                self.expert_cost + COST_ALPHA * (per_row - self.expert_cost)
+
+        predictions = (scores >= config["threshold"]).astype(int)
+        return predictions, scores, uncertain, timings
+
+    def seconds_saved(self, resolved_cheaply):
+        """Expert time avoided for flows the cheap stage decided (0 until an escalation is timed)."""
+        return (self.expert_cost or 0.0) * resolved_cheaply
+
+
+def _take(rows, mask):
+    if hasattr(rows, "iloc"):
+        return rows[mask]
+    return [row for row, keep in zip(rows, mask) if keep]
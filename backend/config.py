@@ -13,4 +13,31 @@ ALLOWED_MODELS = [
     "logistic_regression"
 ]
 
+MODEL_PATHS = {name: f"{name}_ddos.joblib" for name in ALLOWED_MODELS}
+
+# Seconds between checks for newly published model versions (0 disables)
+MODEL_POLL_INTERVAL = float(os.getenv("MODEL_POLL_INTERVAL", 30))
+
+# "eager": import the ML stack and load every model before serving (default)
+# "fast": answer read-only routes at once; models load in the background
+# and heavy modules are imported on first use
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+
+# "native": unpickle the joblib artifacts; "numpy": serve their .trees.npz
+# exports (see tree_export.py) without scikit-learn / xgboost / lightgbm
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "native")
+# With the numpy backend, tree models score batches larger than this with
+# the native model (unpickled once, on first use): per-row NumPy traversal
+# is faster for single flows but 10-20x slower for thousands of rows
+NUMPY_MAX_BATCH_ROWS = int(os.getenv("NUMPY_MAX_BATCH_ROWS", 64))
+
+# Reverse proxies in front of the backend (render.com: 1). Their
+# X-Forwarded-For entries are trusted to give the client address that
+# per-client rate limits are keyed on; 0 uses the socket peer address
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+
+# Routes that change what is served (model updates and reloads, labeled
+# feedback, the profiler) require it in X-Admin-Token; unset, they are refused
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 DEBUG = os.getenv("DEBUG", "True") == "True"
@@ -0,0 +1,244 @@
+import os
+import re
+import gzip
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from model_registry import latest_artifact, load_artifact, ModelVersion
+from utils.preprocess_input import preprocess_input
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+JOB_DIR = os.getenv("CSV_JOB_DIR", os.path.join(BASE_DIR, "logs", "jobs"))
+CSV_JOB_WORKERS = int(os.getenv("CSV_JOB_WORKERS", 2))
+CSV_JOB_CHUNK_ROWS = int(os.getenv("CSV_JOB_CHUNK_ROWS", 50000))
+# Finished jobs and their results are deleted after this many hours
+CSV_JOB_RETENTION_HOURS = float(os.getenv("CSV_JOB_RETENTION_HOURS", 24))
+# Queued / running jobs whose status has not changed for this long are
+# marked failed (their worker or web worker died without reporting)
+CSV_JOB_STALE_HOURS = float(os.getenv("CSV_JOB_STALE_HOURS", 2))
+
+JOB_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+META_COLUMNS = ["Source IP", "Destination IP"]
+
+
+# ================= STATUS FILES =================
+def job_path(job_id, *parts):
+    if not JOB_ID_RE.match(job_id or ""):
+        raise ValueError("Invalid job id")
+    return os.path.join(JOB_DIR, job_id, *parts)
+
+
+def write_status(job_id, status):
+    """Atomic so every gunicorn worker can serve progress for any job."""
+    path = job_path(job_id, "status.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def read_status(job_id):
+    try:
+        with open(job_path(job_id, "status.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def results_path(job_id):
+    return job_path(job_id, "results.csv.gz")
+
+
+def count_rows(path):
+    """Data rows in a CSV (newlines minus the header), read in 1 MB blocks."""
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+
+# ================= WORKER PROCESS =================
+_models = {}
+
+
+def _load_model(model_name):
+    """Latest published version, cached per worker process."""
+    artifact = latest_artifact(model_name)
+    if artifact is None:
+        raise KeyError(f"Model not found: {model_name}")
+    version, path, metadata = artifact
+    key = (model_name, version, metadata.get("checksum") or metadata.get("legacy_mtime_ns"))
+    if key not in _models:
+        _models.clear()
+        # Same checksum verification as the web workers' registry
+        _models[key] = ModelVersion(model_name, version, load_artifact(path, metadata), metadata, path=path)
+    return _models[key]
+
+
+def run_job(job_id, model_name, chunk_rows=CSV_JOB_CHUNK_ROWS):
+    """Score a spooled CSV chunk by chunk, streaming results to gzip and progress to status.json."""
+    status = read_status(job_id)
+    status.update({"state": "running", "started": time.time()})
+    write_status(job_id, status)
+
+    try:
+        # Counted here, not in the request that spooled the upload
+        status["rows_total"] = count_rows(job_path(job_id, "input.csv"))
+    except OSError:
+        pass
+
+    try:
+        served = _load_model(model_name)
+        status["model_version"] = served.version
+        started = time.perf_counter()
+
+        with gzip.open(results_path(job_id), "wt", compresslevel=5, newline="") as out:
+            first = True
+            for chunk in pd.read_csv(job_path(job_id, "input.csv"), chunksize=chunk_rows):
+                chunk.columns = chunk.columns.str.strip()
+                predictions, scores = served.predict_with_score(preprocess_input(chunk, served.features))
+
+                rows = pd.DataFrame({"row": np.arange(status["rows_done"], status["rows_done"] + len(chunk))})
+                for col in META_COLUMNS:
+                    if col in chunk.columns:
+                        rows[col] = chunk[col].to_numpy()
+                rows["prediction"] = predictions
+                rows["label"] = np.where(predictions == 1, "DDoS Attack", "Normal")
+                if scores is not None:
+                    rows["score"] = np.round(scores, 4)
+                rows.to_csv(out, header=first, index=False)
+                first = False
+
+                attacks = int((predictions == 1).sum())
+                elapsed = time.perf_counter() - started
+                status["rows_done"] += len(chunk)
+                status["ddos_detected"] += attacks
+                status["normal"] += len(chunk) - attacks
+                status["rows_per_sec"] = round(status["rows_done"] / elapsed, 1) if elapsed > 0 else None
+                status["progress"] = round(status["rows_done"] / status["rows_total"], 4) if status["rows_total"] else None
+                write_status(job_id, status)
+
+        status.update({"state": "done", "finished": time.time(), "progress": 1.0, "results": True})
+    except Exception as e:
+        status.update({"state": "failed", "finished": time.time(), "error": str(e)})
+    finally:
+        # The upload is no longer needed once scored (or failed)
+        try:
+            os.remove(job_path(job_id, "input.csv"))
+        except OSError:
+            pass
+        write_status(job_id, status)
+    return status
+
+
+# ================= QUEUE =================
+class JobQueue:
+    """
+    Spools CSV uploads to disk and scores them on a local process pool,
+    so large files never occupy a request worker. Several jobs run in
+    parallel (CSV_JOB_WORKERS processes per web worker).
+    """
+
+    def __init__(self, workers=CSV_JOB_WORKERS, job_dir=JOB_DIR):
+        self.workers = workers
+        self.job_dir = job_dir
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _pool(self):
+        with self.lock:
+            if self.pool is None:
+                # Spawned, not forked: web workers may be running gevent or threads
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.pool
+
+    def _discard_pool(self, pool):
+        """Drop a broken pool (a worker died, e.g. OOM) so the next submit starts a new one."""
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, file, model_name):
+        """Save the upload (a werkzeug FileStorage) and queue it. Returns the status dict."""
+        self.cleanup()
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(job_path(job_id), exist_ok=True)
+        input_path = job_path(job_id, "input.csv")
+        file.save(input_path)
+
+        status = {
+            "job_id": job_id, "model": model_name, "state": "queued",
+            "created": time.time(), "rows_total": None,
+            "rows_done": 0, "ddos_detected": 0, "normal": 0,
+            "rows_per_sec": None, "progress": 0.0, "results": False
+        }
+        write_status(job_id, status)
+        for attempt in range(2):
+            pool = self._pool()
+            try:
+                future = pool.submit(run_job, job_id, model_name)
+                break
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                if attempt:
+                    raise
+        future.add_done_callback(functools.partial(self._on_done, pool, job_id))
+        return status
+
+    def _on_done(self, pool, job_id, future):
+        """run_job records its own errors; an exception here means its worker process died."""
+        error = future.exception() if not future.cancelled() else None
+        if error is None and not future.cancelled():
+            return
+        logging.error(f"CSV job {job_id} lost its worker: {error or 'cancelled'}")
+        if isinstance(error, BrokenProcessPool):
+            self._discard_pool(pool)
+        self._mark_failed(job_id, f"Job worker stopped: {error or 'cancelled'}")
+
+    @staticmethod
+    def _mark_failed(job_id, error):
+        status = read_status(job_id)
+        if status and status["state"] in ("queued", "running"):
+            status.update({"state": "failed", "finished": time.time(), "error": error})
+            write_status(job_id, status)
+
+    def cleanup(self, retention_hours=CSV_JOB_RETENTION_HOURS):
+        if not os.path.isdir(self.job_dir):
+            return
+        now = time.time()
+        cutoff = now - retention_hours * 3600
+        for job_id in os.listdir(self.job_dir):
+            status = read_status(job_id) if JOB_ID_RE.match(job_id) else None
+            if status is None:
+                continue
+            if status.get("finished") and status["finished"] < cutoff:
+                shutil.rmtree(os.path.join(self.job_dir, job_id), ignore_errors=True)
+            elif status["state"] in ("queued", "running"):
+                try:
+                    updated = os.path.getmtime(job_path(job_id, "status.json"))
+                except OSError:
+                    continue
+                if updated < now - CSV_JOB_STALE_HOURS * 3600:
+                    self._mark_failed(job_id, "Job stalled: no progress reported")
+                    try:
+                        os.remove(job_path(job_id, "input.csv"))
+                    except OSError:
+                        pass
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EVENT_DB = os.getenv("EVENT_DB", os.path.join(BASE_DIR, "logs", "events.db"))
+# Events older than this are purged by the writer (0 keeps everything)
+EVENT_RETENTION_DAYS = float(os.getenv("EVENT_RETENTION_DAYS", 30))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", 500))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", 1.0))
+# Requests never block on the store; beyond this many queued events new ones are dropped
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100000))
+
+COLUMNS = ["ts", "kind", "model", "model_version", "source_ip", "destination_ip",
+           "protocol", "prediction", "label", "score", "count", "data"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    model TEXT,
+    model_version INTEGER,
+    source_ip TEXT,
+    destination_ip TEXT,
+    protocol TEXT,
+    prediction INTEGER,
+    label TEXT,
+    score REAL,
+    count INTEGER NOT NULL DEFAULT 1,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_source ON events (source_ip, ts);
+CREATE INDEX IF NOT EXISTS idx_events_destination ON events (destination_ip, ts);
+CREATE INDEX IF NOT EXISTS idx_events_label ON events (label, ts);
+"""
+
+
+def connect(path=EVENT_DB):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # WAL lets dashboard reads run alongside the writers of every worker
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class EventStore:
+    """
+    Append-only log of predictions and alerts in SQLite (WAL mode).
+    record() only enqueues; a background thread writes events in batched
+    transactions and periodically purges rows past the retention period.
+    """
+
+    def __init__(self, path=EVENT_DB, retention_days=EVENT_RETENTION_DAYS,
+                 batch_size=EVENT_BATCH_SIZE, flush_interval=EVENT_FLUSH_INTERVAL,
+                 max_queue=EVENT_QUEUE_SIZE):
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self.writer = None
+        self.local = threading.local()
+        conn = connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    # ---------- writing ----------
+    def record(self, kind, ts=None, data=None, **fields):
+        """Queue one event; never blocks the caller."""
+        row = {column: fields.get(column) for column in COLUMNS}
+        row["ts"] = time.time() if ts is None else ts
+        row["kind"] = kind
+        row["count"] = fields.get("count") or 1
+        row["data"] = json.dumps(data, default=str) if data is not None else None
+        try:
+            self.queue.put_nowait(tuple(row[column] for column in COLUMNS))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, conn, rows):
+        with conn:
+            conn.executemany(
+                f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+        self.written += len(rows)
+
+    def _drain(self, conn, block=True):
+        rows = []
+        try:
+            rows.append(self.queue.get(timeout=self.flush_interval) if block else self.queue.get_nowait())
+            while len(rows) < self.batch_size:
+                rows.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if rows:
+            self._write(conn, rows)
+        return len(rows)
+
+    def _run(self):
+        conn = connect(self.path)
+        last_purge = 0.0
+        while True:
+            try:
+                self._drain(conn)
+                if self.retention_days > 0 and time.time() - last_purge > 3600:
+                    self.purge(conn=conn)
+                    last_purge = time.time()
+            except sqlite3.Error as e:
+                logging.error(f"Event store write failed: {e}")
+                time.sleep(self.flush_interval)
+
+    def start(self):
+        if self.writer is not None:
+            return
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    def flush(self):
+        """Write everything still queued (used at exit and by tools)."""
+        conn = connect(self.path)
+        try:
+            while self._drain(conn, block=False):
+                pass
+        finally:
+            conn.close()
+
+    # ---------- retention ----------
+    def purge(self, older_than_days=None, conn=None, chunk=10000):
+        """Delete expired events in chunks so readers are never locked out for long."""
+        days = self.retention_days if older_than_days is None else older_than_days
+        cutoff = time.time() - days * 86400
+        own = conn is None
+        conn = conn or connect(self.path)
+        deleted = 0
+        try:
+            while True:
+                with conn:
+                    cur = conn.execute(
+                        "DELETE FROM events WHERE id IN (SELECT id FROM events WHERE ts < ? LIMIT ?)",
+                        (cutoff, chunk)
+                    )
+                deleted += cur.rowcount
+                if cur.rowcount < chunk:
+                    break
+            if deleted:
+                # Fold the WAL back into the main file so it does not grow unbounded
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                logging.info(f"Purged {deleted} events older than {days} days")
+        finally:
+            if own:
+                conn.close()
+        return deleted
+
+    # ---------- reading ----------
+    def _reader(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = connect(self.path)
+        return conn
+
+    def _where(self, start=None, end=None, source_ip=None, destination_ip=None,
+               label=None, kind=None, model=None):
+        clauses, params = [], []
+        for column, op, value in [("ts", ">=", start), ("ts", "<", end),
+                                  ("source_ip", "=", source_ip), ("destination_ip", "=", destination_ip),
+                                  ("label", "=", label), ("kind", "=", kind), ("model", "=", model)]:
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit=100, before_id=None, **filters):
+        """
+        Newest-first page of events. Pass the last id of a page as
+        before_id to get the next one (keyset paging, no OFFSET scans).
+        Pages are ordered by (ts, id), the order of the (column, ts)
+        indexes, so a filtered page is an index range scan, never a sort.
+        """
+        conn = self._reader()
+        where, params = self._where(**filters)
+        if before_id is not None:
+            cursor = conn.execute("SELECT ts FROM events WHERE id = ?", (before_id,)).fetchone()
+            if cursor is not None:
+                clause, extra = "(ts, id) < (?, ?)", [cursor["ts"], before_id]
+            else:
+                # The cursor row was purged; its id still bounds the page
+                clause, extra = "id < ?", [before_id]
+            where += (" AND " if where else " WHERE ") + clause
+            params += extra
+        rows = conn.execute(
+            f"SELECT * FROM events{where} ORDER BY ts DESC, id DESC LIMIT ?", params + [int(limit)]
+        ).fetchall()
+
+        events = []
+        for row in rows:
+            event = dict(row)
+            data = event.pop("data")
+            if data:
+                event["data"] = json.loads(data)
+            events.append(event)
+        return events
+
+    def summary(self, **filters):
+        """Event and flow counts per label for the filtered range."""
+        where, params = self._where(**filters)
+        rows = self._reader().execute(
+            f"SELECT label, COUNT(*) AS events, SUM(count) AS flows FROM events{where} GROUP BY label",
+            params
+        ).fetchall()
+        return {row["label"]: {"events": row["events"], "flows": row["flows"]} for row in rows}
@@ -0,0 +1,285 @@
+import os
+import re
+import hmac
+import json
+import time
+import hashlib
+import secrets
+import threading
+from collections import deque
+
+from utils.sketches import TrafficSketch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Registrations are shared files; summaries are kept per worker and merged on read
+FLEET_DIR = os.getenv("FLEET_DIR", os.path.join(BASE_DIR, "logs", "fleet"))
+# Interval summaries kept per agent (288 x 10 s windows = 48 minutes)
+FLEET_HISTORY = int(os.getenv("FLEET_HISTORY", 288))
+# An agent is "stale" after this many of its own intervals without a summary
+FLEET_STALE_INTERVALS = float(os.getenv("FLEET_STALE_INTERVALS", 3))
+# Width of the fleet timeline buckets; 0 uses the longest agent interval,
+# so every agent's summaries fall on one shared grid
+FLEET_BUCKET_SECONDS = float(os.getenv("FLEET_BUCKET_SECONDS", 0))
+# /api/agents/register requires it in X-Enroll-Token. Without it,
+# registration is closed unless FLEET_OPEN_ENROLLMENT=True (local setups)
+FLEET_ENROLL_TOKEN = os.getenv("FLEET_ENROLL_TOKEN")
+FLEET_OPEN_ENROLLMENT = os.getenv("FLEET_OPEN_ENROLLMENT", "False") == "True"
+
+AGENT_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+COUNT_FIELDS = ["packets", "flows", "scored", "attacks", "normal", "fast_path_flows"]
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class UnknownAgent(Exception):
+    """A summary arrived for an agent_id that never registered (or was removed)."""
+
+
+class InvalidSecret(Exception):
+    """Re-registration of an existing agent_id without its current secret."""
+
+
+def _digest(secret):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def attack_rate(summary):
+    """Share of the interval's flows decided as attacks (model or fast path)."""
+    decided = summary["attacks"] + summary["normal"] + summary["fast_path_flows"]
+    return round((summary["attacks"] + summary["fast_path_flows"]) / decided, 4) if decided else 0.0
+
+
+def _public(agent):
+    return {key: value for key, value in agent.items() if key != "secret_sha256"}
+
+
+class FleetStore:
+    """
+    Capture agents on several network segments. Each agent registers once
+    and then posts one pre-aggregated summary per capture interval (counts,
+    attack rate, TrafficSketch), so ingest and views cost O(agents x
+    intervals) however many flows the agents saw.
+    """
+
+    def __init__(self, fleet_dir=FLEET_DIR, history=FLEET_HISTORY):
+        self.fleet_dir = fleet_dir
+        self.history = history
+        self.lock = threading.Lock()
+        self.summaries = {}   # agent_id -> deque of interval summaries
+        self.sketches = {}    # agent_id -> (interval_start, sketch dict) of its latest interval
+        self.secrets = {}     # agent_id -> (registration file mtime, secret digest)
+
+    def _agent_path(self, agent_id):
+        if not AGENT_ID_RE.match(agent_id or ""):
+            raise ValueError("agent_id must be 1-64 characters of [A-Za-z0-9_.-]")
+        return os.path.join(self.fleet_dir, "agents", f"{agent_id}.json")
+
+    # ================= REGISTRATION =================
+    def register(self, agent_id, segment=None, hostname=None, interval_s=None, model=None,
+                 secret=None, enrolled=False):
+        """
+        Register or re-register an agent. Every registration issues a new
+        secret (only its digest is stored); the agent sends it back in
+        X-Agent-Secret. An existing agent_id is only taken over with its
+        current `secret` or by an `enrolled` caller (valid enroll token),
+        else InvalidSecret, so nobody can lock a sensor out by rotating
+        its secret. Returns (agent, secret).
+        """
+        path = self._agent_path(agent_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        existing = _read_json(path)
+        if existing is not None and not enrolled and not self.verify(agent_id, secret):
+            raise InvalidSecret(f"Agent {agent_id} is registered; re-registering needs its X-Agent-Secret")
+        agent = existing or {"agent_id": agent_id, "registered": time.time()}
+        secret = secrets.token_urlsafe(24)
+        agent.update({
+            "segment": segment or agent.get("segment"),
+            "hostname": hostname or agent.get("hostname"),
+            "interval_s": float(interval_s or agent.get("interval_s") or 10),
+            "model": model or agent.get("model"),
+            "last_registered": time.time(),
+            "secret_sha256": _digest(secret)
+        })
+        _write_json(path, agent)
+        return _public(agent), secret
+
+    def verify(self, agent_id, secret):
+        """True if agent_id is registered and secret is its current one."""
+        if not secret:
+            return False
+        try:
+            path = self._agent_path(agent_id)
+            mtime = os.stat(path).st_mtime_ns
+        except (ValueError, OSError):
+            return False
+        cached = self.secrets.get(agent_id)
+        if cached is None or cached[0] != mtime:
+            agent = _read_json(path) or {}
+            cached = self.secrets[agent_id] = (mtime, agent.get("secret_sha256") or "")
+        return bool(cached[1]) and hmac.compare_digest(_digest(secret), cached[1])
+
+    def agent_exists(self, agent_id):
+        try:
+            return os.path.exists(self._agent_path(agent_id))
+        except ValueError:
+            return False
+
+    def agent(self, agent_id):
+        agent = _read_json(self._agent_path(agent_id))
+        return _public(agent) if agent else None
+
+    def agents(self):
+        agent_dir = os.path.join(self.fleet_dir, "agents")
+        if not os.path.isdir(agent_dir):
+            return []
+        found = [_read_json(os.path.join(agent_dir, file))
+                 for file in sorted(os.listdir(agent_dir)) if file.endswith(".json")]
+        return [_public(agent) for agent in found if agent]
+
+    # ================= INGEST =================
+    def ingest(self, agent_id, data):
+        """
+        Store one interval summary. Returns the normalized summary (without
+        its sketch). Raises UnknownAgent, or KeyError / TypeError /
+        ValueError for a malformed summary.
+        """
+        if self.agent(agent_id) is None:
+            raise UnknownAgent(f"Unknown agent: {agent_id}")
+        summary = {
+            "interval_start": float(data["interval_start"]),
+            "interval_s": float(data.get("interval_s", 10)),
+            "received": time.time()
+        }
+        for field in COUNT_FIELDS:
+            summary[field] = int(data.get(field, 0))
+        summary["attack_rate"] = attack_rate(summary)
+        sketch = data.get("sketch")
+        if sketch is not None:
+            # Validates the payload before it reaches a snapshot; the fleet
+            # view merges every agent's sketch, so they must share one config
+            TrafficSketch.from_dict(sketch, TrafficSketch().config())
+
+        with self.lock:
+            history = self.summaries.setdefault(agent_id, deque(maxlen=self.history))
+            history.append(summary)
+            if sketch is not None:
+                latest = self.sketches.get(agent_id)
+                if latest is None or latest[0] <= summary["interval_start"]:
+                    self.sketches[agent_id] = (summary["interval_start"], sketch)
+            snapshot = {
+                "summaries": {agent: list(items) for agent, items in self.summaries.items()},
+                "sketches": {agent: list(item) for agent, item in self.sketches.items()}
+            }
+        self._persist(snapshot)
+        return summary
+
+    def _persist(self, snapshot):
+        os.makedirs(self.fleet_dir, exist_ok=True)
+        _write_json(os.path.join(self.fleet_dir, f"worker_{os.getpid()}.json"), snapshot)
+
+    def _merged(self):
+        """(summaries per agent sorted by interval, latest sketch per agent) across all workers."""
+        summaries, sketches = {}, {}
+        if not os.path.isdir(self.fleet_dir):
+            return summaries, sketches
+        for file in os.listdir(self.fleet_dir):
+            if not (file.startswith("worker_") and file.endswith(".json")):
+                continue
+            snap = _read_json(os.path.join(self.fleet_dir, file))
+            if not snap:
+                continue
+            for agent_id, items in snap.get("summaries", {}).items():
+                summaries.setdefault(agent_id, []).extend(items)
+            for agent_id, (interval_start, sketch) in snap.get("sketches", {}).items():
+                if agent_id not in sketches or sketches[agent_id][0] < interval_start:
+                    sketches[agent_id] = (interval_start, sketch)
+        for agent_id, items in summaries.items():
+            items.sort(key=lambda s: s["interval_start"])
+            summaries[agent_id] = items[-self.history:]
+        return summaries, sketches
+
+    # ================= VIEWS =================
+    def _agent_view(self, agent, history, now):
+        last = history[-1] if history else None
+        totals = {field: sum(s[field] for s in history) for field in COUNT_FIELDS}
+        stale_after = agent.get("interval_s", 10) * FLEET_STALE_INTERVALS
+        return {
+            **agent,
+            "status": "online" if last and now - last["received"] <= stale_after else "stale",
+            "last_summary": last,
+            "intervals": len(history),
+            "totals": totals,
+            "attack_rate": attack_rate(totals)
+        }
+
+    def sensors(self):
+        """Per-agent status, last interval and totals over the retained history."""
+        now = time.time()
+        summaries, _ = self._merged()
+        return [self._agent_view(agent, summaries.get(agent["agent_id"], []), now) for agent in self.agents()]
+
+    def sensor(self, agent_id, n=10):
+        """One agent's view with its interval history and top talkers."""
+        agent = self.agent(agent_id)
+        if agent is None:
+            return None
+        summaries, sketches = self._merged()
+        history = summaries.get(agent_id, [])
+        view = self._agent_view(agent, history, time.time())
+        view["history"] = history
+        if agent_id in sketches:
+            view["top_talkers"] = TrafficSketch.from_dict(sketches[agent_id][1]).top_talkers(n)
+        return view
+
+    def fleet(self, n=10):
+        """Global view: totals, a per-interval timeline summed over agents and merged top talkers."""
+        now = time.time()
+        summaries, sketches = self._merged()
+        agents = {agent["agent_id"]: agent for agent in self.agents()}
+
+        # Agents' windows are neither aligned nor equally long: bucket them
+        # all on one grid, at least as wide as the longest window
+        width = FLEET_BUCKET_SECONDS or max(
+            (s["interval_s"] for items in summaries.values() for s in items), default=10)
+        timeline, reporting = {}, {}
+        for agent_id, items in summaries.items():
+            for s in items:
+                start = s["interval_start"] // width * width
+                bucket = timeline.setdefault(start, {"interval_start": start, "interval_s": width,
+                                                     **{f: 0 for f in COUNT_FIELDS}})
+                reporting.setdefault(start, set()).add(agent_id)
+                for field in COUNT_FIELDS:
+                    bucket[field] += s[field]
+        timeline = [dict(bucket, agents=len(reporting[start]), attack_rate=attack_rate(bucket))
+                    for start, bucket in sorted(timeline.items())]
+
+        totals = {field: sum(bucket[field] for bucket in timeline) for field in COUNT_FIELDS}
+        merged = TrafficSketch()
+        for _, sketch in sketches.values():
+            merged.merge(TrafficSketch.from_dict(sketch))
+
+        sensors = [self._agent_view(agent, summaries.get(agent_id, []), now) for agent_id, agent in agents.items()]
+        return {
+            "agents": len(sensors),
+            "online": sum(1 for sensor in sensors if sensor["status"] == "online"),
+            "totals": totals,
+            "attack_rate": attack_rate(totals),
+            "timeline": timeline,
+            "top_talkers": merged.top_talkers(n),
+            "sensors": [{key: sensor[key] for key in ("agent_id", "segment", "status", "attack_rate", "totals")}
+                        for sensor in sensors]
+        }
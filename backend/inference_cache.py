@@ -0,0 +1,108 @@
+import os
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+INFERENCE_CACHE_SIZE = int(os.getenv("INFERENCE_CACHE_SIZE", 10000))
+INFERENCE_CACHE_TTL = float(os.getenv("INFERENCE_CACHE_TTL", 300))
+# Round feature values to this many significant digits before hashing so
+# near-identical flood flows share an entry (unset = exact match only)
+INFERENCE_CACHE_SIG_DIGITS = os.getenv("INFERENCE_CACHE_SIG_DIGITS")
+
+# Raw columns preprocess_input derives the engineered features from; they
+# are part of the key even when the model does not use them directly
+ENGINEERING_INPUTS = [
+    "Total Fwd Packets",
+    "Total Backward Packets",
+    "Total Length of Fwd Packets",
+    "Total Length of Bwd Packets",
+    "Flow Duration"
+]
+
+
+def _number(value):
+    """Same coercion as preprocess_input: non-numeric and NaN become 0."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def quantize(values, sig_digits):
+    nonzero = values != 0
+    magnitude = np.ones_like(values)
+    magnitude[nonzero] = 10.0 ** (np.floor(np.log10(np.abs(values[nonzero]))) - sig_digits + 1)
+    return np.round(values / magnitude) * magnitude
+
+
+class InferenceCache:
+    """
+    Bounded LRU of (prediction, score) keyed by model, model version and a
+    hash of the flow's feature row. Entries expire after ttl seconds and a
+    new model version never sees the previous version's results.
+    """
+
+    def __init__(self, max_entries=INFERENCE_CACHE_SIZE, ttl=INFERENCE_CACHE_TTL,
+                 sig_digits=INFERENCE_CACHE_SIG_DIGITS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sig_digits = int(sig_digits) if sig_digits not in (None, "") else None
+        self.entries = OrderedDict()   # key -> (value, expires)
+        self.lock = threading.Lock()
+        self.columns = {}              # (model, version) -> key columns
+        self.hits = 0
+        self.misses = 0
+
+    def _key_columns(self, model, version, features):
+        columns = self.columns.get((model, version))
+        if columns is None:
+            columns = list(dict.fromkeys(list(features) + ENGINEERING_INPUTS))
+            self.columns[(model, version)] = columns
+        return columns
+
+    def key(self, model, version, data, features):
+        """Hash of the model-aligned (optionally quantized) feature row; None if uncacheable."""
+        if features is None:
+            return None
+        values = np.array([_number(data.get(col, 0)) for col in self._key_columns(model, version, features)])
+        if self.sig_digits is not None:
+            values = quantize(values, self.sig_digits)
+        digest = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+        return model, version, digest
+
+    def get(self, key, now=None):
+        if key is None:
+            return None
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, now=None):
+        if key is None:
+            return
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.entries[key] = (value, now + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
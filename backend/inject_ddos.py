@@ -1,41 +1,35 @@
-import requests
-import time
+"""
+Replays the known attack payload from generate_payload.py against the local
+backend to fill the dashboard with alerts, now a preset of load_generator.
+Raise --rate / --connections to turn it into a real stress test.
+"""
 import json
-import subprocess
 import sys
 
+from generate_payload import build_payload
+from load_generator import main
+
 API_URL = "http://127.0.0.1:5000/api/predict?model=random_forest"
 
 print("Fetching known malicious payload from generate_payload.py...")
+payload = build_payload()
+if payload is None:
+    sys.exit(1)
+
+# Add dummy IP metadata so the dashboard table has data to display
+payload["Source IP"] = "192.168.1.105"
+payload["Destination IP"] = "10.0.0.50"
+payload["Protocol"] = 6 # TCP
 
-try:
-    # Run your existing payload generator to get the exact ML features for an attack
-    result = subprocess.run([sys.executable, 'generate_payload.py'], capture_output=True, text=True)
-    payload = json.loads(result.stdout)
-    
-    # Add dummy IP metadata so the dashboard table has data to display
-    payload["Source IP"] = "192.168.1.105"
-    payload["Destination IP"] = "10.0.0.50"
-    payload["Protocol"] = 6 # TCP
-    
-    print("Payload acquired! Injecting DDoS alerts to the backend...")
-    print("Press Ctrl+C to stop.")
-    
-    # Spam the backend with the known DDoS attack signature
-    count = 1
-    while True:
-        response = requests.post(API_URL, json=payload)
-        if response.status_code == 200:
-            res_data = response.json()
-            print(f"[{count}] Alert Sent! Prediction: {res_data.get('label')}")
-        else:
-            print(f"Failed to inject: {response.status_code}")
-        
-        count += 1
-        time.sleep(0.5) # Send 2 alerts per second to fill up the dashboard
+print("Payload acquired! Injecting DDoS alerts to the backend...")
+print("Press Ctrl+C to stop.")
 
-except json.JSONDecodeError:
-    print("Error: Could not parse JSON from generate_payload.py. Output was:")
-    print(result.stdout)
-except KeyboardInterrupt:
-    print("\n Injection stopped safely.")
\ No newline at end of file
+# Send 2 alerts per second by default to fill up the dashboard
+main(
+    payloads=[json.dumps(payload).encode()],
+    url=API_URL,
+    rate=2,
+    arrival="constant",
+    connections=1,
+    duration=3600
+)
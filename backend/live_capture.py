@@ -1,6 +1,9 @@
 import os
 import sys
 import time
+import socket
+import argparse
+import threading
 import requests
 import joblib
 import numpy as np
@@ -12,12 +15,89 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.dirname(BASE_DIR))
 
 from utils.preprocess_input import preprocess_input
+from utils.sketches import TrafficSketch
+from utils.flood_detector import FloodDetector
+from utils.window_features import WindowAccumulator
+from wire_format import MSGPACK_MIME, encode_flows
 
-# Configuration
-API_URL = "https://cyber-sentinel-ai-1.onrender.com"
+# Configuration (overridable from the command line, see main())
+API_URL = os.getenv("API_URL", "https://cyber-sentinel-ai-1.onrender.com")
 API_MODEL = "random_forest"  
+# Identifies this sensor to the backend's fleet view and admission control
+AGENT_ID = os.getenv("AGENT_ID", socket.gethostname())
+AGENT_SEGMENT = os.getenv("AGENT_SEGMENT")
+# The backend's FLEET_ENROLL_TOKEN; registration is refused without it
+AGENT_ENROLL_TOKEN = os.getenv("AGENT_ENROLL_TOKEN")
+WINDOW_SECONDS = float(os.getenv("CAPTURE_WINDOW", 10))
+# Which scored flows are posted individually: "all", "attacks" or "none"
+# (the per-window summary always covers every flow)
+SEND_FLOWS = os.getenv("SEND_FLOWS", "all")
+# "json": one /api/predict call per flow; "msgpack": one binary
+# /api/predict-batch call per window using the backend's column schema
+WIRE_FORMAT = os.getenv("WIRE_FORMAT", "json")
+wire_schema = None
+
+# Every request carries the agent id; set up in main()
+session = requests.Session()
+
+# Per-packet columns of the current window, turned into flow features in one pass
+window = WindowAccumulator()
+window_start = None
+# Set when replaying a pcap: windows are cut on packet timestamps
+on_window_end = None
+# Fixed-memory top talkers / distinct sources for the current window
+sketch = TrafficSketch()
+
+# Rate-based fast path: destinations flagged as flooded this window
+detector = FloodDetector()
+flood_destinations = {}
+
+
+def post_fast_path_alert(alert):
+    try:
+        session.post(f"{API_URL}/api/alerts", json=alert, timeout=2)
+    except Exception as e:
+        print("Failed to send fast-path alert:", e)
+
+
+def report_flood(detection):
+    """Alert on a blatant flood immediately, without waiting for the window."""
+    flood_destinations[detection["destination_ip"]] = detection
+    print(f"FAST PATH {detection['kind']}: {detection['destination_ip']} "
+          f"({detection['rate_pps']} pkt/s, SYN ratio {detection['syn_ratio']})")
+    alert = dict(detection, flows=0)
+    # Posted off the sniff callback so capture never blocks on the network
+    threading.Thread(target=post_fast_path_alert, args=(alert,), daemon=True).start()
+
+def fetch_wire_schema():
+    resp = session.get(f"{API_URL}/api/schema", params={"model": API_MODEL}, timeout=5)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def post_flow_batch(features, keys):
+    """Send a window's flows as one MessagePack batch; renegotiates the schema on 409."""
+    global wire_schema
+    for _ in range(2):
+        if wire_schema is None:
+            wire_schema = fetch_wire_schema()
+        columns = wire_schema["columns"]
+        matrix = features.reindex(columns=columns, fill_value=0).to_numpy(dtype=float)
+        body = encode_flows(
+            matrix, columns,
+            [key[0] for key in keys],
+            [key[1] for key in keys]
+        )
+        response = session.post(
+            f"{API_URL}/api/predict-batch?model={API_MODEL}",
+            data=body, headers={"Content-Type": MSGPACK_MIME}, timeout=10
+        )
+        if response.status_code != 409:
+            return response
+        # The served model changed its feature set
+        wire_schema = None
+    return response
 
-flows = {}
 
 def get_flow_key(packet):
     if packet.haslayer(TCP):
@@ -38,6 +118,7 @@ def get_flow_key(packet):
 
 
 def process_packet(packet):
+    global window_start
     if not packet.haslayer(IP):
         return
 
@@ -45,170 +126,251 @@ def process_packet(packet):
     if key is None:
         return
 
-    current_time = time.time()
+    # Capture timestamp, so replayed pcaps keep their original timing
+    current_time = float(packet.time)
     length = len(packet)
 
-    if key not in flows:
-        flows[key] = {
-            "start_time": current_time,
-            "last_seen": current_time,
-            "fwd_packets": 0,
-            "bwd_packets": 0,
-            "fwd_bytes": 0,
-            "bwd_bytes": 0,
-            "fwd_packet_lengths": [],
-            "bwd_packet_lengths": [],
-            "packet_times": [],
-            "flags": {
-                "FIN": 0,
-                "SYN": 0,
-                "RST": 0,
-                "PSH": 0,
-                "ACK": 0,
-                "URG": 0,
-                "ECE": 0,
-                "CWE": 0
-            }
-        }
-
-    flow = flows[key]
-    flow["last_seen"] = current_time
-    flow["packet_times"].append(current_time)
-
-    if packet[IP].src == key[0]:
-        flow["fwd_packets"] += 1
-        flow["fwd_bytes"] += length
-        flow["fwd_packet_lengths"].append(length)
-    else:
-        flow["bwd_packets"] += 1
-        flow["bwd_bytes"] += length
-        flow["bwd_packet_lengths"].append(length)
+    if window_start is None:
+        window_start = current_time
+    elif on_window_end is not None and current_time - window_start >= WINDOW_SECONDS:
+        on_window_end(current_time)
 
-    if packet.haslayer(TCP):
-        flags = packet[TCP].flags
-        if flags & 0x01: flow["flags"]["FIN"] += 1
-        if flags & 0x02: flow["flags"]["SYN"] += 1
-        if flags & 0x04: flow["flags"]["RST"] += 1
-        if flags & 0x08: flow["flags"]["PSH"] += 1
-        if flags & 0x10: flow["flags"]["ACK"] += 1
-        if flags & 0x20: flow["flags"]["URG"] += 1
-        if flags & 0x40: flow["flags"]["ECE"] += 1
-        if flags & 0x80: flow["flags"]["CWE"] += 1
+    sketch.update(key[0], key[1], key[3])
 
+    is_syn = packet.haslayer(TCP) and (packet[TCP].flags & 0x12) == 0x02
+    detection = detector.update(key[1], key[4], is_syn, current_time)
+    if detection is not None:
+        report_flood(detection)
 
-MODEL_PATH = os.path.join(BASE_DIR, "saved_models", "random_forest_ddos.joblib")
-model = joblib.load(MODEL_PATH)
-
-# --- Backend Health Check & Model Sync ---
-print(f"Checking backend health at {API_URL}...")
-try:
-    resp = requests.get(f"{API_URL}/api/health", timeout=5)
-    if resp.status_code == 200:
-        data = resp.json()
-        available = data.get('available_models', [])
-        print(f"Backend Online. Available Models: {available}")
-        
-        if API_MODEL not in available:
-            if available:
-                print(f"Warning: Configured model '{API_MODEL}' not found on backend.")
-                print(f"Switching to '{available[0]}' automatically.")
-                API_MODEL = available[0]
-            else:
-                print("CRITICAL: No models loaded on the backend!")
-                print("Ensure you have pushed the .joblib files to backend/saved_models/ on GitHub.")
-                sys.exit(1)
-    else:
-        print(f"Backend returned status {resp.status_code}")
-except Exception as e:
-    print(f"Could not connect to backend: {e}")
+    flags = int(packet[TCP].flags) if packet.haslayer(TCP) else 0
+    window.add(key, current_time, length, packet[IP].src == key[0], flags)
 
-try:
-    while True:
-        flows = {}  # Reset flows for the new window
-        print("Capturing packets for 10 seconds...")
-        sniff(timeout=10, prn=process_packet)
-
-        print("\nEvaluating Flows...\n")
-
-        for key, flow in flows.items():
-
-            duration = flow["last_seen"] - flow["start_time"]
-            if duration <= 0:
-                continue
-
-            total_packets = flow["fwd_packets"] + flow["bwd_packets"]
-            total_bytes = flow["fwd_bytes"] + flow["bwd_bytes"]
-
-            fwd_pkt_lengths = flow["fwd_packet_lengths"]
-            bwd_pkt_lengths = flow["bwd_packet_lengths"]
-
-            flow_iat = np.diff(flow["packet_times"])
-            flow_iat_mean = np.mean(flow_iat) if len(flow_iat) > 0 else 0
-            flow_iat_std = np.std(flow_iat) if len(flow_iat) > 0 else 0
-            flow_iat_max = np.max(flow_iat) if len(flow_iat) > 0 else 0
-            flow_iat_min = np.min(flow_iat) if len(flow_iat) > 0 else 0
-
-            feature_dict = {
-                "Source Port": key[2],
-                "Destination Port": key[3],
-                "Protocol": key[4],
-                "Flow Duration": duration,
-                "Total Fwd Packets": flow["fwd_packets"],
-                "Total Backward Packets": flow["bwd_packets"],
-                "Total Length of Fwd Packets": flow["fwd_bytes"],
-                "Total Length of Bwd Packets": flow["bwd_bytes"],
-                "Fwd Packet Length Max": max(fwd_pkt_lengths) if fwd_pkt_lengths else 0,
-                "Fwd Packet Length Min": min(fwd_pkt_lengths) if fwd_pkt_lengths else 0,
-                "Fwd Packet Length Mean": np.mean(fwd_pkt_lengths) if fwd_pkt_lengths else 0,
-                "Fwd Packet Length Std": np.std(fwd_pkt_lengths) if fwd_pkt_lengths else 0,
-                "Bwd Packet Length Max": max(bwd_pkt_lengths) if bwd_pkt_lengths else 0,
-                "Bwd Packet Length Min": min(bwd_pkt_lengths) if bwd_pkt_lengths else 0,
-                "Bwd Packet Length Mean": np.mean(bwd_pkt_lengths) if bwd_pkt_lengths else 0,
-                "Bwd Packet Length Std": np.std(bwd_pkt_lengths) if bwd_pkt_lengths else 0,
-                "Flow Bytes/s": (total_bytes / duration) if duration > 0 else 0,
-                "Flow Packets/s": (total_packets / duration) if duration > 0 else 0,
-                "Flow IAT Mean": flow_iat_mean,
-                "Flow IAT Std": flow_iat_std,
-                "Flow IAT Max": flow_iat_max,
-                "Flow IAT Min": flow_iat_min,
-                "FIN Flag Count": flow["flags"]["FIN"],
-                "SYN Flag Count": flow["flags"]["SYN"],
-                "RST Flag Count": flow["flags"]["RST"],
-                "PSH Flag Count": flow["flags"]["PSH"],
-                "ACK Flag Count": flow["flags"]["ACK"],
-                "URG Flag Count": flow["flags"]["URG"],
-                "CWE Flag Count": flow["flags"]["CWE"],
-                "ECE Flag Count": flow["flags"]["ECE"],
-            }
-
-            df = pd.DataFrame([feature_dict])
-            json_payload = df.to_dict(orient="records")[0]
-
-            # Add metadata for backend display (not used for prediction)
-            json_payload["Source IP"] = key[0]
-            json_payload["Destination IP"] = key[1]
-
-            df = preprocess_input(df, getattr(model, "feature_names_in_", None))
-            prediction = model.predict(df)
-
-            label = "DDoS Attack" if prediction[0] == 1 else "Normal"
-
-            # SEND EVERY FLOW TO BACKEND
-            try:
-                response = requests.post(
-                    f"{API_URL}/api/predict?model={API_MODEL}",
-                    json=json_payload,
-                    timeout=2
-                )
-                if response.status_code == 200:
-                    print(f"Sent to backend: {label}")
+MODEL_PATH = os.path.join(BASE_DIR, "saved_models", "random_forest_ddos.joblib")
+model = None
+
+
+def check_backend():
+    """Backend Health Check & Model Sync"""
+    global API_MODEL
+    print(f"Checking backend health at {API_URL}...")
+    try:
+        resp = session.get(f"{API_URL}/api/health", timeout=5)
+        # A backend in STARTUP_MODE=fast answers before its models are loaded
+        for _ in range(30):
+            if resp.status_code != 200 or not resp.json().get("models_loading"):
+                break
+            time.sleep(1)
+            resp = session.get(f"{API_URL}/api/health", timeout=5)
+        if resp.status_code == 200:
+            data = resp.json()
+            available = data.get('available_models', [])
+            print(f"Backend Online. Available Models: {available}")
+
+            if API_MODEL not in available:
+                if available:
+                    print(f"Warning: Configured model '{API_MODEL}' not found on backend.")
+                    print(f"Switching to '{available[0]}' automatically.")
+                    API_MODEL = available[0]
                 else:
-                    print(f"Backend Error {response.status_code}: {response.text[:100]}")
-            except Exception as e:
-                print("Failed to send to backend (Connection Error):", e)
-
+                    print("CRITICAL: No models loaded on the backend!")
+                    print("Ensure you have pushed the .joblib files to backend/saved_models/ on GitHub.")
+                    sys.exit(1)
+        else:
+            print(f"Backend returned status {resp.status_code}")
+    except Exception as e:
+        print(f"Could not connect to backend: {e}")
+
+
+def register_agent():
+    try:
+        resp = session.post(f"{API_URL}/api/agents/register", json={
+            "agent_id": AGENT_ID, "segment": AGENT_SEGMENT, "hostname": socket.gethostname(),
+            "interval_s": WINDOW_SECONDS, "model": API_MODEL
+        }, headers={"X-Enroll-Token": AGENT_ENROLL_TOKEN or ""}, timeout=5)
+        if resp.status_code == 200:
+            # Proves X-Agent-Id on every later request (own rate-limit bucket, summaries)
+            session.headers["X-Agent-Secret"] = resp.json()["secret"]
+            print(f"Registered as agent '{AGENT_ID}'")
+        else:
+            print(f"Agent registration failed ({resp.status_code}): {resp.text[:100]}")
+    except Exception as e:
+        print("Failed to register agent:", e)
+
+
+def post_window_summary(summary):
+    """One pre-aggregated summary per window; re-registers if the backend forgot this agent or its secret."""
+    for _ in range(2):
+        try:
+            resp = session.post(f"{API_URL}/api/agents/{AGENT_ID}/summary", json=summary, timeout=5)
+        except Exception as e:
+            print("Failed to send window summary:", e)
+            return
+        if resp.status_code not in (401, 404):
+            break
+        register_agent()
+    if resp.status_code != 200:
+        print(f"Summary rejected ({resp.status_code}): {resp.text[:100]}")
+
+
+def evaluate_window(now):
+    """Score the flows of the finished window and report them with the window summary."""
+    n_flows = len(window)
+    print(f"\nEvaluating {n_flows} flows...\n")
+
+    # Flows towards flooded destinations are already decided: count them
+    # per destination and only send the ambiguous rest to the model
+    fast_path_counts = {}
+    for key in window.keys:
+        if key[1] in flood_destinations or detector.is_flagged(key[1], now):
+            fast_path_counts[key[1]] = fast_path_counts.get(key[1], 0) + 1
+
+    # Features for every flow of the window at once, then one model call
+    keys, features = window.features()
+    if fast_path_counts and keys:
+        keep = np.array([key[1] not in fast_path_counts for key in keys])
+        keys = [key for key, kept in zip(keys, keep) if kept]
+        features = features[keep].reset_index(drop=True)
+
+    labels = []
+    if keys:
+        predictions = model.predict(preprocess_input(features, getattr(model, "feature_names_in_", None)))
+        labels = ["DDoS Attack" if p == 1 else "Normal" for p in predictions]
+
+    # The window summary counts every scored flow; only SEND_FLOWS are posted one by one
+    scored = len(keys)
+    attacks = labels.count("DDoS Attack")
+    if SEND_FLOWS == "none":
+        keys = []
+    elif SEND_FLOWS == "attacks" and keys:
+        sent = np.array([label == "DDoS Attack" for label in labels])
+        keys = [key for key, s in zip(keys, sent) if s]
+        labels = [label for label, s in zip(labels, sent) if s]
+        features = features[sent].reset_index(drop=True)
+
+    if WIRE_FORMAT == "msgpack" and keys:
+        for key, label in zip(keys, labels):
             print(f"{label}: {key}")
-            print("=" * 60)
-except KeyboardInterrupt:
-    print("\n Capture stopped by user.")
-    sys.exit(0)
\ No newline at end of file
+        try:
+            response = post_flow_batch(features, keys)
+            if response.status_code == 200:
+                print(f"Sent {len(keys)} flows to backend in one batch")
+            else:
+                print(f"Backend Error {response.status_code}: {response.text[:100]}")
+        except Exception as e:
+            print("Failed to send flow batch to backend:", e)
+        keys = []
+
+    for key, label, json_payload in zip(keys, labels, features.to_dict(orient="records")):
+        # Add metadata for backend display (not used for prediction)
+        json_payload["Source IP"] = key[0]
+        json_payload["Destination IP"] = key[1]
+
+        # SEND SCORED FLOWS TO BACKEND
+        try:
+            # Flows the local model calls benign are shed first under load
+            response = session.post(
+                f"{API_URL}/api/predict?model={API_MODEL}",
+                json=json_payload,
+                headers={"X-Flow-Priority": "low"} if label == "Normal" else None,
+                timeout=2
+            )
+            if response.status_code == 200:
+                print(f"Sent to backend: {label}")
+            elif response.status_code in (429, 503):
+                print(f"Backend shed flow ({response.status_code}), retry after "
+                      f"{response.headers.get('Retry-After', '?')}s")
+            else:
+                print(f"Backend Error {response.status_code}: {response.text[:100]}")
+        except Exception as e:
+            print("Failed to send to backend (Connection Error):", e)
+
+        print(f"{label}: {key}")
+        print("=" * 60)
+
+    for dst, count in fast_path_counts.items():
+        detection = flood_destinations.get(dst) or detector.describe(dst, now)
+        print(f"FAST PATH {detection['kind']}: {count} flows to {dst} skipped the model")
+        post_fast_path_alert(dict(detection, flows=count))
+
+    post_window_summary({
+        "interval_start": window_start if window_start is not None else now - WINDOW_SECONDS,
+        "interval_s": WINDOW_SECONDS,
+        "packets": sketch.packets,
+        "flows": n_flows,
+        "scored": scored,
+        "attacks": attacks,
+        "normal": scored - attacks,
+        "fast_path_flows": sum(fast_path_counts.values()),
+        # One merged top-talker summary per window, however many packets were seen
+        "sketch": sketch.to_dict()
+    })
+
+
+def reset_window(now=None):
+    global window, sketch, flood_destinations, window_start
+    window = WindowAccumulator()  # Reset flows for the new window
+    sketch = TrafficSketch()
+    flood_destinations = {}
+    window_start = now
+
+
+def roll_window(now):
+    """Close the current window at packet time `now` (pcap replay)."""
+    evaluate_window(now)
+    reset_window(now)
+
+
+def capture_live():
+    while True:
+        reset_window(time.time())
+        print(f"Capturing packets for {WINDOW_SECONDS:g} seconds...")
+        sniff(timeout=WINDOW_SECONDS, prn=process_packet, store=False)
+        evaluate_window(time.time())
+
+
+def replay_pcaps(paths):
+    """Feed capture files through the same pipeline, cutting windows on packet timestamps."""
+    global on_window_end
+    on_window_end = roll_window
+    for path in paths:
+        reset_window()
+        print(f"Replaying {path}...")
+        sniff(offline=path, prn=process_packet, store=False)
+        if len(window):
+            evaluate_window(window_start + WINDOW_SECONDS)
+
+
+def main():
+    global API_URL, API_MODEL, AGENT_ID, AGENT_SEGMENT, WINDOW_SECONDS, SEND_FLOWS, WIRE_FORMAT, model
+    parser = argparse.ArgumentParser(description="Cyber Sentinel capture agent")
+    parser.add_argument("--agent-id", default=AGENT_ID)
+    parser.add_argument("--segment", default=AGENT_SEGMENT, help="network segment this sensor watches")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--model", default=API_MODEL, help="backend model for posted flows")
+    parser.add_argument("--window", type=float, default=WINDOW_SECONDS, help="capture window in seconds")
+    parser.add_argument("--send-flows", choices=["all", "attacks", "none"], default=SEND_FLOWS)
+    parser.add_argument("--wire-format", choices=["json", "msgpack"], default=WIRE_FORMAT)
+    parser.add_argument("--pcap", nargs="+", help="replay capture files instead of sniffing live")
+    args = parser.parse_args()
+
+    API_URL, API_MODEL = args.api_url.rstrip("/"), args.model
+    AGENT_ID, AGENT_SEGMENT, WINDOW_SECONDS = args.agent_id, args.segment, args.window
+    SEND_FLOWS, WIRE_FORMAT = args.send_flows, args.wire_format
+    session.headers["X-Agent-Id"] = AGENT_ID
+
+    model = joblib.load(MODEL_PATH)
+    check_backend()
+    register_agent()
+
+    try:
+        if args.pcap:
+            replay_pcaps(args.pcap)
+        else:
+            capture_live()
+    except KeyboardInterrupt:
+        print("\n Capture stopped by user.")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
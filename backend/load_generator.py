@@ -0,0 +1,272 @@
+"""
+Asyncio load generator for the Cyber Sentinel backend (local testing only).
+
+Replays flow feature vectors sampled from the processed dataset (mixed
+benign/attack at --attack-ratio) over persistent keep-alive connections,
+either open-loop at a target arrival rate or closed-loop as fast as the
+connections allow, and reports throughput, latency percentiles and errors.
+
+    python load_generator.py --rate 500 --duration 30 --connections 32
+    python load_generator.py --rate 0 --connections 64          # closed loop
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "cicddos2019_processed.csv")
+
+DEFAULT_URL = "http://127.0.0.1:5000/api/predict?model=random_forest"
+
+
+# ================= FLOW SOURCE =================
+def sample_flows(n_samples=5000, attack_ratio=0.5, data_path=PROCESSED_DATA_PATH, seed=42):
+    """
+    Return a list of JSON-encoded payloads sampled from the processed
+    dataset, mixing attack (Label 1) and benign rows at attack_ratio.
+    """
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"{data_path} not found. Run preprocessing first or pass --payload-file.")
+
+    df = pd.read_csv(data_path)
+    df.columns = df.columns.str.strip()
+
+    n_attack = int(n_samples * attack_ratio)
+    parts = []
+    for label, n in ((1, n_attack), (0, n_samples - n_attack)):
+        rows = df[df["Label"] == label]
+        if n and len(rows):
+            parts.append(rows.sample(n, replace=len(rows) < n, random_state=seed))
+    sample = pd.concat(parts).sample(frac=1, random_state=seed).drop(columns=["Label"])
+
+    rng = np.random.default_rng(seed)
+    sample["Source IP"] = [f"192.168.{a}.{b}" for a, b in rng.integers(0, 255, size=(len(sample), 2))]
+    sample["Destination IP"] = "10.0.0.50"
+
+    return [json.dumps(record).encode() for record in sample.to_dict(orient="records")]
+
+
+# ================= KEEP-ALIVE HTTP CLIENT =================
+class Connection:
+    """A single persistent HTTP/1.1 connection (reconnects after errors)."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+        self.writer.write(head + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self.reader.readline()).strip() or b"0", 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# ================= LOAD LOOP =================
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.dropped = 0
+
+    def summary(self, elapsed):
+        lat = np.asarray(self.latencies) * 1000
+        completed = len(self.latencies)
+        ok = sum(c for s, c in self.statuses.items() if 200 <= s < 300)
+        failed = completed - ok + self.errors
+        summary = {
+            "duration_s": round(elapsed, 3),
+            "completed": completed,
+            "errors": failed,
+            "dropped": self.dropped,
+            "error_rate": round(failed / max(completed + self.errors, 1), 4),
+            "throughput_rps": round(completed / elapsed, 2) if elapsed > 0 else 0,
+            "status_codes": {str(k): v for k, v in sorted(self.statuses.items())}
+        }
+        if completed:
+            for p in (50, 90, 99, 99.9):
+                summary[f"p{p}_ms"] = round(float(np.percentile(lat, p)), 3)
+            summary["max_ms"] = round(float(lat.max()), 3)
+        return summary
+
+
+async def _worker(conn, queue, method, path, results):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        scheduled, body = item
+        try:
+            status = await conn.request(method, path, body)
+            # Latency is measured from the scheduled send time, so queueing
+            # behind a slow server is counted (no coordinated omission)
+            results.latencies.append(time.perf_counter() - scheduled)
+            results.statuses[status] += 1
+        except (OSError, asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            results.errors += 1
+            conn.close()
+
+
+async def _closed_loop_worker(conn, payloads, method, path, results, deadline):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await conn.request(method, path, random.choice(payloads))
+            results.latencies.append(time.perf_counter() - start)
+            results.statuses[status] += 1
+        except (OSError, asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            results.errors += 1
+            conn.close()
+            await asyncio.sleep(0.01)
+
+
+async def run_load(url, payloads, rate, duration, connections, method="POST",
+                   arrival="poisson", max_backlog=10000):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    conns = [Connection(parts.hostname, parts.port or 80) for _ in range(connections)]
+    results = Results()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    if rate <= 0:
+        await asyncio.gather(*(
+            _closed_loop_worker(conn, payloads, method, path, results, deadline)
+            for conn in conns
+        ))
+    else:
+        queue = asyncio.Queue()
+        workers = [asyncio.create_task(_worker(conn, queue, method, path, results)) for conn in conns]
+
+        # Open loop: arrivals follow the schedule regardless of responses
+        next_send = start
+        while next_send < deadline:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if queue.qsize() >= max_backlog:
+                results.dropped += 1
+            else:
+                queue.put_nowait((next_send, random.choice(payloads)))
+            gap = random.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+            next_send += gap
+
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+
+    for conn in conns:
+        conn.close()
+    return results.summary(time.perf_counter() - start)
+
+
+def print_summary(summary):
+    print("\n========== Load Test Summary ==========")
+    for key, value in summary.items():
+        print(f"{key:<16}: {value}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="High-rate synthetic load generator")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--rate", type=float, default=200, help="target requests/sec (0 = closed loop)")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--samples", type=int, default=5000, help="flows sampled from the dataset")
+    parser.add_argument("--attack-ratio", type=float, default=0.5)
+    parser.add_argument("--data", default=PROCESSED_DATA_PATH)
+    parser.add_argument("--payload-file", help="JSON file with a single payload to replay instead of the dataset")
+    parser.add_argument("--output", help="write the summary as JSON")
+    return parser
+
+
+def main(argv=None, payloads=None, **defaults):
+    """CLI entry point; presets pass fixed payloads and default overrides."""
+    parser = build_parser()
+    parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+
+    if payloads is None:
+        if args.method == "GET":
+            payloads = [b""]
+        elif args.payload_file:
+            with open(args.payload_file) as f:
+                payloads = [json.dumps(json.load(f)).encode()]
+        else:
+            print(f"Sampling {args.samples} flows from {args.data}...")
+            payloads = sample_flows(args.samples, args.attack_ratio, args.data)
+
+    mode = "closed loop" if args.rate <= 0 else f"{args.rate:g} req/s ({args.arrival})"
+    print(f"Target: {args.url} | {mode} | {args.connections} connections | {args.duration:g}s")
+
+    try:
+        summary = asyncio.run(run_load(
+            args.url, payloads, args.rate, args.duration,
+            args.connections, args.method, args.arrival
+        ))
+    except KeyboardInterrupt:
+        print("\n Load test stopped by user.")
+        sys.exit(0)
+
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary saved to {args.output}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import os
+import sys
+import json
+import time
+import math
+import bisect
+import secrets
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead workers' files are kept instead of folded
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Each gunicorn worker flushes a snapshot here; /api/metrics merges them
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(BASE_DIR, "logs", "metrics"))
+FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+# Cumulative counters / histograms of exited workers, folded in by collect()
+RETIRED_FILE = "retired.json"
+
+# Allowed sampling profiler intervals in seconds: shorter ones would spin a core
+PROFILER_MIN_INTERVAL, PROFILER_MAX_INTERVAL = 0.001, 1.0
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    """Label value escaped as the Prometheus text format requires."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """
+    In-process counters, gauges and fixed-bucket histograms. Updates are a
+    dict lookup plus a bisect under a lock, cheap enough for every request.
+    """
+
+    def __init__(self, metrics_dir=METRICS_DIR):
+        self.metrics_dir = metrics_dir
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.flusher = None
+        self._worker = None
+
+    # ---------- updates ----------
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+
+    def add_gauge(self, name, value, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            hist[0][index] += 1
+            hist[1] += seconds
+            hist[2] += 1
+
+    @contextmanager
+    def stage(self, route, model, stage):
+        """Time one stage (parse / preprocess / inference / serialize) of a request."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start,
+                         route=route, model=model, stage=stage)
+
+    # ---------- cross-worker aggregation ----------
+    def worker_id(self):
+        """(pid, nonce) of this process; a reused pid gets a new nonce and file."""
+        if self._worker is None or self._worker[0] != os.getpid():
+            self._worker = (os.getpid(), secrets.token_hex(4), time.time())
+        return self._worker
+
+    def snapshot(self):
+        pid, nonce, started = self.worker_id()
+        with self.lock:
+            return {
+                "pid": pid,
+                "nonce": nonce,
+                "started": started,
+                "counters": [[n, list(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                "histograms": [[n, list(l), h[0][:], h[1], h[2]] for (n, l), h in self.histograms.items()]
+            }
+
+    def flush(self):
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        pid, nonce, _ = self.worker_id()
+        path = os.path.join(self.metrics_dir, f"worker_{pid}_{nonce}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def start_flusher(self):
+        if self.flusher is None:
+            self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self.flusher.start()
+
+    def _snapshots(self):
+        """{file: snapshot} of every worker file, and the set of files of exited workers."""
+        snaps = {}
+        for file in os.listdir(self.metrics_dir):
+            if not (file.startswith("worker_") and file.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.metrics_dir, file)) as f:
+                    snaps[file] = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+        # Only the newest file per pid can belong to a live process
+        newest = {}
+        for file, snap in snaps.items():
+            if snap["pid"] not in newest or snaps[newest[snap["pid"]]].get("started", 0) < snap.get("started", 0):
+                newest[snap["pid"]] = file
+        dead = {file for file, snap in snaps.items()
+                if newest[snap["pid"]] != file or not _pid_alive(snap["pid"])}
+        return snaps, dead
+
+    def _retire(self, snaps, dead):
+        """
+        Fold exited workers' counters and histograms into RETIRED_FILE and
+        delete their files, under a directory lock so concurrent collectors
+        never fold a file twice. Returns the retired totals as a snapshot.
+        """
+        path = os.path.join(self.metrics_dir, RETIRED_FILE)
+        if fcntl is None:
+            return {"counters": [], "histograms": [], "folded": []}
+
+        with open(os.path.join(self.metrics_dir, ".retire.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(path) as f:
+                    retired = json.load(f)
+            except (OSError, ValueError):
+                retired = {"counters": [], "histograms": [], "folded": []}
+
+            # Files folded by an earlier collect() that stopped before deleting them
+            folded = set(retired["folded"])
+            pending = [file for file in sorted(dead) if file not in folded]
+            if pending:
+                totals = _merge([retired] + [snaps[file] for file in pending])
+                retired = {
+                    "counters": [[n, list(l), v] for (n, l), v in totals[0].items()],
+                    "histograms": [[n, list(l), h[0], h[1], h[2]] for (n, l), h in totals[2].items()],
+                    "folded": sorted(folded | set(pending))
+                }
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(retired, f)
+                os.replace(tmp_path, path)
+
+            for file in dead:
+                try:
+                    os.remove(os.path.join(self.metrics_dir, file))
+                except FileNotFoundError:
+                    pass
+            remaining = set(os.listdir(self.metrics_dir))
+            retired["folded"] = [file for file in retired["folded"] if file in remaining]
+        return retired
+
+    def collect(self):
+        """
+        Merge every worker's snapshot. Counters and histograms of exited
+        workers are folded into RETIRED_FILE (they are cumulative); gauges
+        only count live workers.
+        """
+        self.flush()
+        snaps, dead = self._snapshots()
+        retired = self._retire(snaps, dead)
+        live = [snap for file, snap in snaps.items() if file not in dead]
+        if fcntl is None:
+            live += [snaps[file] for file in dead]
+        counters, _, histograms = _merge([retired] + live)
+        gauges = _merge([snap for file, snap in snaps.items() if file not in dead])[1]
+        return counters, gauges, histograms
+
+    def render(self):
+        """Prometheus text exposition of the merged metrics."""
+        counters, gauges, histograms = self.collect()
+        lines = []
+
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        for (name, labels), value in sorted(counters.items()):
+            lines.append(f"sentinel_{name}_total{fmt(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            lines.append(f"sentinel_{name}{fmt(labels)} {value}")
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip(list(BUCKETS) + ["+Inf"], buckets):
+                cumulative += bucket
+                lines.append(f"sentinel_{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"sentinel_{name}_sum{fmt(labels)} {total}")
+            lines.append(f"sentinel_{name}_count{fmt(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _merge(snaps):
+    """Sum counters, gauges and histograms over snapshots."""
+    counters, gauges, histograms = Counter(), Counter(), {}
+    for snap in snaps:
+        for name, labels, value in snap.get("counters", []):
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, value in snap.get("gauges", []):
+            gauges[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, buckets, total, count in snap.get("histograms", []):
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, gauges, histograms
+
+
+# ================= SAMPLING PROFILER =================
+class SamplingProfiler:
+    """
+    Periodically samples the stacks of all threads and counts them in
+    folded form ("file:func;file:func"), ready for flamegraph tools.
+    Off by default; toggled at runtime through /api/metrics/profiler.
+    Under gevent only the hub thread is visible, so run it with sync
+    workers when profiling request handlers.
+    """
+
+    def __init__(self, interval=0.01, max_depth=30):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.running = False
+        self.thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        try:
+            while self.running:
+                self._sample()
+                time.sleep(self.interval)
+        finally:
+            self.running = False
+
+    def start(self, interval=None):
+        """Start sampling; interval is clamped to [PROFILER_MIN_INTERVAL, PROFILER_MAX_INTERVAL]."""
+        if interval is not None:
+            interval = float(interval)
+            if not math.isfinite(interval):
+                raise ValueError("interval must be a finite number of seconds")
+            self.interval = min(max(interval, PROFILER_MIN_INTERVAL), PROFILER_MAX_INTERVAL)
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def folded(self, limit=200):
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common(limit))
+
+
+metrics = Metrics()
+profiler = SamplingProfiler()
@@ -1,17 +1,413 @@
 import os
-import joblib
-from config import MODEL_DIR, ALLOWED_MODELS
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    from config import MODEL_DIR, ALLOWED_MODELS, MODEL_POLL_INTERVAL, INFERENCE_BACKEND, NUMPY_MAX_BATCH_ROWS
+    from tree_export import NumpyModel, export_model, export_path
+except ImportError:
+    from backend.config import MODEL_DIR, ALLOWED_MODELS, MODEL_POLL_INTERVAL, INFERENCE_BACKEND, NUMPY_MAX_BATCH_ROWS
+    from backend.tree_export import NumpyModel, export_model, export_path
+
+# Seconds a scoring request waits for a model that is still loading in the background
+MODEL_LOAD_WAIT = float(os.getenv("MODEL_LOAD_WAIT", 30))
+
+# Versioned layout:  saved_models/<name>/v0001.joblib + v0001.json
+# Legacy layout:     saved_models/<name>_ddos.joblib   (served as version 0)
+VERSION_RE = re.compile(r"^v(\d+)\.json$")
+# Any file that claims a version number, including publishes still in progress
+CLAIMED_RE = re.compile(r"^v(\d+)\.(json|joblib|lock)$")
+
+
+# ================= ARTIFACTS =================
+def file_checksum(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def source_signature(version, metadata):
+    """Identifies an artifact, including legacy files overwritten in place."""
+    return [version, metadata.get("checksum") or metadata.get("legacy_mtime_ns")]
+
+
+def export_source(version, path, metadata):
+    """
+    What a NumPy export was made from. Legacy files are identified by
+    content here, since their mtime changes with every checkout.
+    """
+    return [version, metadata.get("checksum") or file_checksum(path)]
+
+
+def load_artifact(path, metadata):
+    """Unpickle a model artifact, refusing one whose checksum does not match its metadata."""
+    if "checksum" in metadata and file_checksum(path) != metadata["checksum"]:
+        raise ValueError(f"Checksum mismatch for {path}")
+    import joblib
+    return joblib.load(path)
+
+
+def legacy_path(name, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"{name}_ddos.joblib")
+
+
+def list_versions(name, model_dir=MODEL_DIR):
+    """Published version numbers for a model, oldest first."""
+    version_dir = os.path.join(model_dir, name)
+    if not os.path.isdir(version_dir):
+        return []
+    versions = []
+    for file in os.listdir(version_dir):
+        match = VERSION_RE.match(file)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def latest_artifact(name, model_dir=MODEL_DIR):
+    """
+    Return (version, model_path, metadata) for the newest complete artifact.
+    A version only counts once its metadata file exists, and metadata is
+    always written last, so half-written versions are never picked up.
+    """
+    versions = list_versions(name, model_dir)
+    if versions:
+        version = versions[-1]
+        base = os.path.join(model_dir, name, f"v{version:04d}")
+        with open(base + ".json") as f:
+            metadata = json.load(f)
+        return version, base + ".joblib", metadata
+
+    path = legacy_path(name, model_dir)
+    if not os.path.exists(path):
+        return None
+
+    metadata = {}
+    features_path = os.path.join(model_dir, f"{name}_features.json")
+    if os.path.exists(features_path):
+        with open(features_path) as f:
+            metadata["features"] = json.load(f)
+    # Legacy files can be overwritten in place; the mtime tells versions apart
+    metadata["legacy_mtime_ns"] = os.stat(path).st_mtime_ns
+    return 0, path, metadata
+
+
+def _reserve_version(version_dir):
+    """
+    Claim the next version number with an O_EXCL lock file, so concurrent
+    publishers (other workers or processes) never get the same number.
+    Returns (version, base path).
+    """
+    while True:
+        claimed = [int(match.group(1)) for match in map(CLAIMED_RE.match, os.listdir(version_dir)) if match]
+        version = max(claimed, default=0) + 1
+        base = os.path.join(version_dir, f"v{version:04d}")
+        try:
+            os.close(os.open(base + ".lock", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            continue
+        # The listing may predate a publish that finished and released this
+        # number's lock; its .joblib (written before the release) tells
+        if not os.path.exists(base + ".joblib"):
+            return version, base
+        os.remove(base + ".lock")
+
+
+def publish_model(name, model, metadata=None, model_dir=MODEL_DIR):
+    """
+    Write a new immutable version of a model with its metadata
+    (features, threshold, metrics, checksum). Returns (version, metadata).
+    """
+    version_dir = os.path.join(model_dir, name)
+    os.makedirs(version_dir, exist_ok=True)
+
+    version, base = _reserve_version(version_dir)
+    try:
+        metadata = _write_version(name, model, metadata, version, base)
+    finally:
+        # The .joblib / .json files keep the number claimed from here on
+        os.remove(base + ".lock")
+    return version, metadata
+
+
+def _write_version(name, model, metadata, version, base):
+    import joblib
+    tmp_path = base + ".joblib.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, base + ".joblib")
+
+    metadata = dict(metadata or {})
+    if "features" not in metadata and hasattr(model, "feature_names_in_"):
+        metadata["features"] = list(model.feature_names_in_)
+    metadata.update({
+        "model": name,
+        "version": version,
+        "model_type": type(model).__name__,
+        "checksum": file_checksum(base + ".joblib"),
+        "created": time.time()
+    })
+
+    # NumPy export for INFERENCE_BACKEND=numpy, written before the metadata
+    # so a visible version always has it when its type is supported
+    try:
+        export_model(model, export_path(base + ".joblib"), export_source(version, base + ".joblib", metadata))
+    except Exception as e:
+        logging.warning(f"NumPy export failed for {name} v{version}: {e}")
+
+    tmp_path = base + ".json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, base + ".json")
+    return metadata
+
+
+# ================= SERVED VERSIONS =================
+class ModelVersion:
+    """A loaded model plus its metadata and count of in-flight users."""
+
+    def __init__(self, name, version, model, metadata, load_time=0.0, path=None):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+        self.load_time = load_time
+        self.path = path
+        self.refs = 0
+        self.retired = False
+        self._native = None
+        self._native_lock = threading.Lock()
+
+    @property
+    def features(self):
+        features = self.metadata.get("features")
+        if features is None:
+            features = getattr(self.model, "feature_names_in_", None)
+        return features
+
+    def native_model(self):
+        """The original estimator; unpickled once, on first use, when a NumPy export is served."""
+        if not isinstance(self.model, NumpyModel):
+            return self.model
+        with self._native_lock:
+            if self._native is None:
+                self._native = load_artifact(self.path, self.metadata)
+            return self._native
+
+    def _model_for(self, X):
+        """The NumPy export for small batches, the native model for large tree batches."""
+        model = self.model
+        if isinstance(model, NumpyModel) and model.kind != "linear" and len(X) > NUMPY_MAX_BATCH_ROWS:
+            try:
+                return self.native_model()
+            except ImportError:
+                # ML libraries not installed: stay on the (row-chunked) export
+                return model
+        return model
+
+    @property
+    def threshold(self):
+        return self.metadata.get("threshold")
+
+    @property
+    def signature(self):
+        """Identifies the artifact, including legacy files overwritten in place."""
+        return self.version, self.metadata.get("checksum") or self.metadata.get("legacy_mtime_ns")
+
+    def predict(self, X):
+        """Class predictions, honouring the published decision threshold."""
+        model = self._model_for(X)
+        if self.threshold is None or not hasattr(model, "predict_proba"):
+            return model.predict(X)
+        return (model.predict_proba(X)[:, 1] >= self.threshold).astype(int)
+
+    def predict_with_score(self, X):
+        """(predictions, attack probabilities or None) from a single model call."""
+        model = self._model_for(X)
+        if not hasattr(model, "predict_proba"):
+            return model.predict(X), None
+        scores = model.predict_proba(X)[:, 1]
+        threshold = 0.5 if self.threshold is None else self.threshold
+        return (scores >= threshold).astype(int), scores
+
+    def describe(self):
+        info = {k: v for k, v in self.metadata.items() if k != "features"}
+        info.update({
+            "version": self.version,
+            "n_features": len(self.features) if self.features is not None else None,
+            "load_time_s": round(self.load_time, 4),
+            "inference_backend": "numpy" if isinstance(self.model, NumpyModel) else "native",
+            "in_flight": self.refs
+        })
+        return info
+
+
+class ModelRegistry:
+    """
+    Single source of served models. Each worker polls the model directory
+    for new versions, loads them off the request path and swaps them in
+    atomically; the replaced version is released once its in-flight
+    requests have finished.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, names=ALLOWED_MODELS, poll_interval=MODEL_POLL_INTERVAL,
+                 backend=INFERENCE_BACKEND):
+        self.model_dir = model_dir
+        self.names = list(names)
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.active = {}
+        self.lock = threading.Lock()
+        self.watcher = None
+        # Cleared while the first load runs in the background
+        self.ready = threading.Event()
+        self.ready.set()
+
+    # ---------- loading ----------
+    def _signature(self, version, metadata):
+        return tuple(source_signature(version, metadata))
+
+    def _load_export(self, name, artifact):
+        """The NumPy export of an artifact, or None if missing or stale."""
+        version, path, metadata = artifact
+        npz_path = export_path(path)
+        if not os.path.exists(npz_path):
+            return None
+        model = NumpyModel.load(npz_path)
+        if model.source != export_source(version, path, metadata):
+            logging.warning(f"Stale NumPy export for {name} v{version}; run tree_export.py")
+            return None
+        return model
+
+    def _load(self, name, artifact):
+        version, path, metadata = artifact
+        start = time.perf_counter()
+        model = self._load_export(name, artifact) if self.backend == "numpy" else None
+        if model is None:
+            model = load_artifact(path, metadata)
+        return ModelVersion(name, version, model, metadata, time.perf_counter() - start, path)
+
+    def refresh(self):
+        """Load any model whose newest artifact differs from the served one."""
+        swapped = []
+        for name in self.names:
+            try:
+                artifact = latest_artifact(name, self.model_dir)
+                if artifact is None:
+                    continue
+                current = self.active.get(name)
+                if current is not None and \
+                        self._signature(current.version, current.metadata) == \
+                        self._signature(artifact[0], artifact[2]):
+                    continue
+                self.swap(self._load(name, artifact))
+                swapped.append(name)
+            except Exception as e:
+                logging.error(f"Failed loading {name}: {e}")
+        return swapped
+
+    def load_all(self):
+        return self.refresh()
+
+    def load_all_async(self):
+        """Load models off the startup path; scoring requests wait on `ready`."""
+        self.ready.clear()
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self.ready.set()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    @property
+    def loading(self):
+        return not self.ready.is_set()
+
+    def swap(self, new_version):
+        with self.lock:
+            old = self.active.get(new_version.name)
+            self.active[new_version.name] = new_version
+            if old is not None:
+                old.retired = True
+                if old.refs == 0:
+                    self._release(old)
+        logging.info(f"Serving model: {new_version.name} v{new_version.version}")
+
+    def _release(self, version):
+        version.model = None
+        version._native = None
+        logging.info(f"Released model: {version.name} v{version.version}")
+
+    # ---------- serving ----------
+    def _wait_loading(self, name):
+        if name not in self.active and self.loading:
+            self.ready.wait(MODEL_LOAD_WAIT)
+
+    def has(self, name):
+        """Whether a model is served, waiting for it if the first load is still running."""
+        self._wait_loading(name)
+        return name in self.active
+
+    @contextmanager
+    def acquire(self, name):
+        """Lease the current version of a model for the duration of a request."""
+        self._wait_loading(name)
+        with self.lock:
+            version = self.active.get(name)
+            if version is not None:
+                version.refs += 1
+        try:
+            yield version
+        finally:
+            if version is not None:
+                with self.lock:
+                    version.refs -= 1
+                    if version.retired and version.refs == 0:
+                        self._release(version)
+
+    def get(self, name):
+        version = self.active.get(name)
+        return version.model if version is not None else None
+
+    def available(self):
+        return list(self.active.keys())
+
+    def describe(self):
+        return {name: version.describe() for name, version in self.active.items()}
+
+    def publish(self, name, model, metadata=None):
+        """Publish a new version and serve it immediately in this worker."""
+        version, metadata = publish_model(name, model, metadata, self.model_dir)
+        self.swap(ModelVersion(name, version, model, metadata))
+        return version
+
+    # ---------- watcher ----------
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self.refresh()
+
+    def start_watcher(self):
+        if self.poll_interval <= 0 or self.watcher is not None:
+            return
+        self.watcher = threading.Thread(target=self._watch, daemon=True)
+        self.watcher.start()
+
+
+registry = ModelRegistry()
 
-MODELS = {}
 
 def load_models():
-    for model_name in ALLOWED_MODELS:
-        path = os.path.join(MODEL_DIR, f"{model_name}_ddos.joblib")
-        if os.path.exists(path):
-            MODELS[model_name] = joblib.load(path)
-            print(f"Loaded {model_name}")
-        else:
-            print(f"Missing model: {path}")
+    return registry.load_all()
+
 
 def get_model(name):
-    return MODELS.get(name)
+    return registry.get(name)
@@ -0,0 +1,131 @@
+import os
+import copy
+import uuid
+import threading
+from collections import deque, OrderedDict
+
+import numpy as np
+
+from utils.lazy_imports import lazy_import
+
+# pandas is only imported once an update builds its training matrix
+pd = lazy_import("pandas")
+
+# Recent labeled flows kept for incremental updates
+FEEDBACK_BUFFER_SIZE = int(os.getenv("FEEDBACK_BUFFER_SIZE", 5000))
+# Recent unlabeled flows that can still be labeled by flow_id
+PENDING_FLOWS_SIZE = int(os.getenv("PENDING_FLOWS_SIZE", 2000))
+# Trees added per boosting / forest update
+EXTRA_TREES = int(os.getenv("ONLINE_EXTRA_TREES", 20))
+MIN_UPDATE_SAMPLES = int(os.getenv("ONLINE_MIN_SAMPLES", 50))
+
+
+class FeedbackBuffer:
+    """
+    Bounded store of live flows. Every scored flow is remembered under a
+    flow_id for a while; once an analyst (or a trusted source) labels it,
+    it moves into the labeled buffer used for incremental updates.
+    """
+
+    def __init__(self, maxlen=FEEDBACK_BUFFER_SIZE, pending_size=PENDING_FLOWS_SIZE):
+        self.lock = threading.Lock()
+        self.labeled = deque(maxlen=maxlen)
+        self.pending = OrderedDict()
+        self.pending_size = pending_size
+
+    def remember(self, features):
+        flow_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.pending[flow_id] = features
+            if len(self.pending) > self.pending_size:
+                self.pending.popitem(last=False)
+        return flow_id
+
+    def label(self, label, flow_id=None, features=None):
+        with self.lock:
+            if flow_id is not None:
+                features = self.pending.pop(flow_id, None)
+            if features is None:
+                return False
+            self.labeled.append((features, int(label)))
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            rows = list(self.labeled)
+        features = [f for f, _ in rows]
+        labels = np.array([l for _, l in rows], dtype=int)
+        return features, labels
+
+    def __len__(self):
+        return len(self.labeled)
+
+
+# ================= INCREMENTAL UPDATES =================
+def to_sgd(model):
+    """Warm-start an SGD logistic model from a fitted LogisticRegression."""
+    from sklearn.linear_model import SGDClassifier
+    sgd = SGDClassifier(loss="log_loss", random_state=42)
+    sgd.coef_ = model.coef_.copy()
+    sgd.intercept_ = model.intercept_.copy()
+    sgd.classes_ = model.classes_.copy()
+    sgd.t_ = 1.0
+    if hasattr(model, "feature_names_in_"):
+        sgd.feature_names_in_ = model.feature_names_in_
+    sgd.n_features_in_ = model.n_features_in_
+    return sgd
+
+
+def incremental_update(model, X, y, extra_trees=EXTRA_TREES):
+    """
+    Return a new model updated on (X, y) without refitting from scratch.
+    The input model is never mutated, so it can keep serving meanwhile.
+
+    - LightGBM / XGBoost: continue boosting from the current booster
+    - Random Forest: warm start with extra trees grown on the new data
+    - Logistic Regression / SGD: partial_fit of an SGD logistic model
+    """
+    from sklearn.base import clone
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.ensemble import RandomForestClassifier
+
+    model_type = type(model).__name__
+
+    if model_type == "LGBMClassifier":
+        updated = clone(model).set_params(n_estimators=extra_trees)
+        updated.fit(X, y, init_model=model.booster_)
+        return updated
+
+    if model_type == "XGBClassifier":
+        updated = clone(model).set_params(n_estimators=extra_trees)
+        updated.fit(X, y, xgb_model=model.get_booster())
+        return updated
+
+    if isinstance(model, RandomForestClassifier):
+        updated = copy.deepcopy(model)
+        updated.set_params(warm_start=True, n_estimators=model.n_estimators + extra_trees)
+        updated.fit(X, y)
+        return updated
+
+    if isinstance(model, LogisticRegression):
+        model = to_sgd(model)
+
+    if isinstance(model, SGDClassifier):
+        updated = copy.deepcopy(model)
+        updated.partial_fit(X, y, classes=np.array([0, 1]))
+        return updated
+
+    raise ValueError(f"Incremental update not supported for {model_type}")
+
+
+def update_from_buffer(model, buffer, preprocess, features=None, extra_trees=EXTRA_TREES):
+    """Build the training matrix from the labeled buffer and update the model."""
+    rows, labels = buffer.snapshot()
+    if len(labels) < MIN_UPDATE_SAMPLES:
+        raise ValueError(f"Need at least {MIN_UPDATE_SAMPLES} labeled flows, have {len(labels)}")
+    if len(set(labels.tolist())) < 2:
+        raise ValueError("Labeled flows contain a single class")
+
+    X = preprocess(pd.DataFrame(rows), features)
+    return incremental_update(model, X, labels, extra_trees)
+
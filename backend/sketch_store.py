@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import threading
+
+from utils.sketches import TrafficSketch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Worker snapshots are merged so every gunicorn worker sees the full picture
+SKETCH_DIR = os.getenv("SKETCH_DIR", os.path.join(BASE_DIR, "logs", "sketches"))
+# Top talkers cover the current and the previous interval
+SKETCH_WINDOW = float(os.getenv("SKETCH_WINDOW", 300))
+
+
+class SketchStore:
+    """
+    Merges traffic sketches posted by capture agents into a rolling
+    two-interval view (current + previous), persisted per worker.
+    """
+
+    def __init__(self, sketch_dir=SKETCH_DIR, window=SKETCH_WINDOW):
+        self.sketch_dir = sketch_dir
+        self.window = window
+        self.lock = threading.Lock()
+        self.interval_start = self._interval(time.time())
+        self.current = TrafficSketch()
+        self.previous = TrafficSketch()
+
+    def _interval(self, now):
+        return int(now // self.window) * self.window
+
+    def _rotate(self, now):
+        start = self._interval(now)
+        if start == self.interval_start:
+            return
+        # Skip straight to an empty previous interval after a long gap
+        self.previous = self.current if start - self.interval_start == self.window else TrafficSketch()
+        self.current = TrafficSketch()
+        self.interval_start = start
+
+    def ingest(self, data):
+        """Merge one posted sketch; raises ValueError (before merging) unless it matches our config."""
+        sketch = TrafficSketch.from_dict(data, self.current.config())
+        with self.lock:
+            self._rotate(time.time())
+            self.current.merge(sketch)
+            snapshot = {
+                "interval_start": self.interval_start,
+                "current": self.current.to_dict(),
+                "previous": self.previous.to_dict()
+            }
+        self._persist(snapshot)
+
+    def _persist(self, snapshot):
+        os.makedirs(self.sketch_dir, exist_ok=True)
+        path = os.path.join(self.sketch_dir, f"worker_{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def merged(self):
+        """Merge all workers' snapshots that fall inside the rolling window."""
+        now = time.time()
+        current_start = self._interval(now)
+        merged = TrafficSketch()
+        if not os.path.isdir(self.sketch_dir):
+            return merged
+
+        for file in os.listdir(self.sketch_dir):
+            if not (file.startswith("worker_") and file.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.sketch_dir, file)) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            age = current_start - snap["interval_start"]
+            if age == 0:
+                merged.merge(TrafficSketch.from_dict(snap["current"]))
+                merged.merge(TrafficSketch.from_dict(snap["previous"]))
+            elif age == self.window:
+                merged.merge(TrafficSketch.from_dict(snap["current"]))
+        return merged
+
+    def top_talkers(self, n=10):
+        result = self.merged().top_talkers(n)
+        result["window_s"] = self.window * 2
+        return result
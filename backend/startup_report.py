@@ -0,0 +1,114 @@
+"""
+Cold-start report for the backend.
+
+Each configuration (STARTUP_MODE x INFERENCE_BACKEND) is started in a
+fresh interpreter, as a new gunicorn worker would be. Measured:
+  import_s         - `import app` (includes model loading in eager mode)
+  health_s         - until the first /api/health response
+  first_predict_s  - until the first /api/predict response
+  heavy_modules    - ML libraries imported by the time /api/health answered
+and, from `python -X importtime`, the cumulative import time of every
+module `app` imports directly, slowest first.
+
+    cd backend && python startup_report.py --output startup_report.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CONFIGURATIONS = [
+    {"STARTUP_MODE": "eager", "INFERENCE_BACKEND": "native"},
+    {"STARTUP_MODE": "eager", "INFERENCE_BACKEND": "numpy"},
+    {"STARTUP_MODE": "fast", "INFERENCE_BACKEND": "native"},
+    {"STARTUP_MODE": "fast", "INFERENCE_BACKEND": "numpy"}
+]
+HEAVY_MODULES = ["pandas", "scipy", "sklearn", "xgboost", "lightgbm", "joblib"]
+
+PROBE = """
+import sys, json, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+client = app.app.test_client()
+client.get("/api/health")
+health = time.perf_counter() - start
+heavy = [m for m in %r if m in sys.modules]
+client.post("/api/predict?model=%s", json={"Flow Duration": 1.0, "Total Fwd Packets": 3})
+first_predict = time.perf_counter() - start
+print("PROBE " + json.dumps({"import_s": imported, "health_s": health,
+                             "first_predict_s": first_predict, "heavy_modules": heavy}))
+"""
+
+
+def _env(config):
+    env = dict(os.environ, MODEL_POLL_INTERVAL="0", **config)
+    env.setdefault("PROFILER_ENABLED", "False")
+    return env
+
+
+def probe(config, model):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES, model)],
+        cwd=BASE_DIR, env=_env(config), capture_output=True, text=True, timeout=300
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("PROBE "):
+            return {k: (round(v, 3) if isinstance(v, float) else v)
+                    for k, v in json.loads(line[len("PROBE "):]).items()}
+    raise RuntimeError(f"Probe failed for {config}: {result.stderr[-500:]}")
+
+
+def import_times(config, top=15):
+    """Cumulative seconds per module imported directly by `import app` (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BASE_DIR, env=_env(config), capture_output=True, text=True, timeout=300
+    )
+    modules, started = {}, False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Interpreter start-up ends with top-level `site`; after it, modules
+        # imported directly by app are nested one level (two more spaces)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if name.strip() == "site" and depth == 0:
+            started = True
+            continue
+        if started and depth == 1:
+            modules[name.strip()] = modules.get(name.strip(), 0) + int(cumulative) / 1e6
+    ranked = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_s": round(seconds, 4)} for name, seconds in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend cold-start report")
+    parser.add_argument("--model", default="random_forest", help="model for the first /api/predict")
+    parser.add_argument("--top", type=int, default=15, help="modules listed per configuration")
+    parser.add_argument("--output", default="startup_report.json")
+    args = parser.parse_args()
+
+    report = []
+    for config in CONFIGURATIONS:
+        entry = {**config, **probe(config, args.model), "imports": import_times(config, args.top)}
+        report.append(entry)
+        print(f"\n{config['STARTUP_MODE']:>5} / {config['INFERENCE_BACKEND']:<6}  import {entry['import_s']:.2f}s  "
+              f"health {entry['health_s']:.2f}s  first predict {entry['first_predict_s']:.2f}s  "
+              f"heavy at health: {', '.join(entry['heavy_modules']) or '-'}")
+        for item in entry["imports"][:8]:
+            print(f"    {item['module']:<28} {item['cumulative_s'] * 1000:8.1f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nStartup report saved at: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import os
 import sys
 
 # Configuration
-BASE_URL = "http://127.0.0.1:5000/predict"
+BASE_URL = "http://127.0.0.1:5000/api/predict"
 MODELS = ["xgboost", "lightgbm", "random_forest", "logistic_regression"]
 
 # Paths
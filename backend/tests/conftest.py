@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Backend modules import each other flat (from config import ...), as under gunicorn
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Module-level settings are read at import: keep runtime state out of the tree
+STATE_DIR = tempfile.mkdtemp(prefix="sentinel-tests-")
+os.environ.setdefault("MODEL_POLL_INTERVAL", "0")
+os.environ.setdefault("EVENT_DB", os.path.join(STATE_DIR, "events.db"))
+os.environ.setdefault("FLEET_DIR", os.path.join(STATE_DIR, "fleet"))
+os.environ.setdefault("SKETCH_DIR", os.path.join(STATE_DIR, "sketches"))
+os.environ.setdefault("METRICS_DIR", os.path.join(STATE_DIR, "metrics"))
+os.environ.setdefault("CSV_JOB_DIR", os.path.join(STATE_DIR, "jobs"))
@@ -0,0 +1,113 @@
+import pytest
+
+from admission import AdmissionController
+
+
+# ================= CONTROLLER =================
+def test_client_over_its_burst_is_rate_limited_until_refilled():
+    admission = AdmissionController(max_in_flight=100, client_rate=10, client_burst=3)
+    for _ in range(3):
+        assert admission.admit("10.0.0.1", now=0.0) == ("accepted", 0)
+        admission.release()
+    status, retry_after = admission.admit("10.0.0.1", now=0.0)
+    assert status == "rate_limited" and retry_after >= 1
+    # Other clients have their own bucket
+    assert admission.admit("10.0.0.2", now=0.0)[0] == "accepted"
+    admission.release()
+    # 0.1 s at 10/s refills one token
+    assert admission.admit("10.0.0.1", now=0.1)[0] == "accepted"
+
+
+def test_in_flight_bound_sheds_with_overloaded():
+    admission = AdmissionController(max_in_flight=2, client_rate=0)
+    assert admission.admit("a")[0] == "accepted"
+    assert admission.admit("b")[0] == "accepted"
+    assert admission.admit("c") == ("overloaded", 1)
+    admission.release()
+    assert admission.admit("c")[0] == "accepted"
+
+
+def test_low_priority_is_shed_first():
+    admission = AdmissionController(max_in_flight=4, low_priority_share=0.5, client_rate=0)
+    assert [admission.admit("a", "low")[0] for _ in range(3)] == ["accepted", "accepted", "overloaded"]
+    assert [admission.admit("a", "high")[0] for _ in range(3)] == ["accepted", "accepted", "overloaded"]
+
+
+def test_client_table_is_bounded():
+    admission = AdmissionController(client_rate=1, client_burst=1, max_clients=10)
+    for i in range(50):
+        admission.admit(f"client-{i}")
+        admission.release()
+    assert len(admission.buckets) == 10
+
+
+def test_throttle_takes_no_in_flight_slot():
+    admission = AdmissionController(client_rate=1, client_burst=2)
+    assert admission.throttle("a", now=0.0) == 0
+    assert admission.throttle("a", now=0.0) == 0
+    assert admission.throttle("a", now=0.0) == 1
+    assert admission.in_flight == 0
+
+
+# ================= FLASK ROUTES =================
+@pytest.fixture(scope="module")
+def backend():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    monkeypatch.setattr(backend, "admission", AdmissionController(max_in_flight=8, client_rate=0.001, client_burst=2))
+    return backend.app.test_client()
+
+
+def test_scoring_route_answers_429_with_retry_after(backend, client):
+    codes = [client.post("/api/predict?model=missing", json={}).status_code for _ in range(3)]
+    assert 429 not in codes[:2] and codes[2] == 429
+    response = client.post("/api/predict?model=missing", json={})
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) >= 1
+    # Read routes are never admitted or limited
+    assert client.get("/api/alerts").status_code == 200
+    assert backend.admission.in_flight == 0
+
+
+def test_scoring_route_answers_503_when_the_worker_is_full(backend, client):
+    backend.admission.in_flight = backend.admission.max_in_flight
+    response = client.post("/api/predict?model=missing", json={})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    backend.admission.in_flight = 0
+
+
+def test_headers_do_not_pick_the_rate_limit_bucket(backend, client):
+    for i in range(3):
+        response = client.post("/api/predict?model=missing", json={},
+                               headers={"X-Agent-Id": f"agent-{i}", "X-Forwarded-For": f"10.9.9.{i}"})
+    assert response.status_code == 429
+
+
+def test_registration_is_closed_without_a_token_and_throttled(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, "FLEET_ENROLL_TOKEN", None)
+    monkeypatch.setattr(backend, "FLEET_OPEN_ENROLLMENT", False)
+    monkeypatch.setattr(backend, "enrollment", AdmissionController(client_rate=0.01, client_burst=2))
+    codes = [client.post("/api/agents/register", json={"agent_id": f"a{i}"}).status_code for i in range(3)]
+    assert codes == [403, 403, 429]
+
+
+def test_only_enrolled_agents_get_their_own_bucket(backend, monkeypatch):
+    monkeypatch.setattr(backend, "FLEET_ENROLL_TOKEN", "enroll")
+    monkeypatch.setattr(backend, "enrollment", AdmissionController(client_rate=0))
+    client = backend.app.test_client()
+    response = client.post("/api/agents/register", json={"agent_id": "sensor-1"}, headers={"X-Enroll-Token": "enroll"})
+    secret = response.get_json()["secret"]
+
+    headers = {"X-Agent-Id": "sensor-1", "X-Agent-Secret": secret}
+    with backend.app.test_request_context(headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.7"}):
+        assert backend.client_key() == "agent:sensor-1"
+    with backend.app.test_request_context(headers=dict(headers, **{"X-Agent-Secret": "wrong"}),
+                                          environ_base={"REMOTE_ADDR": "10.0.0.7"}):
+        assert backend.client_key() == "10.0.0.7"
+    # With open enrollment anyone could mint agents: they share their address's bucket
+    monkeypatch.setattr(backend, "FLEET_ENROLL_TOKEN", None)
+    with backend.app.test_request_context(headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.7"}):
+        assert backend.client_key() == "10.0.0.7"
@@ -0,0 +1,60 @@
+import time
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from admission import AdmissionController
+
+
+@pytest.fixture
+def asgi(monkeypatch):
+    import app
+    import asgi_app
+
+    def slow_flow(route, model_name, data):
+        time.sleep(0.2)
+        return 0, 0.1, 1
+
+    monkeypatch.setattr(app, "_score_flow", slow_flow)
+    monkeypatch.setattr(app, "admission", AdmissionController(client_rate=0))
+    monkeypatch.setattr(asgi_app, "dispatch", AdmissionController(max_in_flight=4, client_rate=0))
+    return asgi_app
+
+
+def post_many(asgi, n, headers=None):
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/predict?model=xgboost", json={"Protocol": 6}, headers=headers)
+                for _ in range(n)
+            ])
+    return asyncio.run(run())
+
+
+def test_dispatcher_sheds_beyond_the_in_flight_bound(asgi):
+    # More requests than inference threads and than the bound: the excess
+    # is answered 503 at once instead of queueing in the executor
+    responses = post_many(asgi, 12)
+    codes = Counter(response.status_code for response in responses)
+    assert codes == {200: 4, 503: 8}
+    assert all(response.headers["Retry-After"] == "1" for response in responses if response.status_code == 503)
+    assert asgi.dispatch.in_flight == 0
+
+
+def test_low_priority_requests_get_the_low_priority_share(asgi):
+    responses = post_many(asgi, 6, headers={"X-Flow-Priority": "low"})
+    assert Counter(response.status_code for response in responses) == {200: 2, 503: 4}
+
+
+def test_read_routes_bypass_the_dispatch_gate(asgi):
+    asgi.dispatch.in_flight = asgi.dispatch.max_in_flight
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/stats")
+    assert asyncio.run(run()).status_code == 200
+    asgi.dispatch.in_flight = 0
@@ -0,0 +1,153 @@
+import io
+import os
+import time
+import signal
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from werkzeug.datastructures import FileStorage
+
+import csv_jobs
+from csv_jobs import JobQueue, job_path, read_status, run_job, write_status
+from model_registry import latest_artifact, publish_model
+
+FEATURES = ["a", "b", "c"]
+
+
+def new_job(csv_text="a,b,c,Source IP\n0.1,0.2,0.3,10.0.0.1\n0.9,0.8,0.7,10.0.0.2\n", state="queued"):
+    job_id = os.urandom(6).hex()
+    os.makedirs(job_path(job_id))
+    with open(job_path(job_id, "input.csv"), "w") as f:
+        f.write(csv_text)
+    write_status(job_id, {"job_id": job_id, "state": state, "created": time.time(), "rows_total": None,
+                          "rows_done": 0, "ddos_detected": 0, "normal": 0})
+    return job_id
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    """A published model that the in-process worker code picks up."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((80, 3)), columns=FEATURES)
+    publish_model("lr", LogisticRegression().fit(X, (X["a"] > 0.5).astype(int)),
+                  {"features": FEATURES}, model_dir=str(tmp_path))
+    monkeypatch.setattr(csv_jobs, "latest_artifact", lambda name: latest_artifact(name, str(tmp_path)))
+    monkeypatch.setattr(csv_jobs, "_models", {})
+    return latest_artifact("lr", str(tmp_path))
+
+
+# ================= run_job =================
+def test_job_scores_every_row(published):
+    status = run_job(new_job(), "lr")
+    assert status["state"] == "done" and status["rows_total"] == status["rows_done"] == 2
+    results = pd.read_csv(csv_jobs.results_path(status["job_id"]))
+    assert list(results["Source IP"]) == ["10.0.0.1", "10.0.0.2"] and "score" in results
+    assert not os.path.exists(job_path(status["job_id"], "input.csv"))
+
+
+def test_unknown_model_fails_the_job(published):
+    status = run_job(new_job(), "missing")
+    assert status["state"] == "failed" and "Model not found" in status["error"]
+    assert read_status(status["job_id"])["state"] == "failed"
+
+
+def test_artifact_with_a_bad_checksum_is_never_scored(published):
+    _, path, _ = published
+    with open(path, "ab") as f:
+        f.write(b"tampered")
+    status = run_job(new_job(), "lr")
+    assert status["state"] == "failed" and "Checksum mismatch" in status["error"]
+    assert not os.path.exists(csv_jobs.results_path(status["job_id"]))
+
+
+def test_missing_upload_fails_the_job(published):
+    job_id = new_job()
+    os.remove(job_path(job_id, "input.csv"))
+    status = run_job(job_id, "lr")
+    assert status["state"] == "failed" and status["rows_total"] is None
+
+
+# ================= QUEUE =================
+def test_lost_worker_marks_the_job_failed_and_drops_the_pool():
+    queue = JobQueue(workers=1)
+    discarded = []
+    queue._discard_pool = discarded.append
+    job_id = new_job(state="running")
+    future = Future()
+    future.set_exception(BrokenProcessPool("worker killed"))
+    queue._on_done("pool", job_id, future)
+
+    status = read_status(job_id)
+    assert status["state"] == "failed" and "worker killed" in status["error"]
+    assert discarded == ["pool"]
+
+
+def test_finished_jobs_are_not_overwritten_by_a_late_failure():
+    job_id = new_job(state="done")
+    JobQueue._mark_failed(job_id, "late")
+    assert read_status(job_id)["state"] == "done"
+
+
+def test_submit_retries_once_on_a_broken_pool(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("broken")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    class WorkingPool(BrokenPool):
+        def submit(self, *args):
+            future = Future()
+            future.set_result(None)
+            return future
+
+    queue = JobQueue(workers=1)
+    pools = [BrokenPool(), WorkingPool()]
+    monkeypatch.setattr(queue, "_pool", lambda: pools[0])
+    monkeypatch.setattr(queue, "_discard_pool", lambda pool: pools.pop(0))
+    status = queue.submit(FileStorage(io.BytesIO(b"a,b,c\n1,2,3\n"), "flows.csv"), "lr")
+    assert status["state"] == "queued" and len(pools) == 1
+
+
+def test_stalled_jobs_expire_and_old_jobs_are_removed():
+    queue = JobQueue(workers=1)
+    stalled, finished = new_job(state="running"), new_job(state="done")
+    old = time.time() - (csv_jobs.CSV_JOB_STALE_HOURS + 1) * 3600
+    os.utime(job_path(stalled, "status.json"), (old, old))
+    status = read_status(finished)
+    status["finished"] = time.time() - (csv_jobs.CSV_JOB_RETENTION_HOURS + 1) * 3600
+    write_status(finished, status)
+
+    queue.cleanup()
+    assert read_status(stalled)["state"] == "failed"
+    assert not os.path.exists(job_path(stalled, "input.csv"))
+    assert not os.path.exists(job_path(finished))
+
+
+def test_killed_worker_process_fails_the_job_and_the_next_job_runs():
+    if not os.path.exists(os.path.join(csv_jobs.BASE_DIR, "saved_models", "xgboost_ddos.joblib")):
+        pytest.skip("xgboost model not available")
+    queue = JobQueue(workers=1)
+    upload = lambda: FileStorage(io.BytesIO(b"Protocol,Flow Duration\n6,100\n17,2000\n"), "flows.csv")
+    try:
+        first = queue.submit(upload(), "xgboost")
+        for process in list(queue.pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+        deadline = time.time() + 60
+        while read_status(first["job_id"])["state"] in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.2)
+        assert read_status(first["job_id"])["state"] == "failed"
+
+        second = queue.submit(upload(), "xgboost")
+        deadline = time.time() + 120
+        while read_status(second["job_id"])["state"] in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.2)
+        assert read_status(second["job_id"])["state"] == "done"
+    finally:
+        if queue.pool is not None:
+            queue.pool.shutdown(wait=True)
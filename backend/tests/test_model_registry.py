@@ -0,0 +1,95 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from model_registry import ModelRegistry, latest_artifact, list_versions, load_artifact, publish_model
+
+FEATURES = ["a", "b", "c"]
+
+
+def fit_model(seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.random((60, len(FEATURES))), columns=FEATURES)
+    return LogisticRegression().fit(X, (X["a"] > 0.5).astype(int))
+
+
+def _publish(model_dir):
+    return publish_model("lr", fit_model(), {"features": FEATURES}, model_dir=model_dir)[0]
+
+
+def test_publish_assigns_increasing_versions(tmp_path):
+    versions = [publish_model("lr", fit_model(i), {"features": FEATURES}, model_dir=str(tmp_path))[0]
+                for i in range(3)]
+    assert versions == [1, 2, 3]
+    version, path, metadata = latest_artifact("lr", str(tmp_path))
+    assert version == 3 and path.endswith("v0003.joblib")
+    assert metadata["features"] == FEATURES and metadata["checksum"]
+    # No reservation locks are left behind
+    assert not [f for f in os.listdir(tmp_path / "lr") if f.endswith(".lock")]
+
+
+def test_concurrent_publishes_never_share_a_version(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        versions = list(pool.map(_publish, [str(tmp_path)] * 8))
+    assert sorted(versions) == list(range(1, 9))
+    assert list_versions("lr", str(tmp_path)) == list(range(1, 9))
+
+
+def test_version_without_metadata_is_not_visible(tmp_path):
+    publish_model("lr", fit_model(), {"features": FEATURES}, model_dir=str(tmp_path))
+    # A publish that has written its model but not yet its metadata
+    (tmp_path / "lr" / "v0002.joblib").write_bytes(b"partial")
+    assert latest_artifact("lr", str(tmp_path))[0] == 1
+
+
+def test_refresh_hot_swaps_and_releases_after_in_flight_requests(tmp_path):
+    model_dir = str(tmp_path)
+    publish_model("lr", fit_model(0), {"features": FEATURES}, model_dir=model_dir)
+    registry = ModelRegistry(model_dir=model_dir, names=["lr"], poll_interval=0, backend="native")
+    assert registry.refresh() == ["lr"]
+
+    with registry.acquire("lr") as leased:
+        assert leased.version == 1
+        publish_model("lr", fit_model(1), {"features": FEATURES}, model_dir=model_dir)
+        assert registry.refresh() == ["lr"]
+        # The old version keeps serving the request that leased it
+        assert leased.retired and leased.model is not None
+        assert leased.predict(pd.DataFrame([[0.9, 0.1, 0.1]], columns=FEATURES)).shape == (1,)
+    assert leased.model is None
+
+    with registry.acquire("lr") as current:
+        assert current.version == 2
+    # Nothing new: nothing swapped
+    assert registry.refresh() == []
+
+
+def test_refresh_refuses_an_artifact_with_a_bad_checksum(tmp_path):
+    model_dir = str(tmp_path)
+    publish_model("lr", fit_model(), {"features": FEATURES}, model_dir=model_dir)
+    registry = ModelRegistry(model_dir=model_dir, names=["lr"], poll_interval=0, backend="native")
+    registry.refresh()
+
+    publish_model("lr", fit_model(1), {"features": FEATURES}, model_dir=model_dir)
+    _, path, metadata = latest_artifact("lr", model_dir)
+    with open(path, "ab") as f:
+        f.write(b"tampered")
+
+    assert registry.refresh() == []
+    with registry.acquire("lr") as served:
+        assert served.version == 1
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        load_artifact(path, metadata)
+
+
+def test_publish_serves_the_new_version_in_this_worker(tmp_path):
+    registry = ModelRegistry(model_dir=str(tmp_path), names=["lr"], poll_interval=0, backend="native")
+    assert registry.publish("lr", fit_model(), {"features": FEATURES}) == 1
+    with registry.acquire("lr") as served:
+        assert served.version == 1 and list(served.features) == FEATURES
+    with open(tmp_path / "lr" / "v0001.json") as f:
+        assert json.load(f)["model_type"] == "LogisticRegression"
@@ -0,0 +1,113 @@
+import copy
+import base64
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from utils.sketches import SpaceSaving, HyperLogLog, TrafficSketch
+from sketch_store import SketchStore
+
+
+def zipf_stream(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"10.0.{i // 256}.{i % 256}" for i in rng.zipf(1.3, size=n) % 5000]
+
+
+def traffic(n, seed=0):
+    sketch = TrafficSketch()
+    rng = np.random.default_rng(seed)
+    for src in zipf_stream(n, seed):
+        sketch.update(src, f"192.168.0.{rng.integers(0, 40)}", int(rng.integers(1, 1024)))
+    return sketch
+
+
+# ================= SPACE-SAVING =================
+def test_space_saving_bounds_contain_the_true_counts():
+    stream = zipf_stream(20000)
+    exact = Counter(stream)
+    sketch = SpaceSaving(k=50)
+    for item in stream:
+        sketch.update(item)
+    assert len(sketch.counters) == 50
+    for item, count, error in sketch.top(10):
+        assert count - error <= exact[item] <= count
+    # The true heavy hitters are found
+    assert {item for item, _, _ in sketch.top(5)} == {item for item, _ in exact.most_common(5)}
+
+
+def test_space_saving_merge_keeps_k_counters_and_still_evicts():
+    a, b = SpaceSaving(k=20), SpaceSaving(k=20)
+    for item in zipf_stream(5000, seed=1):
+        a.update(item)
+    for item in zipf_stream(5000, seed=2):
+        b.update(item)
+    a.merge(b)
+    assert len(a.counters) == 20
+    # The heap was rebuilt: further updates evict the smallest counter
+    floor = min(count for count, _ in a.counters.values())
+    assert a.update("new-item") is not None
+    assert a.counters["new-item"] == [floor + 1, floor]
+
+
+# ================= HYPERLOGLOG =================
+def test_hyperloglog_estimate_and_merge():
+    a, b = HyperLogLog(p=12), HyperLogLog(p=12)
+    for i in range(30000):
+        (a if i % 2 else b).add(f"src-{i}")
+        a.add(f"src-{i % 1000}")
+    merged = HyperLogLog.from_dict(a.to_dict()).merge(b)
+    assert abs(merged.count() - 30000) / 30000 < 0.05
+
+
+# ================= TRAFFIC SKETCH =================
+def test_traffic_sketch_round_trips_and_merges():
+    a, b = traffic(4000, seed=1), traffic(4000, seed=2)
+    restored = TrafficSketch.from_dict(a.to_dict(), a.config())
+    assert restored.top_talkers(5) == a.top_talkers(5)
+
+    merged = TrafficSketch.from_dict(a.to_dict()).merge(b)
+    assert merged.packets == 8000
+    assert len(merged.distinct_sources) <= merged.max_destinations
+    assert set(merged.distinct_sources) <= set(merged.destinations.counters)
+
+
+# ================= from_dict VALIDATION =================
+@pytest.fixture
+def payload():
+    return traffic(2000).to_dict()
+
+
+def first_hll(data):
+    return next(iter(data["distinct_sources"].values()))
+
+
+@pytest.mark.parametrize("mutate, message", [
+    (lambda d: d.update(hll_p=12), "config does not match"),
+    (lambda d: d.update(k=10 ** 9), "config does not match"),
+    (lambda d: first_hll(d).update(p=40), r"p must be an integer in \[4, 18\]"),
+    (lambda d: first_hll(d).update(p=12), "p is 12, expected 10"),
+    (lambda d: first_hll(d).update(registers=base64.b64encode(b"\x01" * 100).decode()), "expected 1024 registers"),
+    (lambda d: first_hll(d).update(registers=base64.b64encode(b"\xff" * 1024).decode()), "register value out of range"),
+    (lambda d: d["sources"].update(k=5), "k is 5, expected 100"),
+    (lambda d: d["sources"]["counters"][0].__setitem__(1, "many"), "counters must be"),
+    (lambda d: d["sources"]["counters"].append(["1.2.3.4", 1, 0]), "more counters than k"),
+    (lambda d: d.update(packets=-5), "packets must be a count"),
+])
+def test_from_dict_rejects_bad_input(payload, mutate, message):
+    mutate(payload)
+    with pytest.raises(ValueError, match=message):
+        TrafficSketch.from_dict(payload, TrafficSketch().config())
+
+
+def test_store_rejects_bad_sketches_before_merging(tmp_path, payload):
+    store = SketchStore(sketch_dir=str(tmp_path))
+    bad = copy.deepcopy(payload)
+    first_hll(bad).update(p=12, registers=base64.b64encode(bytes(4096)).decode())
+    with pytest.raises(ValueError):
+        store.ingest(bad)
+
+    # The interval was not poisoned: valid sketches still merge
+    store.ingest(payload)
+    store.ingest(payload)
+    assert store.top_talkers(3)["packets"] == 4000
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+from lightgbm import LGBMClassifier
+
+import model_registry
+from model_registry import ModelRegistry, ModelVersion, publish_model
+from tree_export import NumpyModel, export_model, export_path
+
+FEATURES = [f"f{i}" for i in range(6)]
+
+
+def make_data(n=800, seed=0, missing=False):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES)
+    y = ((X["f0"] + X["f1"] * X["f2"] > 0.2) | (X["f3"] > 1.5)).astype(int)
+    if missing:
+        X = X.mask(rng.random(X.shape) < 0.05)
+    return X, y
+
+
+MODELS = {
+    "random_forest": lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    "xgboost": lambda: XGBClassifier(n_estimators=30, max_depth=4, random_state=0),
+    "lightgbm": lambda: LGBMClassifier(n_estimators=30, random_state=0, verbose=-1),
+    "logistic_regression": lambda: LogisticRegression(max_iter=500),
+}
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_export_matches_native_model(tmp_path, name):
+    # The boosters route missing values by their learned default direction
+    missing = name in ("xgboost", "lightgbm")
+    X, y = make_data(missing=missing)
+    model = MODELS[name]().fit(X, y)
+    path = str(tmp_path / "model.trees.npz")
+    assert export_model(model, path, source=[1, "abc"])
+
+    exported = NumpyModel.load(path)
+    X_new, _ = make_data(n=500, seed=1, missing=missing)
+    np.testing.assert_allclose(exported.predict_proba(X_new), model.predict_proba(X_new), atol=1e-5)
+    np.testing.assert_array_equal(exported.predict(X_new), model.predict(X_new))
+    assert exported.source == [1, "abc"]
+    assert list(exported.feature_names_in_) == FEATURES
+
+
+def test_export_is_row_chunked_for_large_batches(tmp_path, monkeypatch):
+    import tree_export
+    X, y = make_data()
+    model = MODELS["xgboost"]().fit(X, y)
+    path = str(tmp_path / "model.trees.npz")
+    export_model(model, path)
+    monkeypatch.setattr(tree_export, "ROW_CHUNK", 64)
+    np.testing.assert_allclose(NumpyModel.load(path).predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-5)
+
+
+def test_unsupported_model_type_is_not_exported(tmp_path):
+    from sklearn.naive_bayes import GaussianNB
+    X, y = make_data()
+    assert export_model(GaussianNB().fit(X, y), str(tmp_path / "nb.trees.npz")) is False
+
+
+def test_numpy_backend_serves_the_published_export(tmp_path):
+    X, y = make_data()
+    model = MODELS["lightgbm"]().fit(X, y)
+    version, metadata = publish_model("lightgbm", model, {"features": FEATURES}, model_dir=str(tmp_path))
+
+    registry = ModelRegistry(model_dir=str(tmp_path), names=["lightgbm"], poll_interval=0, backend="numpy")
+    registry.refresh()
+    with registry.acquire("lightgbm") as served:
+        assert isinstance(served.model, NumpyModel)
+        assert served.describe()["inference_backend"] == "numpy"
+        _, scores = served.predict_with_score(X.iloc[:10])
+    np.testing.assert_allclose(scores, model.predict_proba(X.iloc[:10])[:, 1], atol=1e-5)
+
+
+def test_stale_export_falls_back_to_the_native_model(tmp_path):
+    X, y = make_data()
+    publish_model("xgboost", MODELS["xgboost"]().fit(X, y), {"features": FEATURES}, model_dir=str(tmp_path))
+    _, path, _ = model_registry.latest_artifact("xgboost", str(tmp_path))
+    # An export written for some other artifact
+    export_model(MODELS["xgboost"]().fit(X, y), export_path(path), source=[99, "other"])
+
+    registry = ModelRegistry(model_dir=str(tmp_path), names=["xgboost"], poll_interval=0, backend="numpy")
+    registry.refresh()
+    with registry.acquire("xgboost") as served:
+        assert not isinstance(served.model, NumpyModel)
+
+
+def test_large_batches_score_on_the_native_model(tmp_path, monkeypatch):
+    X, y = make_data()
+    model = MODELS["random_forest"]().fit(X, y)
+    version, metadata = publish_model("random_forest", model, {"features": FEATURES}, model_dir=str(tmp_path))
+    _, path, _ = model_registry.latest_artifact("random_forest", str(tmp_path))
+    served = ModelVersion("random_forest", version, NumpyModel.load(export_path(path)), metadata, path=path)
+    monkeypatch.setattr(model_registry, "NUMPY_MAX_BATCH_ROWS", 16)
+
+    assert served._model_for(X.iloc[:16]) is served.model
+    native = served._model_for(X)
+    assert isinstance(native, RandomForestClassifier)
+    # Loaded once and reused
+    assert served._model_for(X) is native
+    np.testing.assert_allclose(served.predict_with_score(X)[1], model.predict_proba(X)[:, 1], atol=1e-6)
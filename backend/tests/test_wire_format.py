@@ -0,0 +1,104 @@
+import msgpack
+import numpy as np
+import pytest
+
+from wire_format import (
+    DTYPE, SchemaMismatch, decode_flows, describe_schema, encode_flows, schema_id, wire_columns
+)
+from inference_cache import ENGINEERING_INPUTS
+
+FEATURES = ["Flow Duration", "Fwd Packet Length Max", "Protocol"]
+
+
+def test_round_trip_keeps_values_columns_and_addresses():
+    columns = wire_columns(FEATURES)
+    matrix = np.random.default_rng(0).random((5, len(columns)))
+    body = encode_flows(matrix, columns, [f"10.0.0.{i}" for i in range(5)], ["10.0.1.1"] * 5)
+
+    df, source_ips, destination_ips = decode_flows(body, columns)
+    assert list(df.columns) == columns
+    np.testing.assert_array_equal(df.to_numpy(), matrix.astype(DTYPE))
+    assert source_ips == [f"10.0.0.{i}" for i in range(5)]
+    assert destination_ips == ["10.0.1.1"] * 5
+
+
+def test_missing_addresses_default_to_na():
+    columns = wire_columns(FEATURES)
+    _, source_ips, destination_ips = decode_flows(encode_flows(np.zeros((2, len(columns))), columns), columns)
+    assert source_ips == destination_ips == ["N/A", "N/A"]
+
+
+def test_wire_columns_add_the_engineering_inputs_once():
+    columns = wire_columns(FEATURES)
+    assert columns[:len(FEATURES)] == FEATURES
+    assert set(ENGINEERING_INPUTS) <= set(columns) and len(columns) == len(set(columns))
+    assert describe_schema(FEATURES)["schema_id"] == schema_id(columns)
+
+
+def test_other_feature_set_is_a_schema_mismatch():
+    columns = wire_columns(FEATURES)
+    body = encode_flows(np.zeros((1, len(columns))), columns)
+    with pytest.raises(SchemaMismatch):
+        decode_flows(body, wire_columns(FEATURES + ["Extra"]))
+
+
+def _packed(columns, **overrides):
+    doc = {"s": schema_id(columns), "n": 2, "x": np.zeros((2, len(columns)), dtype=DTYPE).tobytes(),
+           "src": ["a", "b"], "dst": ["c", "d"]}
+    doc.update(overrides)
+    return msgpack.packb(doc, use_bin_type=True)
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"n": 3}, "Expected 3 x"),
+    ({"n": "two"}, "no valid row count"),
+    ({"x": b"\x00" * 12}, "Expected 2 x"),
+    ({"src": ["a"]}, "'src' must list one address per row"),
+    ({"dst": "c,d"}, "'dst' must list one address per row"),
+])
+def test_malformed_batches_raise_value_error(overrides, message):
+    columns = wire_columns(FEATURES)
+    with pytest.raises(ValueError, match=message):
+        decode_flows(_packed(columns, **overrides), columns)
+
+
+def test_non_mapping_payload_is_rejected():
+    with pytest.raises(ValueError, match="not a flow batch"):
+        decode_flows(msgpack.packb([1, 2, 3]), wire_columns(FEATURES))
+
+
+# ================= /api/predict-batch =================
+@pytest.fixture(scope="module")
+def batch_client():
+    import app
+    from admission import AdmissionController
+    client = app.app.test_client()
+    schema = client.get("/api/schema?model=xgboost").get_json()
+    if "columns" not in schema:
+        pytest.skip("xgboost model not available")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(app, "admission", AdmissionController(client_rate=0))
+        yield client, schema
+
+
+def test_predict_batch_scores_msgpack_and_answers_in_msgpack(batch_client):
+    client, schema = batch_client
+    columns = schema["columns"]
+    body = encode_flows(np.random.default_rng(1).random((4, len(columns))), columns,
+                        ["10.0.0.1"] * 4, ["10.0.0.2"] * 4)
+    response = client.post("/api/predict-batch?model=xgboost", data=body,
+                           content_type="application/msgpack", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200 and response.mimetype == "application/msgpack"
+    result = msgpack.unpackb(response.data, raw=False)
+    assert len(result["predictions"]) == len(result["scores"]) == 4
+
+
+def test_predict_batch_status_codes_for_bad_batches(batch_client):
+    client, schema = batch_client
+    columns = schema["columns"]
+    post = lambda body: client.post("/api/predict-batch?model=xgboost", data=body,
+                                    content_type="application/msgpack")
+    stale = post(encode_flows(np.zeros((1, 3)), ["a", "b", "c"]))
+    assert stale.status_code == 409 and stale.get_json()["schema_id"] == schema["schema_id"]
+    assert post(_packed(columns, src=["only-one"])).status_code == 400
+    assert post(b"\xc1 not msgpack").status_code == 400
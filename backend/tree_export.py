@@ -0,0 +1,295 @@
+"""
+NumPy-only inference for the served models.
+
+Random forests, XGBoost and LightGBM boosters and logistic regression
+are exported once to a flat .npz (node arrays for all trees, or the
+linear coefficients). NumpyModel evaluates the export with array
+operations only, so a worker serving it never imports scikit-learn,
+xgboost or lightgbm.
+
+    python tree_export.py                 # export every served model and check agreement
+    python tree_export.py --models xgboost --rows 5000
+"""
+import os
+import json
+import argparse
+
+import numpy as np
+
+EXPORT_SUFFIX = ".trees.npz"
+# Trees are walked for this many rows at a time; memory is rows x trees per level
+ROW_CHUNK = 4096
+
+
+def export_path(model_path):
+    """saved_models/xgboost_ddos.joblib -> saved_models/xgboost_ddos.trees.npz"""
+    return os.path.splitext(model_path)[0] + EXPORT_SUFFIX
+
+
+# ================= EXPORT =================
+class _Nodes:
+    """Accumulates the nodes of many trees into flat arrays with global child indices."""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right = [], [], [], []
+        self.default_left, self.missing, self.value, self.roots = [], [], [], []
+
+    def add(self, feature, threshold, left, right, default_left, value, missing=None):
+        offset = len(self.feature)
+        self.roots.append(offset)
+        self.feature.extend(feature)
+        self.threshold.extend(threshold)
+        self.left.extend(np.where(np.asarray(left) >= 0, np.asarray(left) + offset, -1))
+        self.right.extend(np.where(np.asarray(right) >= 0, np.asarray(right) + offset, -1))
+        self.default_left.extend(default_left)
+        self.missing.extend(missing if missing is not None else [2] * len(feature))
+        self.value.extend(value)
+
+    def arrays(self):
+        return {
+            "feature": np.asarray(self.feature, dtype=np.int32),
+            "threshold": np.asarray(self.threshold, dtype=np.float64),
+            "left": np.asarray(self.left, dtype=np.int32),
+            "right": np.asarray(self.right, dtype=np.int32),
+            "default_left": np.asarray(self.default_left, dtype=bool),
+            # 0: NaN counts as 0.0, 1: zero and NaN are missing, 2: NaN is missing
+            "missing": np.asarray(self.missing, dtype=np.int8),
+            "value": np.asarray(self.value, dtype=np.float64),
+            "roots": np.asarray(self.roots, dtype=np.int32)
+        }
+
+
+def _export_forest(model):
+    nodes = _Nodes()
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        proba = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12)
+        leaf = tree.children_left < 0
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool))
+        nodes.add(np.where(leaf, -1, tree.feature), tree.threshold,
+                  tree.children_left, tree.children_right, missing_left.astype(bool), proba[:, 1])
+    # Trees compare float32 inputs; probabilities are averaged over trees
+    return nodes.arrays(), {"kind": "forest", "float32_inputs": True, "strict": False, "base_margin": 0.0}
+
+
+def _export_xgboost(model):
+    booster = model.get_booster()
+    raw = json.loads(booster.save_raw("json"))
+    learner = raw["learner"]
+    gbtree = learner["gradient_booster"]["model"]
+    trees = gbtree["trees"]
+    try:
+        # Early-stopped models predict with their best iteration only
+        per_round = max(1, int(gbtree["gbtree_model_param"].get("num_parallel_tree", 1)))
+        trees = trees[:(model.best_iteration + 1) * per_round]
+    except AttributeError:
+        pass
+
+    nodes = _Nodes()
+    for tree in trees:
+        left = np.asarray(tree["left_children"])
+        leaf = left < 0
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+        nodes.add(np.where(leaf, -1, tree["split_indices"]), conditions, left,
+                  tree["right_children"], np.asarray(tree["default_left"], dtype=bool),
+                  np.where(leaf, conditions, 0.0))
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    objective = learner["objective"]["name"]
+    base_margin = float(np.log(base_score / (1 - base_score))) if objective.startswith("binary:logistic") else base_score
+    # XGBoost splits are `x < threshold` on float32 inputs
+    return nodes.arrays(), {"kind": "boosted", "float32_inputs": True, "strict": True, "base_margin": base_margin}
+
+
+def _export_lightgbm(model):
+    dump = model.booster_.dump_model()
+    nodes = _Nodes()
+    missing_codes = {"None": 0, "Zero": 1, "NaN": 2}
+    for info in dump["tree_info"]:
+        feature, threshold, left, right, default_left, missing, value = [], [], [], [], [], [], []
+
+        def visit(node):
+            index = len(feature)
+            for column in (feature, threshold, left, right, default_left, missing, value):
+                column.append(None)
+            if "leaf_value" in node or "split_feature" not in node:
+                feature[index], threshold[index], left[index], right[index] = -1, 0.0, -1, -1
+                default_left[index], missing[index] = False, 2
+                value[index] = node.get("leaf_value", 0.0)
+                return index
+            feature[index] = node["split_feature"]
+            threshold[index] = node["threshold"]
+            default_left[index] = node["default_left"]
+            missing[index] = missing_codes.get(node.get("missing_type"), 2)
+            value[index] = 0.0
+            left[index] = visit(node["left_child"])
+            right[index] = visit(node["right_child"])
+            return index
+
+        visit(info["tree_structure"])
+        nodes.add(feature, threshold, left, right, default_left, value, missing)
+    return nodes.arrays(), {"kind": "boosted", "float32_inputs": False, "strict": False, "base_margin": 0.0}
+
+
+def _export_linear(model):
+    arrays = {"coef": np.asarray(model.coef_, dtype=np.float64).ravel(),
+              "intercept": np.asarray(model.intercept_, dtype=np.float64).ravel()}
+    return arrays, {"kind": "linear"}
+
+
+EXPORTERS = {
+    "RandomForestClassifier": _export_forest,
+    "ExtraTreesClassifier": _export_forest,
+    "XGBClassifier": _export_xgboost,
+    "LGBMClassifier": _export_lightgbm,
+    "LogisticRegression": _export_linear
+}
+
+
+def export_model(model, path, source=None):
+    """
+    Write a NumPy export of a fitted binary classifier. `source` (the
+    artifact signature) is stored so stale exports are never served.
+    Returns False for model types without an exporter.
+    """
+    exporter = EXPORTERS.get(type(model).__name__)
+    if exporter is None:
+        return False
+    arrays, meta = exporter(model)
+    features = getattr(model, "feature_names_in_", None)
+    meta.update({
+        "model_type": type(model).__name__,
+        "classes": [int(c) for c in getattr(model, "classes_", [0, 1])],
+        "n_features": int(getattr(model, "n_features_in_", 0)),
+        "features": list(features) if features is not None else None,
+        "source": source
+    })
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta, default=str)), **arrays)
+    os.replace(tmp_path, path)
+    return True
+
+
+# ================= EVALUATION =================
+def _sigmoid(margin):
+    return 1.0 / (1.0 + np.exp(-margin))
+
+
+class NumpyModel:
+    """Fitted-model stand-in with predict / predict_proba over a NumPy export."""
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.kind = meta["kind"]
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        if meta.get("features") is not None:
+            self.feature_names_in_ = np.asarray(meta["features"], dtype=object)
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        if self.kind != "linear":
+            self.is_leaf = self.feature < 0
+            self.safe_feature = np.where(self.is_leaf, 0, self.feature)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+        return cls(arrays, meta)
+
+    @property
+    def source(self):
+        return self.meta.get("source")
+
+    def _leaf_values(self, X):
+        """(n_rows, n_trees) leaf values, walking all trees one level per step."""
+        if self.meta["float32_inputs"]:
+            X = X.astype(np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        while True:
+            active = ~self.is_leaf[node]
+            if not active.any():
+                break
+            x = X[rows, self.safe_feature[node]]
+            missing_type = self.missing[node]
+            nan = np.isnan(x)
+            x = np.where(nan & (missing_type == 0), 0.0, x)
+            is_missing = (nan & (missing_type != 0)) | ((missing_type == 1) & (x == 0))
+            threshold = self.threshold[node]
+            go_left = (x < threshold) if self.meta["strict"] else (x <= threshold)
+            go_left = np.where(is_missing, self.default_left[node], go_left)
+            node = np.where(active, np.where(go_left, self.left[node], self.right[node]), node)
+        return self.value[node]
+
+    def _positive_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == "linear":
+            return _sigmoid(X @ self.coef + self.intercept[0])
+        if len(X) > ROW_CHUNK:
+            return np.concatenate([self._positive_proba(X[i:i + ROW_CHUNK]) for i in range(0, len(X), ROW_CHUNK)])
+        values = self._leaf_values(X)
+        if self.kind == "forest":
+            return values.mean(axis=1)
+        return _sigmoid(values.sum(axis=1) + self.meta["base_margin"])
+
+    def predict_proba(self, X):
+        positive = self._positive_proba(X)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self._positive_proba(X) > 0.5).astype(int)]
+
+
+# ================= CLI =================
+def main():
+    """Export every served model and report its agreement with the original."""
+    import time
+    import joblib
+    import pandas as pd
+    from model_registry import latest_artifact, export_source
+    from config import ALLOWED_MODELS
+    from utils.preprocess_input import preprocess_input
+
+    parser = argparse.ArgumentParser(description="Export served models for NumPy-only inference")
+    parser.add_argument("--models", nargs="+", default=ALLOWED_MODELS)
+    parser.add_argument("--data", default=None, help="CSV of flows to compare on (default: random rows)")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name in args.models:
+        artifact = latest_artifact(name)
+        if artifact is None:
+            continue
+        version, path, metadata = artifact
+        model = joblib.load(path)
+        target = export_path(path)
+        if not export_model(model, target, export_source(version, path, metadata)):
+            print(f"{name}: {type(model).__name__} has no NumPy exporter, skipped")
+            continue
+
+        exported = NumpyModel.load(target)
+        features = metadata.get("features") or getattr(model, "feature_names_in_", None)
+        if args.data:
+            X = preprocess_input(pd.read_csv(args.data, nrows=args.rows), features)
+        else:
+            rng = np.random.default_rng(0)
+            X = pd.DataFrame(np.abs(rng.normal(0, 3, (args.rows, model.n_features_in_))), columns=features)
+        X = X.to_numpy(dtype=np.float64) if features is None else X
+
+        start = time.perf_counter()
+        expected = model.predict_proba(X)[:, 1]
+        native_s = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = exported.predict_proba(np.asarray(X, dtype=np.float64))[:, 1]
+        numpy_s = time.perf_counter() - start
+
+        print(f"{name}: {os.path.getsize(target) / 1024:.0f} KB, max |dp|={np.max(np.abs(expected - actual)):.2e}, "
+              f"label agreement={np.mean((expected > 0.5) == (actual > 0.5)):.4f}, "
+              f"native {native_s * 1000:.1f} ms vs numpy {numpy_s * 1000:.1f} ms for {len(actual)} rows")
+
+
+if __name__ == "__main__":
+    main()
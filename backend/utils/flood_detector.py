@@ -0,0 +1,111 @@
+import os
+import time
+from collections import OrderedDict
+
+# Sustained packets/sec towards one destination that counts as a flood
+RATE_THRESHOLD = float(os.getenv("FLOOD_RATE_THRESHOLD", 2000))
+# Burst allowance in seconds' worth of packets at the threshold rate
+BURST_SECONDS = float(os.getenv("FLOOD_BURST_SECONDS", 0.5))
+SYN_RATIO_THRESHOLD = float(os.getenv("FLOOD_SYN_RATIO", 0.7))
+UDP_RATIO_THRESHOLD = float(os.getenv("FLOOD_UDP_RATIO", 0.7))
+# Weight of each packet in the EWMA SYN / UDP ratios
+EWMA_ALPHA = 0.01
+# Seconds a destination stays flagged after its rate drops back
+HOLD_SECONDS = float(os.getenv("FLOOD_HOLD_SECONDS", 5))
+MAX_DESTINATIONS = int(os.getenv("FLOOD_MAX_DESTINATIONS", 10000))
+# Every kind a detection can name (and all the backend accepts as fast-path alerts)
+FLOOD_KINDS = ("SYN Flood", "UDP Flood", "Volumetric Flood")
+
+
+class DestinationState:
+    __slots__ = ("tokens", "last", "syn_ratio", "udp_ratio", "packets",
+                 "window_start", "rate_pps", "flagged_until", "kind")
+
+    def __init__(self, now, capacity):
+        self.tokens = capacity
+        self.last = now
+        self.syn_ratio = 0.0
+        self.udp_ratio = 0.0
+        self.packets = 0
+        self.window_start = now
+        self.rate_pps = 0.0
+        self.flagged_until = 0.0
+        self.kind = None
+
+
+class FloodDetector:
+    """
+    Cheap per-destination first stage in front of the ML model. A token
+    bucket refilled at RATE_THRESHOLD packets/sec flags a destination as
+    soon as its burst allowance is used up, and EWMA SYN / UDP ratios name
+    the flood type. Each packet costs O(1); state is a bounded LRU.
+    """
+
+    def __init__(self, rate_threshold=RATE_THRESHOLD, burst_seconds=BURST_SECONDS,
+                 hold_seconds=HOLD_SECONDS, max_destinations=MAX_DESTINATIONS):
+        self.rate_threshold = rate_threshold
+        self.capacity = rate_threshold * burst_seconds
+        self.hold_seconds = hold_seconds
+        self.max_destinations = max_destinations
+        self.state = OrderedDict()
+
+    def update(self, dst, proto, is_syn=False, now=None):
+        """
+        Account one packet. Returns a detection dict the first time a
+        destination crosses into flood state, otherwise None.
+        """
+        now = time.time() if now is None else now
+        state = self.state.get(dst)
+        if state is None:
+            state = self.state[dst] = DestinationState(now, self.capacity)
+            if len(self.state) > self.max_destinations:
+                self.state.popitem(last=False)
+        else:
+            self.state.move_to_end(dst)
+
+        state.tokens = min(self.capacity, state.tokens + (now - state.last) * self.rate_threshold)
+        state.tokens -= 1
+        state.last = now
+
+        state.syn_ratio += EWMA_ALPHA * ((1.0 if is_syn else 0.0) - state.syn_ratio)
+        state.udp_ratio += EWMA_ALPHA * ((1.0 if proto == 17 else 0.0) - state.udp_ratio)
+
+        state.packets += 1
+        if now - state.window_start >= 1.0:
+            state.rate_pps = state.packets / (now - state.window_start)
+            state.packets = 0
+            state.window_start = now
+
+        if state.tokens >= 0:
+            return None
+
+        newly_flagged = state.flagged_until < now
+        state.flagged_until = now + self.hold_seconds
+        if not newly_flagged:
+            return None
+
+        if state.syn_ratio >= SYN_RATIO_THRESHOLD:
+            state.kind = FLOOD_KINDS[0]
+        elif state.udp_ratio >= UDP_RATIO_THRESHOLD:
+            state.kind = FLOOD_KINDS[1]
+        else:
+            state.kind = FLOOD_KINDS[2]
+        return self.describe(dst, now)
+
+    def is_flagged(self, dst, now=None):
+        state = self.state.get(dst)
+        now = time.time() if now is None else now
+        return state is not None and state.flagged_until >= now
+
+    def describe(self, dst, now=None):
+        state = self.state[dst]
+        now = time.time() if now is None else now
+        # Partial-second rate until the first full second has elapsed
+        rate = state.rate_pps or state.packets / max(now - state.window_start, 1e-3)
+        return {
+            "destination_ip": dst,
+            "kind": state.kind,
+            "rate_pps": round(rate, 1),
+            "syn_ratio": round(state.syn_ratio, 3),
+            "udp_ratio": round(state.udp_ratio, 3)
+        }
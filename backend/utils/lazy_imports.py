@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+
+try:
+    from config import STARTUP_MODE
+except ImportError:
+    STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+
+# module -> seconds its first import took through lazy_import / preload
+import_times = {}
+
+
+def _import(name):
+    # Always through importlib: its module locks make a caller wait for an
+    # import another thread (e.g. preload) has only half finished
+    timed = name not in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if timed:
+        import_times[name] = round(time.perf_counter() - start, 4)
+    return module
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is first used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = _import(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """The module itself in eager startup mode, a LazyModule in fast mode."""
+    if STARTUP_MODE != "fast" or name in sys.modules:
+        return _import(name)
+    return LazyModule(name)
+
+
+def preload(names, delay=0.0):
+    """Import modules on a background thread so the first request rarely pays for them."""
+    def run():
+        time.sleep(delay)
+        for name in names:
+            try:
+                _import(name)
+            except ImportError as e:
+                logging.warning(f"Background import of {name} failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
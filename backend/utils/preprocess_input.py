@@ -1,6 +1,9 @@
-import pandas as pd
 import numpy as np
 
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
 def preprocess_input(data, expected_columns=None):
 
     # ---------------- INPUT HANDLING ----------------
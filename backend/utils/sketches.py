@@ -0,0 +1,255 @@
+import heapq
+import base64
+import hashlib
+import itertools
+
+import numpy as np
+
+
+def _hash64(item):
+    return int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+
+
+# HyperLogLog precisions accepted from serialized sketches (2**18 = 256 KiB of registers)
+HLL_MIN_P, HLL_MAX_P = 4, 18
+
+
+def _check(condition, message):
+    if not condition:
+        raise ValueError(message)
+
+
+def _is_count(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+
+
+# ================= SPACE-SAVING TOP-K =================
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters with at most k counters. Counts are upper
+    bounds; count - error is a guaranteed lower bound.
+
+    The smallest counter is found through a min-heap with lazy
+    invalidation: increments leave heap entries stale (too low) and an
+    eviction re-pushes stale entries until the top is current, so an
+    update costs O(log k) amortized instead of a scan of all k counters.
+    """
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counters = {}   # item -> [count, error]
+        self._heap = []      # (count when pushed, seq, item); seq breaks ties between unorderable items
+        self._seq = itertools.count()
+
+    def _push(self, item, count):
+        heapq.heappush(self._heap, (count, next(self._seq), item))
+
+    def _rebuild(self):
+        self._heap = [(counter[0], next(self._seq), item) for item, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is None:
+                continue
+            if counter[0] == count:
+                return item
+            self._push(item, counter[0])
+
+    def update(self, item, weight=1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.k:
+            self.counters[item] = [weight, 0]
+            self._push(item, weight)
+        else:
+            # Replace the smallest counter; the newcomer inherits its count as error
+            victim = self._pop_min()
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + weight, floor]
+            self._push(item, floor + weight)
+            return victim
+        return None
+
+    def merge(self, other):
+        for item, (count, error) in other.counters.items():
+            counter = self.counters.setdefault(item, [0, 0])
+            counter[0] += count
+            counter[1] += error
+        if len(self.counters) > self.k:
+            keep = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:self.k]
+            self.counters = dict(keep)
+        self._rebuild()
+        return self
+
+    def top(self, n=10):
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(item, count, error) for item, (count, error) in ranked]
+
+    def to_dict(self):
+        return {"k": self.k, "counters": [[item, c, e] for item, (c, e) in self.counters.items()]}
+
+    @classmethod
+    def from_dict(cls, data, k=None):
+        """Rebuild from to_dict(); `k`, if given, must match. Raises ValueError on bad input."""
+        _check(type(data["k"]) is int and data["k"] >= 1, "k must be a positive integer")
+        _check(k is None or data["k"] == k, f"k is {data['k']}, expected {k}")
+        _check(len(data["counters"]) <= data["k"], "more counters than k")
+        sketch = cls(data["k"])
+        for item, c, e in data["counters"]:
+            _check(isinstance(item, str) and _is_count(c) and _is_count(e), "counters must be [str, count, error]")
+            sketch.counters[item] = [c, e]
+        sketch._rebuild()
+        return sketch
+
+
+# ================= HYPERLOGLOG =================
+class HyperLogLog:
+    """Distinct-count estimator in 2**p bytes (p=10: ~3% standard error)."""
+
+    def __init__(self, p=10):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, item):
+        h = _hash64(item)
+        index = h >> (64 - self.p)
+        rest = (h << self.p) & ((1 << 64) - 1)
+        rank = (64 - self.p + 1) if rest == 0 else (65 - rest.bit_length())
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {"p": self.p, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data, p=None):
+        """Rebuild from to_dict(); `p`, if given, must match. Raises ValueError on bad input."""
+        _check(type(data["p"]) is int and HLL_MIN_P <= data["p"] <= HLL_MAX_P,
+               f"p must be an integer in [{HLL_MIN_P}, {HLL_MAX_P}]")
+        _check(p is None or data["p"] == p, f"p is {data['p']}, expected {p}")
+        registers = np.frombuffer(base64.b64decode(data["registers"], validate=True), dtype=np.uint8)
+        _check(len(registers) == 1 << data["p"], f"expected {1 << data['p']} registers, got {len(registers)}")
+        _check(int(registers.max(initial=0)) <= 65 - data["p"], "register value out of range")
+        sketch = cls(data["p"])
+        sketch.registers = registers.copy()
+        return sketch
+
+
+# ================= TRAFFIC SUMMARY =================
+class TrafficSketch:
+    """
+    Fixed-memory summary of one capture interval: top source IPs and
+    destination ports by packets, top destinations, and a distinct-source
+    HyperLogLog for each tracked destination. Mergeable across agents.
+    """
+
+    def __init__(self, k=100, max_destinations=32, hll_p=10):
+        self.k = k
+        self.max_destinations = max_destinations
+        self.hll_p = hll_p
+        self.packets = 0
+        self.sources = SpaceSaving(k)
+        self.dst_ports = SpaceSaving(k)
+        self.destinations = SpaceSaving(max_destinations)
+        self.distinct_sources = {}   # destination -> HyperLogLog
+
+    def config(self):
+        """(k, max_destinations, hll_p): sketches merge only with the same config."""
+        return self.k, self.max_destinations, self.hll_p
+
+    def update(self, src, dst, dport=None, weight=1):
+        self.packets += weight
+        self.sources.update(src, weight)
+        if dport is not None:
+            self.dst_ports.update(str(dport), weight)
+
+        evicted = self.destinations.update(dst, weight)
+        if evicted is not None:
+            self.distinct_sources.pop(evicted, None)
+        hll = self.distinct_sources.get(dst)
+        if hll is None:
+            hll = self.distinct_sources[dst] = HyperLogLog(self.hll_p)
+        hll.add(src)
+
+    def merge(self, other):
+        self.packets += other.packets
+        self.sources.merge(other.sources)
+        self.dst_ports.merge(other.dst_ports)
+        self.destinations.merge(other.destinations)
+        for dst, hll in other.distinct_sources.items():
+            if dst in self.distinct_sources:
+                self.distinct_sources[dst].merge(hll)
+            else:
+                self.distinct_sources[dst] = HyperLogLog.from_dict(hll.to_dict())
+        # Only keep HLLs for destinations that survived the top-k merge
+        self.distinct_sources = {
+            dst: hll for dst, hll in self.distinct_sources.items()
+            if dst in self.destinations.counters
+        }
+        return self
+
+    def top_talkers(self, n=10):
+        return {
+            "packets": self.packets,
+            "sources": [{"ip": ip, "packets": c, "error": e} for ip, c, e in self.sources.top(n)],
+            "destination_ports": [{"port": p, "packets": c, "error": e} for p, c, e in self.dst_ports.top(n)],
+            "destinations": [
+                {
+                    "ip": ip, "packets": c, "error": e,
+                    "distinct_sources": self.distinct_sources[ip].count() if ip in self.distinct_sources else None
+                }
+                for ip, c, e in self.destinations.top(n)
+            ]
+        }
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "max_destinations": self.max_destinations,
+            "hll_p": self.hll_p,
+            "packets": self.packets,
+            "sources": self.sources.to_dict(),
+            "dst_ports": self.dst_ports.to_dict(),
+            "destinations": self.destinations.to_dict(),
+            "distinct_sources": {dst: hll.to_dict() for dst, hll in self.distinct_sources.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, config=None):
+        """
+        Rebuild a sketch from to_dict(). With `config` (see config()), a
+        sketch built with other parameters is rejected, so whatever is
+        returned can be merged into sketches of that config. Raises
+        KeyError / TypeError / ValueError on malformed input.
+        """
+        k, max_destinations, hll_p = config or (data["k"], data["max_destinations"], data["hll_p"])
+        _check((data["k"], data["max_destinations"], data["hll_p"]) == (k, max_destinations, hll_p),
+               f"sketch config does not match (k, max_destinations, hll_p) = {(k, max_destinations, hll_p)}")
+        _check(_is_count(data["packets"]), "packets must be a count")
+        _check(len(data["distinct_sources"]) <= max_destinations, "more distinct-source sketches than max_destinations")
+        sketch = cls(k, max_destinations, hll_p)
+        sketch.packets = data["packets"]
+        sketch.sources = SpaceSaving.from_dict(data["sources"], k)
+        sketch.dst_ports = SpaceSaving.from_dict(data["dst_ports"], k)
+        sketch.destinations = SpaceSaving.from_dict(data["destinations"], max_destinations)
+        sketch.distinct_sources = {
+            dst: HyperLogLog.from_dict(hll, hll_p) for dst, hll in data["distinct_sources"].items()
+        }
+        return sketch
@@ -0,0 +1,92 @@
+"""
+Compact binary flow encoding for /api/predict-batch.
+
+A client fetches GET /api/schema?model=<name> once, then posts MessagePack
+documents of the form
+
+    {"s": <schema id>, "n": <rows>, "x": <row-major little-endian float32 bytes>,
+     "src": [source IPs], "dst": [destination IPs]}
+
+The schema id is a hash of the ordered column list, so a model published
+with a different feature set is detected (409) and the client renegotiates.
+"""
+import hashlib
+
+import numpy as np
+
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from inference_cache import ENGINEERING_INPUTS
+
+MSGPACK_MIME = "application/msgpack"
+DTYPE = np.dtype("<f4")
+
+
+class SchemaMismatch(ValueError):
+    pass
+
+
+def wire_columns(features):
+    """Columns a client sends: the model's features plus preprocess_input's raw inputs."""
+    return list(dict.fromkeys(list(features) + ENGINEERING_INPUTS))
+
+
+def schema_id(columns):
+    return hashlib.sha1("\n".join(columns).encode()).hexdigest()[:12]
+
+
+def describe_schema(features):
+    columns = wire_columns(features)
+    return {"schema_id": schema_id(columns), "columns": columns, "dtype": DTYPE.str}
+
+
+def encode_flows(matrix, columns, source_ips=None, destination_ips=None):
+    """Client side: (n_rows, n_columns) values in `columns` order -> bytes."""
+    if msgpack is None:
+        raise ImportError("msgpack is required for the binary wire format")
+    matrix = np.ascontiguousarray(matrix, dtype=DTYPE)
+    return msgpack.packb({
+        "s": schema_id(columns),
+        "n": int(matrix.shape[0]),
+        "x": matrix.tobytes(),
+        "src": list(source_ips or []),
+        "dst": list(destination_ips or [])
+    }, use_bin_type=True)
+
+
+def decode_flows(body, columns):
+    """
+    Server side: bytes -> (DataFrame in `columns` order, source IPs,
+    destination IPs). The matrix is a zero-copy view of the payload.
+    """
+    if msgpack is None:
+        raise ImportError("msgpack is required for the binary wire format")
+    doc = msgpack.unpackb(body, raw=False)
+    if not isinstance(doc, dict):
+        raise ValueError("Payload is not a flow batch")
+    expected = schema_id(columns)
+    if doc.get("s") != expected:
+        raise SchemaMismatch(f"Schema {doc.get('s')} does not match {expected}")
+
+    try:
+        n = int(doc["n"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Payload has no valid row count 'n'")
+    matrix = np.frombuffer(doc["x"], dtype=DTYPE)
+    if matrix.size != n * len(columns):
+        raise ValueError(f"Expected {n} x {len(columns)} values, got {matrix.size}")
+    df = pd.DataFrame(matrix.reshape(n, len(columns)), columns=columns, copy=False)
+
+    source_ips = doc.get("src") or ["N/A"] * n
+    destination_ips = doc.get("dst") or ["N/A"] * n
+    for name, values in (("src", source_ips), ("dst", destination_ips)):
+        if not isinstance(values, list) or len(values) != n:
+            raise ValueError(f"'{name}' must list one address per row ({n})")
+    return df, source_ips, destination_ips
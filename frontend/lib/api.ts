@@ -88,6 +88,11 @@ export interface ApiAlert {
   source_ip?: string;
   destination_ip?: string;
   protocol?: string;
+  count?: number;
+  attack_count?: number;
+  first_seen?: string;
+  last_seen?: string;
+  max_score?: number | null;
 }
 
 // -----------------------------
@@ -165,6 +170,71 @@ export async function predictCSV(
   return data;
 }
 
+export interface CsvJob {
+  job_id: string;
+  model: string;
+  state: "queued" | "running" | "done" | "failed";
+  rows_total: number | null;
+  rows_done: number;
+  ddos_detected: number;
+  normal: number;
+  rows_per_sec: number | null;
+  progress: number | null;
+  results: boolean;
+  error?: string;
+}
+
+// Large uploads come back as a background job (HTTP 202); poll until done
+export async function fetchCsvJob(jobId: string) {
+  const { data, error } = await safeApiCall<CsvJob>(`/jobs/${jobId}`);
+  if (error) throw new Error(error);
+  return data;
+}
+
+export function csvJobResultsUrl(jobId: string) {
+  return `${BASE_URL}/jobs/${jobId}/results`;
+}
+
+// -----------------------------
+// Capture agents (fleet)
+// -----------------------------
+
+export interface IntervalCounts {
+  packets: number;
+  flows: number;
+  scored: number;
+  attacks: number;
+  normal: number;
+  fast_path_flows: number;
+}
+
+export interface SensorStatus {
+  agent_id: string;
+  segment: string | null;
+  status: "online" | "stale";
+  attack_rate: number;
+  totals: IntervalCounts;
+}
+
+export interface FleetView {
+  agents: number;
+  online: number;
+  totals: IntervalCounts;
+  attack_rate: number;
+  timeline: (IntervalCounts & { interval_start: number; interval_s: number; agents: number; attack_rate: number })[];
+  sensors: SensorStatus[];
+}
+
+export async function fetchFleet() {
+  const { data, error } = await safeApiCall<FleetView>("/fleet");
+  return { data, error };
+}
+
+export async function fetchAgents() {
+  const { data, error } = await safeApiCall<SensorStatus[]>("/agents");
+  return { data: data || [], error };
+}
+
 // -----------------------------
 // Health check
 // -----------------------------
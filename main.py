@@ -1,6 +1,6 @@
-from src.train1 import load_data, split_data, get_models, save_model
-from src.model_comparison import evaluate_model, save_comparison_table, plot_bar_chart
-from src.evaluation_plots import plot_roc_auc, plot_confusion_matrix
+from src.train1 import load_data, split_data, get_models, train_models
+from src.evaluation_plots import PLOTS_DIR
+from src.balancing_benchmark import benchmark_balancing
 
 import os
 
@@ -20,39 +20,30 @@ def main():
     # Split data
     X_train, X_test, y_train, y_test = split_data(df)
 
-    # Load models
-    models = get_models()
-    feature_names = list(X_train.columns)
-    comparison_results = []
-
-    # Train, Evaluate, Save
-    for name, model in models.items():
-        print(f"\n Training {name}...")
-
-        model.fit(X_train, y_train)
-
-        # Save trained model + metadata
-        save_model(model, name, feature_names)
-
-        # Evaluation metrics
-        metrics = evaluate_model(model, X_test, y_test, name)
-        comparison_results.append(metrics)
-
-        # ROC–AUC Curve
-        plot_roc_auc(model, X_test, y_test, model_name=name)
-
-        # Confusion Matrix
-        plot_confusion_matrix(model, X_test, y_test, model_name=name)
-
-    # Comparison table + plots
-    if comparison_results:
-        df_results = save_comparison_table(comparison_results)
-
-        print("\n Model Comparison Summary")
-        print(df_results)
-
-        plot_bar_chart(df_results, metric="Accuracy")
-        plot_bar_chart(df_results, metric="F1-Score")
+    # Optional: compare balancing strategies on XGBoost before the full run
+    if os.getenv("BALANCE_BENCHMARK", "False") == "True":
+        benchmark_balancing(
+            X_train, X_test, y_train, y_test,
+            get_models()["XGBoost"],
+            output_dir="reports"
+        )
+
+    # Same pipeline as src/train1.py: validation hold-out, balancing,
+    # parallel training + publishing, cascade thresholds, figures
+    df_results = train_models(
+        X_train, X_test, y_train, y_test,
+        get_models(),
+        # none (default), class_weight, undersample, chunked_smote, smote
+        strategy=os.getenv("BALANCE_STRATEGY", "none"),
+        compress=os.getenv("COMPRESS_MODELS", "False") == "True",
+        # Plots and paper figures in a process pool, redrawn only when their inputs changed
+        render=os.getenv("RENDER_REPORTS", "True") == "True",
+        report_dir="reports",
+        plots_dir=PLOTS_DIR
+    )
+
+    print("\n Model Comparison Summary")
+    print(df_results)
 
     print("\n Training & Evaluation Pipeline Completed Successfully")
 
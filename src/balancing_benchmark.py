@@ -0,0 +1,60 @@
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import f1_score, accuracy_score
+
+from src.preprocessing import balance_data, class_weight_params, BALANCE_STRATEGIES
+
+
+def benchmark_balancing(X_train, X_test, y_train, y_test, model,
+                        strategies=BALANCE_STRATEGIES, output_dir="reports",
+                        max_smote_rows=500000):
+    """
+    Compare class-balancing strategies on one reference model: peak
+    memory allocated while balancing (tracemalloc), balancing and fit
+    time, training rows and test F1. Full SMOTE is skipped above
+    max_smote_rows since it is the case this benchmark exists to avoid.
+    """
+    rows = []
+    for strategy in strategies:
+        if strategy == "smote" and len(X_train) > max_smote_rows:
+            print(f"Skipping full SMOTE on {len(X_train)} rows (max_smote_rows={max_smote_rows})")
+            continue
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        X_bal, y_bal = balance_data(X_train, y_train, strategy=strategy)
+        balance_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        estimator = clone(model)
+        if strategy == "class_weight":
+            estimator.set_params(**class_weight_params(estimator, y_bal))
+
+        start = time.perf_counter()
+        estimator.fit(X_bal, y_bal)
+        fit_seconds = time.perf_counter() - start
+        y_pred = estimator.predict(X_test)
+
+        rows.append({
+            "Strategy": strategy,
+            "Train Rows": len(y_bal),
+            "Balance Peak MB": round(peak / 1024 ** 2, 1),
+            "Balance Seconds": round(balance_seconds, 3),
+            "Fit Seconds": round(fit_seconds, 3),
+            "Accuracy": accuracy_score(y_test, y_pred),
+            "F1-Score": f1_score(y_test, y_pred, zero_division=0)
+        })
+        print(f"{strategy}: rows={len(y_bal)} peak={rows[-1]['Balance Peak MB']}MB "
+              f"fit={fit_seconds:.2f}s F1={rows[-1]['F1-Score']:.4f}")
+
+    df = pd.DataFrame(rows)
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, "balancing_benchmark.csv")
+    df.to_csv(csv_path, index=False)
+    print(f"Balancing benchmark saved at: {csv_path}")
+    return df
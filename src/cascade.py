@@ -0,0 +1,108 @@
+import os
+import json
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+# Cheap first stage and the experts that handle its uncertain band
+CHEAP_MODEL = "Logistic Regression"
+EXPERT_MODELS = ["XGBoost", "Random Forest"]
+
+# Accuracy the cascade may give up against the full expert ensemble
+TOLERANCE = 0.002
+
+
+def safe_name(name):
+    return name.lower().replace(" ", "_")
+
+
+def _per_row_seconds(model, X, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(X), 1)
+
+
+# ================= LEARN THRESHOLDS =================
+def learn_cascade(models, X_val, y_val, cheap=CHEAP_MODEL, experts=EXPERT_MODELS,
+                  tolerance=TOLERANCE, n_candidates=50):
+    """
+    Pick the uncertain band [low, high] of the cheap model's probability on
+    the validation split. Flows outside the band are decided by the cheap
+    model; flows inside go to a weighted ensemble of the experts. The band
+    is the narrowest one whose cascade accuracy stays within tolerance of
+    the ensemble's own accuracy.
+    """
+    y_val = np.asarray(y_val)
+    experts = [name for name in experts if name in models]
+
+    p_cheap = models[cheap].predict_proba(X_val)[:, 1]
+    expert_proba = {name: models[name].predict_proba(X_val)[:, 1] for name in experts}
+
+    # Weight experts by how far above chance their ranking is
+    weights = {name: max(roc_auc_score(y_val, p) - 0.5, 1e-6) for name, p in expert_proba.items()}
+    total = sum(weights.values())
+    weights = {name: w / total for name, w in weights.items()}
+    p_expert = sum(weights[name] * p for name, p in expert_proba.items())
+
+    expert_pred = (p_expert >= 0.5).astype(int)
+    expert_acc = accuracy_score(y_val, expert_pred)
+    cheap_acc = accuracy_score(y_val, (p_cheap >= 0.5).astype(int))
+
+    # Candidate edges: quantiles of the cheap scores on each side of 0.5
+    below, above = p_cheap[p_cheap < 0.5], p_cheap[p_cheap >= 0.5]
+    qs = np.linspace(0, 1, n_candidates + 1)
+    lows = np.unique(np.concatenate([[0.0, 0.5], np.quantile(below, qs) if len(below) else []]))
+    highs = np.unique(np.concatenate([[0.5, 1.0], np.quantile(above, qs) if len(above) else []]))
+
+    cheap_right = (p_cheap >= 0.5).astype(int) == y_val
+    expert_right = expert_pred == y_val
+
+    best = None
+    for low in lows:
+        for high in highs:
+            uncertain = (p_cheap >= low) & (p_cheap <= high)
+            accuracy = np.where(uncertain, expert_right, cheap_right).mean()
+            escalated = uncertain.mean()
+            if accuracy >= expert_acc - tolerance and (best is None or escalated < best[2]):
+                best = (float(low), float(high), float(escalated), float(accuracy))
+    low, high, escalated, accuracy = best
+
+    cost_cheap = _per_row_seconds(models[cheap], X_val)
+    cost_experts = sum(_per_row_seconds(models[name], X_val) for name in experts)
+    relative_cost = (cost_cheap + escalated * cost_experts) / cost_experts if cost_experts else 1.0
+
+    return {
+        "cheap": safe_name(cheap),
+        "experts": {safe_name(name): round(w, 4) for name, w in weights.items()},
+        "low": low,
+        "high": high,
+        "threshold": 0.5,
+        "validation": {
+            "rows": int(len(y_val)),
+            "escalated_fraction": round(escalated, 4),
+            "cascade_accuracy": round(accuracy, 6),
+            "expert_accuracy": round(float(expert_acc), 6),
+            "cheap_accuracy": round(float(cheap_acc), 6),
+            "relative_cost": round(relative_cost, 4)
+        },
+        "created": time.time()
+    }
+
+
+def save_cascade(config, model_dir):
+    """Atomically write cascade.json next to the models so workers can pick it up."""
+    os.makedirs(model_dir, exist_ok=True)
+    path = os.path.join(model_dir, "cascade.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+    print(f"Cascade saved at: {path}")
+    print(f"  band=[{config['low']:.4f}, {config['high']:.4f}] "
+          f"escalated={config['validation']['escalated_fraction']:.2%} "
+          f"relative cost={config['validation']['relative_cost']:.2f}")
+    return path
@@ -0,0 +1,136 @@
+"""
+Compact models trained on the top-K features only.
+
+For every K the training split is reduced to the K best-ranked columns
+(ANOVA F-value or tree importance), all models are refit, and accuracy,
+single-flow latency, batch throughput and artifact size are written to
+reports/compact_models.csv next to the full-feature baseline.
+
+    python -m src.compact_models --k 10 20 30 --method importance --live-only
+    python -m src.compact_models --k 20 --publish 20
+"""
+import io
+import os
+import json
+import time
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from src.train1 import load_data, split_data, get_models, save_model, REPORT_DIR
+from src.feature_engineering import rank_features, LIVE_CAPTURE_FEATURES
+from src.model_comparison import evaluate_model
+from src.prediction_cache import get_predictions
+
+COMPACT_DIR = os.path.join(REPORT_DIR, "compact")
+K_VALUES = [10, 20, 30]
+
+
+# ================= MEASUREMENTS =================
+def artifact_size_kb(model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell() / 1024
+
+
+def single_row_latency_ms(model, X, repeats=200):
+    """Median time to score one flow, the way /api/predict does."""
+    rows = [X.iloc[[i % len(X)]] for i in range(repeats)]
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def batch_rows_per_sec(model, X, max_rows=20000):
+    X = X.iloc[:max_rows]
+    start = time.perf_counter()
+    model.predict(X)
+    return len(X) / (time.perf_counter() - start)
+
+
+# ================= TRAINING =================
+def train_compact(X_train, X_test, y_train, y_test, k_values=K_VALUES,
+                  method="anova", live_only=False, output_dir=COMPACT_DIR,
+                  publish_k=None, baseline=True):
+    """Fit every model on each top-K subset and return the trade-off table."""
+    os.makedirs(output_dir, exist_ok=True)
+    candidates = LIVE_CAPTURE_FEATURES if live_only else None
+    ranking = rank_features(X_train, y_train, method=method, candidates=candidates)
+    print(f"Feature ranking ({method}): {ranking[:10]} ...")
+
+    subsets = {k: ranking[:k] for k in k_values if k <= len(ranking)}
+    if baseline:
+        subsets["all"] = list(X_train.columns)
+
+    rows = []
+    for k, features in subsets.items():
+        X_tr, X_te = X_train[features], X_test[features]
+        for name, template in get_models().items():
+            model = clone(template)
+            start = time.perf_counter()
+            model.fit(X_tr, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            y_pred, y_proba = get_predictions(model, X_te, y_test, model_name=f"{name} k={k}")
+            metrics = evaluate_model(model, X_te, y_test, name, y_pred=y_pred, y_proba=y_proba)
+            metrics.update({
+                "K": len(features),
+                "Selection": "all" if k == "all" else method,
+                "Fit Seconds": round(fit_seconds, 3),
+                "Latency ms (1 row)": round(single_row_latency_ms(model, X_te), 4),
+                "Rows/sec (batch)": round(batch_rows_per_sec(model, X_te), 1),
+                "Size KB": round(artifact_size_kb(model), 1)
+            })
+            rows.append(metrics)
+            print(f"{name} K={metrics['K']}: acc={metrics['Accuracy']:.4f} "
+                  f"latency={metrics['Latency ms (1 row)']:.3f}ms size={metrics['Size KB']:.0f}KB")
+
+            if k == "all":
+                continue
+            safe_name = name.lower().replace(" ", "_")
+            joblib.dump(model, os.path.join(output_dir, f"{safe_name}_k{k}.joblib"))
+            with open(os.path.join(output_dir, f"{safe_name}_k{k}_features.json"), "w") as f:
+                json.dump(features, f, indent=2)
+
+            # Serve this subset: the backend aligns requests to the saved schema
+            if publish_k == k:
+                test_metrics = {m: float(v) for m, v in metrics.items()
+                                if m not in ("Model", "Selection")}
+                save_model(model, name, features, metrics=test_metrics)
+
+    df_results = pd.DataFrame(rows)
+    csv_path = os.path.join(REPORT_DIR, "compact_models.csv")
+    df_results.to_csv(csv_path, index=False)
+    print(f"Compact model report saved at: {csv_path}")
+    return df_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train top-K feature compact models")
+    parser.add_argument("--k", type=int, nargs="+", default=K_VALUES)
+    parser.add_argument("--method", choices=["anova", "importance"], default="anova")
+    parser.add_argument("--live-only", action="store_true",
+                        help="Only rank features that live_capture.py computes")
+    parser.add_argument("--publish", type=int, default=None,
+                        help="Publish the models for this K to the backend registry")
+    parser.add_argument("--no-baseline", action="store_true")
+    args = parser.parse_args()
+
+    df = load_data()
+    X_train, X_test, y_train, y_test = split_data(df)
+    results = train_compact(
+        X_train, X_test, y_train, y_test,
+        k_values=args.k, method=args.method, live_only=args.live_only,
+        publish_k=args.publish, baseline=not args.no_baseline
+    )
+    print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
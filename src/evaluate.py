@@ -5,6 +5,8 @@ import pandas as pd
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
 
+from src.prediction_cache import get_predictions
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 PROCESSED_DATA = os.path.join(BASE_DIR, "data", "processed", "cicddos2019_processed.csv")
@@ -23,10 +25,11 @@ def load_data():
     print(f"✅ Loaded processed dataset: {df.shape}")
     return df
 
-def evaluate(model, df):
+def evaluate(model, df, model_name=None):
     X = df.drop("Label", axis=1)
     y_true = df["Label"]
-    y_pred = model.predict(X)
+    # Scores are cached on disk, so re-evaluating the same model is free
+    y_pred, _ = get_predictions(model, X, y_true, model_name=model_name)
 
     print("\n📊 Classification Report:")
     print(classification_report(y_true, y_pred))
@@ -39,7 +42,7 @@ def main():
     model_name = input("Enter model name to evaluate (random_forest_ddos / logistic_regression_ddos): ").strip()
     model = load_model(model_name)
     df = load_data()
-    evaluate(model, df)
+    evaluate(model, df, model_name)
 
 if __name__ == "__main__":
     main()
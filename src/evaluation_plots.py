@@ -1,26 +1,44 @@
 import os
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import (
-    roc_curve,
-    auc,
-    confusion_matrix,
-    RocCurveDisplay
-)
+from sklearn.metrics import confusion_matrix
+
+from src.prediction_cache import get_predictions
 
 # Output directory
 PLOTS_DIR = os.path.join("results", "plots")
 os.makedirs(PLOTS_DIR, exist_ok=True)
 
+# Score bins for ROC curves; more points than a 300-dpi figure can show
+ROC_BINS = int(os.getenv("ROC_BINS", 1000))
+
+
+def binned_roc_curve(y_true, y_score, bins=ROC_BINS):
+    """
+    (fpr, tpr, auc) from per-class histograms of the scores instead of a
+    sort over the whole test set: O(n) and at most bins + 1 points. Scores
+    are clipped to [0, 1]; ties within a bin count as one threshold.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    index = np.minimum((np.clip(np.asarray(y_score, dtype=float), 0, 1) * bins).astype(int), bins - 1)
+    positives = np.bincount(index[y_true], minlength=bins)[::-1]
+    negatives = np.bincount(index[~y_true], minlength=bins)[::-1]
+
+    # Thresholds from the highest bin down
+    tpr = np.concatenate([[0.0], np.cumsum(positives) / max(positives.sum(), 1)])
+    fpr = np.concatenate([[0.0], np.cumsum(negatives) / max(negatives.sum(), 1)])
+    return fpr, tpr, float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
 
-def plot_roc_auc(model, X_test, y_test, model_name):
+def plot_roc_auc(model, X_test, y_test, model_name, y_proba=None, save_dir=PLOTS_DIR):
     """
-    Save ROC-AUC curve
+    Save ROC-AUC curve (reuses y_proba when already computed)
     """
-    y_proba = model.predict_proba(X_test)[:, 1]
+    if y_proba is None:
+        _, y_proba = get_predictions(model, X_test, y_test, model_name=model_name)
 
-    fpr, tpr, _ = roc_curve(y_test, y_proba)
-    roc_auc = auc(fpr, tpr)
+    fpr, tpr, roc_auc = binned_roc_curve(y_test, y_proba)
 
     plt.figure(figsize=(6, 5))
     plt.plot(fpr, tpr, label=f"AUC = {roc_auc:.4f}")
@@ -30,18 +48,20 @@ def plot_roc_auc(model, X_test, y_test, model_name):
     plt.title(f"ROC-AUC Curve ({model_name})")
     plt.legend(loc="lower right")
 
-    path = os.path.join(PLOTS_DIR, f"roc_auc_{model_name}.png")
+    os.makedirs(save_dir, exist_ok=True)
+    path = os.path.join(save_dir, f"roc_auc_{model_name}.png")
     plt.savefig(path, dpi=300, bbox_inches="tight")
     plt.close()
 
     return roc_auc
 
 
-def plot_confusion_matrix(model, X_test, y_test, model_name):
+def plot_confusion_matrix(model, X_test, y_test, model_name, y_pred=None, save_dir=PLOTS_DIR):
     """
-    Save Confusion Matrix plot
+    Save Confusion Matrix plot (reuses y_pred when already computed)
     """
-    y_pred = model.predict(X_test)
+    if y_pred is None:
+        y_pred, _ = get_predictions(model, X_test, y_test, model_name=model_name)
     cm = confusion_matrix(y_test, y_pred)
 
     plt.figure(figsize=(5, 4))
@@ -58,6 +78,7 @@ def plot_confusion_matrix(model, X_test, y_test, model_name):
     plt.ylabel("Actual")
     plt.title(f"Confusion Matrix ({model_name})")
 
-    path = os.path.join(PLOTS_DIR, f"confusion_matrix_{model_name}.png")
+    os.makedirs(save_dir, exist_ok=True)
+    path = os.path.join(save_dir, f"confusion_matrix_{model_name}.png")
     plt.savefig(path, dpi=300, bbox_inches="tight")
     plt.close()
@@ -1,12 +1,51 @@
+import numpy as np
 from sklearn.feature_selection import SelectKBest, f_classif
+from sklearn.ensemble import ExtraTreesClassifier
 from sklearn.decomposition import PCA
 
+# Columns backend/live_capture.py computes for every flow; anything else
+# is zero-filled by preprocess_input at serving time
+LIVE_CAPTURE_FEATURES = [
+    "Source Port", "Destination Port", "Protocol", "Flow Duration",
+    "Total Fwd Packets", "Total Backward Packets",
+    "Total Length of Fwd Packets", "Total Length of Bwd Packets",
+    "Fwd Packet Length Max", "Fwd Packet Length Min", "Fwd Packet Length Mean", "Fwd Packet Length Std",
+    "Bwd Packet Length Max", "Bwd Packet Length Min", "Bwd Packet Length Mean", "Bwd Packet Length Std",
+    "Flow Bytes/s", "Flow Packets/s",
+    "Flow IAT Mean", "Flow IAT Std", "Flow IAT Max", "Flow IAT Min",
+    "FIN Flag Count", "SYN Flag Count", "RST Flag Count", "PSH Flag Count",
+    "ACK Flag Count", "URG Flag Count", "CWE Flag Count", "ECE Flag Count"
+]
+
 def select_features(X, y, k=20):
     """Select top k features based on ANOVA F-value."""
     selector = SelectKBest(f_classif, k=k)
     X_new = selector.fit_transform(X, y)
     return X_new, selector
 
+def rank_features(X, y, method="anova", candidates=None, random_state=42):
+    """
+    Feature names ordered from most to least informative, by ANOVA
+    F-value or by impurity importance of a quick ExtraTrees fit.
+    Restrict the ranking to `candidates` when given.
+    """
+    if candidates is not None:
+        X = X[[col for col in candidates if col in X.columns]]
+
+    if method == "anova":
+        scores, _ = f_classif(X, y)
+        scores = np.nan_to_num(scores)
+    elif method == "importance":
+        forest = ExtraTreesClassifier(
+            n_estimators=100, max_depth=12, random_state=random_state, n_jobs=-1
+        )
+        scores = forest.fit(X, y).feature_importances_
+    else:
+        raise ValueError(f"Unknown ranking method: {method}")
+
+    order = np.argsort(scores)[::-1]
+    return [X.columns[i] for i in order]
+
 def apply_pca(X, n_components=10):
     """Apply PCA for dimensionality reduction."""
     pca = PCA(n_components=n_components)
@@ -1,12 +1,22 @@
 import os
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-
-def evaluate_model(model, X_test, y_test, model_name):
-    y_pred = model.predict(X_test)
-
-    return {
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+
+from src.prediction_cache import get_predictions
+
+def evaluate_model(model, X_test, y_test, model_name, y_pred=None, y_proba=None):
+    """
+    Compute comparison metrics. Pass precomputed y_pred / y_proba to
+    avoid scoring the test set again; otherwise they come from the
+    prediction cache.
+    """
+    if y_pred is None:
+        y_pred, cached_proba = get_predictions(model, X_test, y_test, model_name=model_name)
+        if y_proba is None:
+            y_proba = cached_proba
+
+    metrics = {
         "Model": model_name,
         "Accuracy": accuracy_score(y_test, y_pred),
         "Precision": precision_score(y_test, y_pred, zero_division=0),
@@ -14,6 +24,11 @@ def evaluate_model(model, X_test, y_test, model_name):
         "F1-Score": f1_score(y_test, y_pred, zero_division=0)
     }
 
+    if y_proba is not None:
+        metrics["ROC-AUC"] = roc_auc_score(y_test, y_proba)
+
+    return metrics
+
 
 def save_comparison_table(results, output_dir="reports"):
     os.makedirs(output_dir, exist_ok=True)
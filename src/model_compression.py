@@ -0,0 +1,212 @@
+"""
+Post-training compression of the tree ensembles.
+
+Candidates per model:
+  Random Forest  - keep only the first N trees, and refits with bounded depth
+  XGBoost        - early stopping on the validation split, shallower trees
+  LightGBM       - early stopping on the validation split, fewer leaves
+
+Every candidate is measured for artifact size (plain and compressed
+joblib), load time, single-flow p50/p99 latency and test F1, and the
+Pareto-optimal ones (size, p50 latency, F1) are marked in
+reports/model_compression.csv next to reports/model_comparison.csv.
+
+    python -m src.model_compression            # report only
+    python -m src.model_compression --publish  # also serve the chosen variants
+"""
+import os
+import copy
+import time
+import argparse
+import tempfile
+
+import joblib
+import lightgbm
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import f1_score, accuracy_score
+
+from src.train1 import (
+    load_data, split_data, split_validation, get_models, save_model, REPORT_DIR
+)
+
+RF_TREE_COUNTS = [25, 50, 100]
+RF_DEPTHS = [16, 10]
+EARLY_STOPPING_ROUNDS = 20
+# F1 the published variant may give up against the uncompressed model
+TOLERANCE = 0.002
+
+
+# ================= CANDIDATES =================
+def truncate_forest(forest, n_trees):
+    """A copy of a fitted forest that only keeps its first n_trees trees."""
+    small = copy.copy(forest)
+    small.estimators_ = forest.estimators_[:n_trees]
+    small.n_estimators = n_trees
+    return small
+
+
+def forest_candidates(model, X_fit, y_fit, X_val, y_val):
+    full = model.n_estimators
+    yield "baseline", model
+    for n in RF_TREE_COUNTS:
+        if n < full:
+            yield f"first {n} trees", truncate_forest(model, n)
+
+    largest = max([n for n in RF_TREE_COUNTS if n < full], default=full)
+    for depth in RF_DEPTHS:
+        bounded = clone(model).set_params(max_depth=depth, n_estimators=largest)
+        bounded.fit(X_fit, y_fit)
+        for n in RF_TREE_COUNTS:
+            if n <= largest:
+                yield f"depth {depth}, {n} trees", truncate_forest(bounded, n)
+
+
+def xgboost_candidates(model, X_fit, y_fit, X_val, y_val):
+    yield "baseline", model
+    for depth in sorted({model.get_params()["max_depth"] or 6, 4}, reverse=True):
+        probe = clone(model).set_params(max_depth=depth, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        probe.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        n_best = probe.best_iteration + 1
+        # Refit without the extra rounds so the artifact only holds n_best trees
+        compact = clone(model).set_params(max_depth=depth, n_estimators=n_best)
+        compact.fit(X_fit, y_fit)
+        yield f"early stop ({n_best} rounds), depth {depth}", compact
+
+
+def lightgbm_candidates(model, X_fit, y_fit, X_val, y_val):
+    yield "baseline", model
+    for leaves in sorted({model.get_params()["num_leaves"], 15}, reverse=True):
+        probe = clone(model).set_params(num_leaves=leaves)
+        probe.fit(X_fit, y_fit, eval_set=[(X_val, y_val)],
+                  callbacks=[lightgbm.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        n_best = probe.best_iteration_ or probe.n_estimators
+        compact = clone(model).set_params(num_leaves=leaves, n_estimators=n_best)
+        compact.fit(X_fit, y_fit)
+        yield f"early stop ({n_best} rounds), {leaves} leaves", compact
+
+
+CANDIDATES = {
+    "Random Forest": forest_candidates,
+    "XGBoost": xgboost_candidates,
+    "LightGBM": lightgbm_candidates
+}
+
+
+# ================= MEASUREMENTS =================
+def measure_artifact(model, compress=0, repeats=3):
+    """(size in KB, median load seconds) of the model written with joblib."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.joblib")
+        joblib.dump(model, path, compress=compress)
+        size_kb = os.path.getsize(path) / 1024
+        loads = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            joblib.load(path)
+            loads.append(time.perf_counter() - start)
+    return size_kb, float(np.median(loads))
+
+
+def latency_percentiles(model, X, repeats=200):
+    timings = []
+    for i in range(repeats):
+        row = X.iloc[[i % len(X)]]
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def pareto_mask(df, minimize=("Size KB", "p50 ms"), maximize=("F1-Score",)):
+    """True for rows no other row beats on every objective."""
+    values = np.column_stack([df[c].to_numpy() for c in minimize] +
+                             [-df[c].to_numpy() for c in maximize])
+    mask = np.ones(len(df), dtype=bool)
+    for i in range(len(df)):
+        dominated = np.all(values <= values[i], axis=1) & np.any(values < values[i], axis=1)
+        mask[i] = not dominated.any()
+    return mask
+
+
+# ================= PIPELINE =================
+def compress_models(models, X_fit, y_fit, X_val, y_val, X_test, y_test,
+                    report_dir=REPORT_DIR, publish=False, tolerance=TOLERANCE):
+    """
+    Build and measure compressed variants of already fitted models.
+    With publish=True the smallest Pareto variant within tolerance of the
+    baseline F1 is saved and published for each model.
+    """
+    rows, variants = [], {}
+    feature_names = list(X_fit.columns)
+
+    for name, model in models.items():
+        build = CANDIDATES.get(name)
+        if build is None:
+            continue
+        for variant, candidate in build(model, X_fit, y_fit, X_val, y_val):
+            y_pred = candidate.predict(X_test)
+            size_kb, load_s = measure_artifact(candidate)
+            size_z_kb, load_z_s = measure_artifact(candidate, compress=3)
+            p50, p99 = latency_percentiles(candidate, X_test)
+            rows.append({
+                "Model": name,
+                "Variant": variant,
+                "Accuracy": accuracy_score(y_test, y_pred),
+                "F1-Score": f1_score(y_test, y_pred, zero_division=0),
+                "Size KB": round(size_kb, 1),
+                "Size KB (compressed)": round(size_z_kb, 1),
+                "Load ms": round(load_s * 1000, 2),
+                "Load ms (compressed)": round(load_z_s * 1000, 2),
+                "p50 ms": round(p50 * 1000, 4),
+                "p99 ms": round(p99 * 1000, 4)
+            })
+            variants[(name, variant)] = candidate
+            print(f"{name} [{variant}]: F1={rows[-1]['F1-Score']:.4f} "
+                  f"size={size_kb:.0f}KB p50={p50 * 1000:.3f}ms")
+
+    df = pd.DataFrame(rows)
+    df["Pareto"] = False
+    for name, group in df.groupby("Model"):
+        df.loc[group.index, "Pareto"] = pareto_mask(group)
+
+    os.makedirs(report_dir, exist_ok=True)
+    csv_path = os.path.join(report_dir, "model_compression.csv")
+    df.to_csv(csv_path, index=False)
+    print(f"Compression report saved at: {csv_path}")
+
+    if publish:
+        for name, group in df.groupby("Model"):
+            base_f1 = group.loc[group["Variant"] == "baseline", "F1-Score"].iloc[0]
+            eligible = group[group["Pareto"] & (group["F1-Score"] >= base_f1 - tolerance)]
+            chosen = eligible.sort_values("Size KB").iloc[0]
+            print(f"Publishing {name} [{chosen['Variant']}]")
+            metrics = {k: float(chosen[k]) for k in ("Accuracy", "F1-Score", "Size KB", "p50 ms", "p99 ms")}
+            metrics["variant"] = chosen["Variant"]
+            save_model(variants[(name, chosen["Variant"])], name, feature_names, metrics=metrics)
+
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress trained tree ensembles")
+    parser.add_argument("--publish", action="store_true",
+                        help="Save and publish the chosen variant of each model")
+    args = parser.parse_args()
+
+    df = load_data()
+    X_train, X_test, y_train, y_test = split_data(df)
+    X_fit, X_val, y_fit, y_val = split_validation(X_train, y_train)
+
+    models = {name: model for name, model in get_models().items() if name in CANDIDATES}
+    for name, model in models.items():
+        print(f"Training {name} ...")
+        model.fit(X_fit, y_fit)
+
+    results = compress_models(models, X_fit, y_fit, X_val, y_val, X_test, y_test, publish=args.publish)
+    print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
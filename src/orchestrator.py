@@ -0,0 +1,155 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.model_comparison import (
+    evaluate_model,
+    save_comparison_table
+)
+
+from src.prediction_cache import get_predictions
+
+# Relative CPU cost of fitting each model; used to split the cores
+THREAD_WEIGHTS = {
+    "Logistic Regression": 1,
+    "Random Forest": 3,
+    "XGBoost": 2,
+    "LightGBM": 2
+}
+
+
+# ================= RUN REPORT =================
+class RunReport:
+    """Collects wall-clock timings for every pipeline stage."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = []
+        self.thread_budgets = {}
+
+    def record(self, model_name, stage, seconds):
+        self.stages.append({
+            "model": model_name,
+            "stage": stage,
+            "seconds": round(seconds, 4)
+        })
+
+    def timed(self, model_name, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.record(model_name, stage, time.perf_counter() - start)
+        return result
+
+    def to_dict(self):
+        return {
+            "total_seconds": round(time.time() - self.started, 4),
+            "cpu_count": os.cpu_count(),
+            "thread_budgets": self.thread_budgets,
+            "stages": self.stages
+        }
+
+    def save(self, output_dir="reports"):
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, "run_report.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Run report saved at: {path}")
+        return path
+
+
+# ================= THREAD BUDGETS =================
+def thread_budgets(model_names, n_cores=None):
+    """
+    Split the available cores across concurrently fitted models in
+    proportion to THREAD_WEIGHTS, so the fits together never ask for
+    more threads than there are cores (minimum one thread each).
+    """
+    n_cores = n_cores or os.cpu_count() or 1
+    weights = {name: THREAD_WEIGHTS.get(name, 1) for name in model_names}
+    total = sum(weights.values()) or 1
+
+    return {
+        name: max(1, int(n_cores * weight / total))
+        for name, weight in weights.items()
+    }
+
+
+def apply_thread_budget(model, n_threads):
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_threads)
+    return model
+
+
+# ================= FIT + SCORE =================
+def _fit_and_score(name, model, X_train, y_train, X_test, y_test):
+    timings = {}
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    timings["fit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # Scored once and cached; shared by the metrics and the render stage
+    y_pred, y_proba = get_predictions(model, X_test, y_test, model_name=name)
+    timings["predict"] = time.perf_counter() - start
+
+    return name, model, y_pred, y_proba, timings
+
+
+# ================= PIPELINE =================
+def run_training(X_train, X_test, y_train, y_test, models,
+                 save_fn=None, report_dir="reports", n_cores=None):
+    """
+    Fit all models concurrently with per-model thread budgets, then
+    evaluate and save each one from a single set of predictions.
+    Returns the comparison DataFrame. Figures are drawn afterwards from
+    the prediction cache by src.report_rendering.render_reports.
+    """
+    report = RunReport()
+    feature_names = list(X_train.columns)
+
+    n_cores = n_cores or os.cpu_count() or 1
+    budgets = thread_budgets(models.keys(), n_cores)
+    report.thread_budgets = budgets
+    for name, model in models.items():
+        apply_thread_budget(model, budgets[name])
+
+    comparison_results = []
+
+    # Never run more fits at once than there are cores
+    with ThreadPoolExecutor(max_workers=max(1, min(len(models), n_cores))) as pool:
+        futures = [
+            pool.submit(_fit_and_score, name, model, X_train, y_train, X_test, y_test)
+            for name, model in models.items()
+        ]
+
+        # Evaluation and saving stay on this thread
+        for future in as_completed(futures):
+            name, model, y_pred, y_proba, timings = future.result()
+            for stage, seconds in timings.items():
+                report.record(name, stage, seconds)
+            print(f"\n {name} trained in {timings['fit']:.2f}s ({budgets[name]} threads)")
+
+            metrics = report.timed(
+                name, "evaluate", evaluate_model,
+                model, X_test, y_test, name,
+                y_pred=y_pred, y_proba=y_proba
+            )
+            comparison_results.append(metrics)
+
+            if save_fn is not None:
+                test_metrics = {k: float(v) for k, v in metrics.items() if k != "Model"}
+                report.timed(name, "save", save_fn, model, name, feature_names, metrics=test_metrics)
+
+    # Keep the table in the order the models were declared
+    order = list(models.keys())
+    comparison_results.sort(key=lambda row: order.index(row["Model"]))
+
+    df_results = report.timed(
+        None, "comparison_table", save_comparison_table,
+        comparison_results, output_dir=report_dir
+    )
+
+    report.save(report_dir)
+    return df_results
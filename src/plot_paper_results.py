@@ -3,12 +3,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
-# Settings for research paper quality plots
-plt.rcParams.update({
+from src.prediction_cache import load_cached_predictions, CACHE_DIR
+from src.evaluation_plots import binned_roc_curve
+
+# Settings for research paper quality plots (scoped with plt.rc_context so
+# other figures rendered in the same process keep the default style)
+PAPER_STYLE = {
     'font.size': 12,
     'font.family': 'serif',
     'figure.dpi': 300
-})
+}
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPORT_PATH = os.path.join(BASE_DIR, "reports", "model_comparison.csv")
@@ -16,12 +20,16 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "reports", "figures")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def plot_comparison_for_paper():
-    if not os.path.exists(REPORT_PATH):
-        print(f"Error: {REPORT_PATH} not found. Run main.py first.")
+def plot_comparison_for_paper(report_path=REPORT_PATH, output_dir=OUTPUT_DIR):
+    if not os.path.exists(report_path):
+        print(f"Error: {report_path} not found. Run main.py first.")
         return
 
-    df = pd.read_csv(REPORT_PATH)
+    with plt.rc_context(PAPER_STYLE):
+        _plot_comparison(pd.read_csv(report_path), output_dir)
+
+
+def _plot_comparison(df, output_dir):
     
     # Melt the dataframe for Seaborn (Format: Model | Metric | Score)
     df_melted = df.melt(id_vars="Model", var_name="Metric", value_name="Score")
@@ -50,16 +58,50 @@ def plot_comparison_for_paper():
     plt.tight_layout()
     
     # Save
-    save_path = os.path.join(OUTPUT_DIR, "model_comparison_paper.png")
+    os.makedirs(output_dir, exist_ok=True)
+    save_path = os.path.join(output_dir, "model_comparison_paper.png")
     plt.savefig(save_path)
+    plt.close()
     print(f"✅ Saved high-res plot to: {save_path}")
-    plt.show()
 
     # 2. Generate LaTeX Table 
     latex_code = df.to_latex(index=False, float_format="%.4f")
-    with open(os.path.join(OUTPUT_DIR, "results_table.tex"), "w") as f:
+    with open(os.path.join(output_dir, "results_table.tex"), "w") as f:
         f.write(latex_code)
-    print(f"✅ Saved LaTeX table to: {os.path.join(OUTPUT_DIR, 'results_table.tex')}")
+    print(f"✅ Saved LaTeX table to: {os.path.join(output_dir, 'results_table.tex')}")
+
+def plot_roc_for_paper(output_dir=OUTPUT_DIR, cache_dir=CACHE_DIR, models=None):
+    """ROC overlay for `models` (default: all cached), drawn from cached scores (no rescoring)."""
+    cached = load_cached_predictions(cache_dir=cache_dir)
+    cached = {name: c for name, c in cached.items()
+              if c["y_proba"] is not None and len(c["y_true"]) and (models is None or name in models)}
+    if not cached:
+        print("Error: no cached predictions found. Run main.py first.")
+        return
+
+    with plt.rc_context(PAPER_STYLE):
+        _plot_roc(cached, output_dir)
+
+
+def _plot_roc(cached, output_dir):
+    plt.figure(figsize=(7, 6))
+    for name, c in cached.items():
+        fpr, tpr, roc_auc = binned_roc_curve(c["y_true"], c["y_proba"])
+        plt.plot(fpr, tpr, label=f"{name} (AUC = {roc_auc:.4f})")
+
+    plt.plot([0, 1], [0, 1], linestyle="--", color="gray")
+    plt.title("ROC Curves", fontweight='bold')
+    plt.xlabel("False Positive Rate")
+    plt.ylabel("True Positive Rate")
+    plt.legend(loc="lower right")
+    plt.tight_layout()
+
+    os.makedirs(output_dir, exist_ok=True)
+    save_path = os.path.join(output_dir, "roc_curves_paper.png")
+    plt.savefig(save_path)
+    plt.close()
+    print(f"✅ Saved ROC figure to: {save_path}")
 
 if __name__ == "__main__":
-    plot_comparison_for_paper()
\ No newline at end of file
+    plot_comparison_for_paper()
+    plot_roc_for_paper()
\ No newline at end of file
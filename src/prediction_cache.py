@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import threading
+
+import joblib
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "reports", "cache", "predictions")
+INDEX_FILE = "index.json"
+
+_index_lock = threading.Lock()
+
+
+# ================= FINGERPRINTS =================
+def model_fingerprint(model):
+    """Content hash of a fitted model (changes whenever it is refit)."""
+    return joblib.hash(model)
+
+
+def dataset_fingerprint(X):
+    """Content hash of a feature matrix / DataFrame, column names included."""
+    return joblib.hash(X)
+
+
+def cache_path(model_fp, data_fp, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{model_fp}_{data_fp}.npz")
+
+
+# ================= INDEX =================
+def _read_index(cache_dir):
+    path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _update_index(cache_dir, model_name, entry):
+    with _index_lock:
+        index = _read_index(cache_dir)
+        index[model_name] = entry
+        tmp_path = os.path.join(cache_dir, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILE))
+
+
+# ================= CACHE =================
+def _write_scores(path, y_pred, y_proba, y_true):
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        y_pred=y_pred,
+        y_proba=y_proba if y_proba is not None else np.empty(0),
+        has_proba=y_proba is not None,
+        y_true=y_true if y_true is not None else np.empty(0)
+    )
+    os.replace(tmp_path, path)
+
+
+def get_predictions(model, X, y=None, model_name=None, cache_dir=CACHE_DIR):
+    """
+    Return (y_pred, y_proba) for model on X, scoring at most once per
+    (model, dataset) pair. Results are persisted as a .npz file and,
+    when model_name is given, registered in the cache index so reports
+    can be re-rendered later without the model.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    model_fp = model_fingerprint(model)
+    data_fp = dataset_fingerprint(X)
+    path = cache_path(model_fp, data_fp, cache_dir)
+
+    y_true = np.asarray(y) if y is not None else None
+    stale_labels = False
+    labelled = y_true is not None and len(y_true) > 0
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            y_pred = cached["y_pred"]
+            y_proba = cached["y_proba"] if cached["has_proba"] else None
+            # The key covers the model and X only: keep the stored labels
+            # in line with the caller's so reports never pair scores with other labels
+            stale_labels = y_true is not None and not np.array_equal(cached["y_true"], y_true)
+            if y_true is None:
+                labelled = len(cached["y_true"]) > 0
+    else:
+        y_pred = np.asarray(model.predict(X))
+        y_proba = None
+        if hasattr(model, "predict_proba"):
+            y_proba = np.asarray(model.predict_proba(X)[:, 1])
+
+    if stale_labels or not os.path.exists(path):
+        _write_scores(path, y_pred, y_proba, y_true)
+
+    if model_name is not None:
+        _update_index(cache_dir, model_name, {
+            "file": os.path.basename(path),
+            "model_fingerprint": model_fp,
+            "dataset_fingerprint": data_fp,
+            # Read by cached_entries, so listing entries never loads scores
+            "rows": int(len(y_pred)),
+            "has_proba": y_proba is not None,
+            "has_truth": bool(labelled),
+            "updated": time.time()
+        })
+
+    return y_pred, y_proba
+
+
+def load_cached_predictions(model_name=None, cache_dir=CACHE_DIR):
+    """
+    Load cached scores registered in the index without touching any model.
+    Returns {model_name: {"y_true", "y_pred", "y_proba", "hash"}}.
+    """
+    index = _read_index(cache_dir)
+    names = [model_name] if model_name is not None else list(index)
+
+    results = {}
+    for name in names:
+        entry = index.get(name)
+        if entry is None:
+            continue
+        path = os.path.join(cache_dir, entry["file"])
+        if not os.path.exists(path):
+            continue
+        with np.load(path) as cached:
+            results[name] = {
+                "y_true": cached["y_true"],
+                "y_pred": cached["y_pred"],
+                "y_proba": cached["y_proba"] if cached["has_proba"] else None,
+                "hash": os.path.splitext(entry["file"])[0]
+            }
+    return results
+
+
+def cached_entries(cache_dir=CACHE_DIR):
+    """
+    Index entries whose score files exist, from the index alone:
+    {model_name: {"path", "hash", "has_proba", "has_truth"}}. "hash"
+    changes whenever the model or the dataset does.
+    """
+    entries = {}
+    for name, entry in _read_index(cache_dir).items():
+        path = os.path.join(cache_dir, entry["file"])
+        if not os.path.exists(path):
+            continue
+        if "has_truth" not in entry:
+            # Indexed before entries carried these flags
+            with np.load(path) as cached:
+                entry["has_proba"] = bool(cached["has_proba"])
+                entry["has_truth"] = len(cached["y_true"]) > 0
+        entries[name] = {
+            "path": path,
+            "hash": os.path.splitext(entry["file"])[0],
+            "has_proba": entry["has_proba"],
+            "has_truth": entry["has_truth"]
+        }
+    return entries
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from imblearn.over_sampling import SMOTE
@@ -21,8 +22,105 @@ def scale_features(X: pd.DataFrame) -> pd.DataFrame:
     X_scaled = scaler.fit_transform(X)
     return X_scaled
 
-def balance_data(X, y):
-    """Handle imbalance with SMOTE."""
-    smote = SMOTE(random_state=42)
-    X_res, y_res = smote.fit_resample(X, y)
-    return X_res, y_res
+BALANCE_STRATEGIES = ["none", "class_weight", "undersample", "chunked_smote", "smote"]
+
+def undersample(X, y, ratio=1.0, random_state=42):
+    """
+    Stratified random undersampling: every class keeps at most
+    ratio x (minority count) rows. Only row indices are materialised
+    before the final selection, so no full-size copy is made.
+    """
+    rng = np.random.default_rng(random_state)
+    y_arr = np.asarray(y)
+    classes, counts = np.unique(y_arr, return_counts=True)
+    target = int(counts.min() * ratio)
+
+    keep = []
+    for cls, count in zip(classes, counts):
+        idx = np.flatnonzero(y_arr == cls)
+        if count > target:
+            idx = rng.choice(idx, size=target, replace=False)
+        keep.append(idx)
+    keep = np.sort(np.concatenate(keep))
+
+    if hasattr(X, "iloc"):
+        return X.iloc[keep], y.iloc[keep] if hasattr(y, "iloc") else y_arr[keep]
+    return X[keep], y_arr[keep]
+
+def chunked_smote(X, y, chunk_rows=200000, k_neighbors=5, random_state=42):
+    """
+    SMOTE run independently on stratified chunks of about chunk_rows:
+    each class is shuffled and split evenly across the chunks, so every
+    chunk keeps the overall class ratio. Neighbour search stays within a
+    chunk, so memory and time grow linearly with the number of rows
+    instead of with the full k-NN index. Chunks with a single class or
+    too few minority rows are kept as they are.
+    """
+    rng = np.random.default_rng(random_state)
+    y_arr = np.asarray(y)
+    n_chunks = max(1, int(np.ceil(len(y_arr) / chunk_rows)))
+
+    chunks = [[] for _ in range(n_chunks)]
+    for cls in np.unique(y_arr):
+        idx = rng.permutation(np.flatnonzero(y_arr == cls))
+        for chunk, part in zip(chunks, np.array_split(idx, n_chunks)):
+            chunk.append(part)
+
+    X_parts, y_parts = [], []
+    for i, parts in enumerate(chunks):
+        idx = np.sort(np.concatenate(parts))
+        X_chunk = X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+        y_chunk = y_arr[idx]
+        counts = np.unique(y_chunk, return_counts=True)[1]
+        if len(counts) < 2 or counts.min() <= k_neighbors:
+            # Nothing to oversample, or too few minority rows to interpolate
+            X_parts.append(X_chunk)
+            y_parts.append(y_chunk)
+            continue
+        smote = SMOTE(k_neighbors=k_neighbors, random_state=random_state + i)
+        X_res, y_res = smote.fit_resample(X_chunk, y_chunk)
+        X_parts.append(X_res)
+        y_parts.append(y_res)
+
+    if hasattr(X, "iloc"):
+        return pd.concat(X_parts, ignore_index=True), pd.Series(np.concatenate(y_parts), name=getattr(y, "name", None))
+    return np.vstack(X_parts), np.concatenate(y_parts)
+
+def class_weight_params(model, y):
+    """
+    Parameters that make a model weight classes inversely to their
+    frequency instead of resampling: scale_pos_weight for XGBoost,
+    class_weight="balanced" for the sklearn / LightGBM models.
+    """
+    params = model.get_params()
+    if "scale_pos_weight" in params and type(model).__name__.startswith("XGB"):
+        y_arr = np.asarray(y)
+        positives = max(int((y_arr == 1).sum()), 1)
+        return {"scale_pos_weight": float((y_arr != 1).sum()) / positives}
+    if "class_weight" in params:
+        return {"class_weight": "balanced"}
+    return {}
+
+def apply_class_weight(models, y):
+    for model in models.values():
+        model.set_params(**class_weight_params(model, y))
+    return models
+
+def balance_data(X, y, strategy="smote", **kwargs):
+    """
+    Handle imbalance. "smote" is the original full in-memory SMOTE;
+    "undersample" and "chunked_smote" scale to the full dataset;
+    "none" / "class_weight" return the data unchanged (for class_weight
+    the models are weighted instead, see apply_class_weight).
+    """
+    if strategy in ("none", "class_weight"):
+        return X, y
+    if strategy == "undersample":
+        return undersample(X, y, **kwargs)
+    if strategy == "chunked_smote":
+        return chunked_smote(X, y, **kwargs)
+    if strategy == "smote":
+        smote = SMOTE(random_state=42)
+        X_res, y_res = smote.fit_resample(X, y)
+        return X_res, y_res
+    raise ValueError(f"Unknown balancing strategy: {strategy}")
@@ -0,0 +1,253 @@
+"""
+Report rendering stage, run after training.
+
+Every figure (per-model ROC and confusion matrix, the metric bar charts and
+the paper figures) is drawn from the prediction cache and the comparison
+table only, so no model is needed. Only the models of the current
+comparison table are drawn; the cache index also holds other runs
+(compact k-feature models, models no longer trained). Figures are rendered in a process pool
+on the non-interactive Agg backend, and a figure is skipped when the hash
+of its inputs matches the manifest and its files are still on disk.
+
+    python -m src.report_rendering             # render what changed
+    python -m src.report_rendering --force     # render everything
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.prediction_cache import cached_entries, CACHE_DIR
+from src.evaluation_plots import PLOTS_DIR, ROC_BINS
+
+# Bump when a figure's drawing code changes so every figure is redrawn once
+RENDER_VERSION = 1
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 0)) or None
+MANIFEST_FILE = "figures_manifest.json"
+BAR_METRICS = ("Accuracy", "F1-Score", "ROC-AUC")
+
+
+# ================= INPUT HASHES =================
+def _hash(*parts):
+    payload = json.dumps([RENDER_VERSION, ROC_BINS, *parts], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# ================= TASKS =================
+def _table_models(table):
+    import pandas as pd
+    return pd.read_csv(table)["Model"].tolist() if os.path.exists(table) else []
+
+
+def build_tasks(report_dir="reports", plots_dir=PLOTS_DIR, figures_dir=None, cache_dir=CACHE_DIR, models=None):
+    """
+    One task per figure: its kind, arguments, output files and input hash.
+    `models` defaults to the models of the comparison table.
+    """
+    # Absolute paths, so the manifest is the same from any working directory
+    report_dir, plots_dir = os.path.abspath(report_dir), os.path.abspath(plots_dir)
+    figures_dir = os.path.abspath(figures_dir or os.path.join(report_dir, "figures"))
+    table = os.path.join(report_dir, "model_comparison.csv")
+    models = list(models) if models is not None else _table_models(table)
+    entries = {name: entry for name, entry in cached_entries(cache_dir).items() if name in models}
+    tasks = []
+
+    for name, entry in entries.items():
+        if not entry["has_truth"]:
+            continue
+        if entry["has_proba"]:
+            tasks.append({
+                "kind": "roc",
+                "args": {"model": name, "cache_file": entry["path"], "save_dir": plots_dir},
+                "outputs": [os.path.join(plots_dir, f"roc_auc_{name}.png")],
+                "inputs": entry["hash"]
+            })
+        tasks.append({
+            "kind": "confusion_matrix",
+            "args": {"model": name, "cache_file": entry["path"], "save_dir": plots_dir},
+            "outputs": [os.path.join(plots_dir, f"confusion_matrix_{name}.png")],
+            "inputs": entry["hash"]
+        })
+
+    with_proba = {name: entry for name, entry in entries.items() if entry["has_proba"] and entry["has_truth"]}
+    if with_proba:
+        tasks.append({
+            "kind": "paper_roc",
+            "args": {"cache_dir": cache_dir, "output_dir": figures_dir, "models": sorted(with_proba)},
+            "outputs": [os.path.join(figures_dir, "roc_curves_paper.png")],
+            "inputs": sorted((name, entry["hash"]) for name, entry in with_proba.items())
+        })
+
+    if os.path.exists(table):
+        table_hash = _file_hash(table)
+        with open(table) as f:
+            columns = f.readline().strip().split(",")
+        for metric in BAR_METRICS:
+            if metric in columns:
+                tasks.append({
+                    "kind": "bar_chart",
+                    "args": {"table": table, "metric": metric, "output_dir": report_dir},
+                    "outputs": [os.path.join(report_dir, f"{metric.lower()}_comparison.png")],
+                    "inputs": table_hash
+                })
+        tasks.append({
+            "kind": "paper_comparison",
+            "args": {"table": table, "output_dir": figures_dir},
+            "outputs": [os.path.join(figures_dir, "model_comparison_paper.png"),
+                        os.path.join(figures_dir, "results_table.tex")],
+            "inputs": table_hash
+        })
+
+    for task in tasks:
+        task["key"] = task["outputs"][0]
+        task["inputs"] = _hash(task["kind"], task["args"], task["inputs"])
+    return tasks
+
+
+# ================= WORKER =================
+def _init_worker():
+    # Workers never open windows; Agg also avoids GUI toolkits in subprocesses
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def render_figure(task):
+    """Draw one figure. Runs in a pool worker; returns (key, seconds)."""
+    start = time.perf_counter()
+    kind, args = task["kind"], task["args"]
+
+    if kind in ("roc", "confusion_matrix"):
+        from src.evaluation_plots import plot_roc_auc, plot_confusion_matrix
+        with np.load(args["cache_file"]) as cached:
+            y_true = cached["y_true"]
+            if kind == "roc":
+                plot_roc_auc(None, None, y_true, args["model"],
+                             y_proba=cached["y_proba"], save_dir=args["save_dir"])
+            else:
+                plot_confusion_matrix(None, None, y_true, args["model"],
+                                      y_pred=cached["y_pred"], save_dir=args["save_dir"])
+    elif kind == "bar_chart":
+        import pandas as pd
+        from src.model_comparison import plot_bar_chart
+        plot_bar_chart(pd.read_csv(args["table"]), metric=args["metric"], output_dir=args["output_dir"])
+    elif kind == "paper_comparison":
+        from src.plot_paper_results import plot_comparison_for_paper
+        plot_comparison_for_paper(report_path=args["table"], output_dir=args["output_dir"])
+    elif kind == "paper_roc":
+        from src.plot_paper_results import plot_roc_for_paper
+        plot_roc_for_paper(output_dir=args["output_dir"], cache_dir=args["cache_dir"], models=args["models"])
+    else:
+        raise ValueError(f"Unknown figure kind: {kind}")
+
+    return task["key"], time.perf_counter() - start
+
+
+# ================= MANIFEST =================
+def _read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def _write_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _up_to_date(task, manifest):
+    entry = manifest.get(task["key"])
+    return (entry is not None and entry.get("inputs") == task["inputs"]
+            and all(os.path.exists(path) for path in task["outputs"]))
+
+
+# ================= STAGE =================
+def render_reports(report_dir="reports", plots_dir=PLOTS_DIR, figures_dir=None,
+                   cache_dir=CACHE_DIR, workers=RENDER_WORKERS, force=False, models=None):
+    """
+    Render every figure whose inputs changed since the last run. Writes
+    the manifest and render_report.json (per-figure status and seconds)
+    and returns the report dict. A figure that fails to render is
+    reported as failed; the others are still drawn.
+    """
+    started = time.perf_counter()
+    manifest_path = os.path.join(report_dir, "cache", MANIFEST_FILE)
+    manifest = _read_manifest(manifest_path)
+
+    tasks = build_tasks(report_dir, plots_dir, figures_dir, cache_dir, models)
+    pending = [task for task in tasks if force or not _up_to_date(task, manifest)]
+    by_key = {task["key"]: task for task in tasks}
+    figures = {task["key"]: {"figure": task["key"], "kind": task["kind"], "status": "skipped"}
+               for task in tasks}
+
+    def done(key, result):
+        """Record one figure; `result` is a function returning render_figure's (key, seconds)."""
+        try:
+            _, seconds = result()
+        except Exception as e:
+            figures[key].update(status="failed", error=str(e))
+            print(f"Rendering {key} failed: {e}")
+            return
+        task = by_key[key]
+        figures[key].update(status="rendered", seconds=round(seconds, 4))
+        manifest[key] = {"inputs": task["inputs"], "outputs": task["outputs"], "rendered": time.time()}
+
+    workers = max(1, min(len(pending), workers or os.cpu_count() or 1))
+    if pending and workers == 1:
+        _init_worker()
+        for task in pending:
+            done(task["key"], lambda: render_figure(task))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(render_figure, task): task["key"] for task in pending}
+            for future in as_completed(futures):
+                done(futures[future], future.result)
+
+    # Figures that are no longer produced drop out of the manifest
+    _write_manifest(manifest_path, {key: manifest[key] for key in by_key if key in manifest})
+
+    rendered = [f for f in figures.values() if f["status"] == "rendered"]
+    report = {
+        "total_seconds": round(time.perf_counter() - started, 4),
+        "workers": workers if pending else 0,
+        "rendered": len(rendered),
+        "skipped": sum(1 for f in figures.values() if f["status"] == "skipped"),
+        "failed": sum(1 for f in figures.values() if f["status"] == "failed"),
+        "figures": list(figures.values())
+    }
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, "render_report.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rendered {report['rendered']} figures, skipped {report['skipped']} unchanged "
+          f"in {report['total_seconds']:.2f}s ({report['workers']} workers). Report: {path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render evaluation plots and paper figures")
+    parser.add_argument("--report-dir", default="reports")
+    parser.add_argument("--plots-dir", default=PLOTS_DIR)
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS)
+    parser.add_argument("--force", action="store_true", help="redraw figures even if their inputs are unchanged")
+    args = parser.parse_args()
+    render_reports(report_dir=args.report_dir, plots_dir=args.plots_dir, workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
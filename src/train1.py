@@ -11,16 +11,11 @@ from sklearn.metrics import classification_report, accuracy_score
 from xgboost import XGBClassifier
 from lightgbm import LGBMClassifier
 
-from src.model_comparison import (
-    evaluate_model,
-    save_comparison_table,
-    plot_bar_chart
-)
-
-from src.evaluation_plots import (
-    plot_roc_auc,
-    plot_confusion_matrix
-)
+from src.orchestrator import run_training
+from src.report_rendering import render_reports
+from src.cascade import learn_cascade, save_cascade
+from src.preprocessing import balance_data, apply_class_weight
+from backend.model_registry import publish_model
 
 # ================= PATHS =================
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -54,6 +49,15 @@ def split_data(df):
         stratify=y
     )
 
+def split_validation(X_train, y_train, val_size=0.1):
+    """Hold out part of the training set for tuning serving thresholds."""
+    return train_test_split(
+        X_train, y_train,
+        test_size=val_size,
+        random_state=42,
+        stratify=y_train
+    )
+
 # ================= MODELS =================
 def get_models():
     return {
@@ -83,7 +87,7 @@ def get_models():
     }
 
 # ================= SAVE MODEL + METADATA =================
-def save_model(model, name, feature_names):
+def save_model(model, name, feature_names, metrics=None, threshold=0.5):
     safe_name = name.lower().replace(" ", "_")
 
     model_path = os.path.join(MODEL_DIR, f"{safe_name}_ddos.joblib")
@@ -94,67 +98,64 @@ def save_model(model, name, feature_names):
     with open(meta_path, "w") as f:
         json.dump(feature_names, f, indent=2)
 
+    # Versioned copy picked up by the backend registry without a restart
+    version, _ = publish_model(safe_name, model, {
+        "features": feature_names,
+        "threshold": threshold,
+        "metrics": metrics or {}
+    }, model_dir=MODEL_DIR)
+
     print(f"Saved model → {model_path}")
     print(f"Saved features → {meta_path}")
+    print(f"Published {safe_name} v{version}")
 
 # ================= TRAIN + EVALUATE =================
-def train_models(X_train, X_test, y_train, y_test):
-    feature_names = list(X_train.columns)
-    models = get_models()
-
-    comparison_results = []
-
-    for name, model in models.items():
-        print(f"\n================ {name} =================")
-
-        model.fit(X_train, y_train)
-
-        # ---------- Evaluation ----------
-        metrics = evaluate_model(
-            model,
-            X_test,
-            y_test,
-            model_name=name
-        )
-        comparison_results.append(metrics)
-
-        # ---------- Save model ----------
-        save_model(model, name, feature_names)
-
-        # ---------- Confusion Matrix ----------
-        plot_confusion_matrix(
-            model,
-            X_test,
-            y_test,
-            model_name=name,
-            save_dir=REPORT_DIR
-        )
-
-        # ---------- ROC–AUC ----------
-        plot_roc_auc(
-            model,
-            X_test,
-            y_test,
-            model_name=name,
-            save_dir=REPORT_DIR
-        )
-
-    # ================= COMPARISON TABLE =================
-    comparison_df = save_comparison_table(
-        comparison_results,
-        save_dir=REPORT_DIR
+def train_models(X_train, X_test, y_train, y_test, models=None, strategy="none", compress=False,
+                 render=True, report_dir=REPORT_DIR, plots_dir=REPORT_DIR):
+    """
+    The training pipeline behind both entry points (this module and
+    main.py), so they publish the same artifacts: hold out a validation
+    split, balance the rest with `strategy`, fit, score and publish every
+    model, then learn the cascade thresholds on the validation split.
+    """
+    models = models or get_models()
+    X_fit, X_val, y_fit, y_val = split_validation(X_train, y_train)
+
+    # Class balancing: none, class_weight, undersample, chunked_smote, smote.
+    # Only the fit split is resampled; validation keeps real flows
+    X_fit, y_fit = balance_data(X_fit, y_fit, strategy=strategy)
+    if strategy == "class_weight":
+        apply_class_weight(models, y_fit)
+
+    # Fits run concurrently; each model is scored once and the
+    # predictions feed the metrics, run report and (afterwards) the plots
+    df_results = run_training(
+        X_fit, X_test, y_fit, y_test,
+        models,
+        save_fn=save_model,
+        report_dir=report_dir
     )
+    if render:
+        render_reports(report_dir=report_dir, plots_dir=plots_dir, models=list(models))
 
-    # ================= BAR CHARTS =================
-    plot_bar_chart(comparison_df, metric="Accuracy", save_dir=REPORT_DIR)
-    plot_bar_chart(comparison_df, metric="F1-Score", save_dir=REPORT_DIR)
-    plot_bar_chart(comparison_df, metric="ROC-AUC", save_dir=REPORT_DIR)
+    # Cheap-model-first routing thresholds for the backend's cascade mode
+    save_cascade(learn_cascade(models, X_val, y_val), MODEL_DIR)
+
+    if compress:
+        # Imported here: the compression module imports this one
+        from src.model_compression import compress_models
+        compress_models(models, X_fit, y_fit, X_val, y_val, X_test, y_test, report_dir=report_dir)
+    return df_results
 
 # ================= MAIN =================
 def main():
     df = load_data()
     X_train, X_test, y_train, y_test = split_data(df)
-    train_models(X_train, X_test, y_train, y_test)
+    train_models(
+        X_train, X_test, y_train, y_test,
+        strategy=os.getenv("BALANCE_STRATEGY", "none"),
+        compress=os.getenv("COMPRESS_MODELS", "False") == "True"
+    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,232 @@
+"""
+Budgeted hyperparameter search for the boosters (successive halving).
+
+Random configurations are first scored on a small random subsample of
+the training rows; only the best 1/eta move on to eta times more rows,
+until the survivors are scored on the full training split. Every trial
+uses the booster's native early stopping on the validation split, so the
+number of trees is part of the result rather than the search space.
+
+Trials run in a process pool and read the dataset from memory-mapped
+.npy files written once, so workers never copy or re-parse the data.
+
+    python -m src.tuning --models XGBoost LightGBM --configs 27 --eta 3
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, log_loss
+
+from src.train1 import load_data, split_data, split_validation, get_models, save_model, REPORT_DIR
+
+TUNING_CACHE_DIR = os.path.join(REPORT_DIR, "cache", "tuning")
+
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+SEARCH_SPACES = {
+    "XGBoost": {
+        "max_depth": [4, 6, 8, 10],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+        "min_child_weight": [1, 5, 10]
+    },
+    "LightGBM": {
+        "num_leaves": [15, 31, 63, 127],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "subsample_freq": [1],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+        "min_child_samples": [10, 20, 50]
+    }
+}
+
+
+# ================= DATASET CACHE =================
+def cache_dataset(X_fit, y_fit, X_val, y_val, cache_dir=TUNING_CACHE_DIR, random_state=42):
+    """
+    Write the split once as .npy files for memory-mapping. Training rows
+    are stored in a random order so any prefix is a random subsample.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    order = np.random.default_rng(random_state).permutation(len(X_fit))
+    arrays = {
+        "X_fit": np.asarray(X_fit, dtype=np.float32)[order],
+        "y_fit": np.asarray(y_fit)[order],
+        "X_val": np.asarray(X_val, dtype=np.float32),
+        "y_val": np.asarray(y_val)
+    }
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(cache_dir, f"{name}.npy")
+        np.save(paths[name], array)
+    return paths
+
+
+def _load(paths):
+    return {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+
+
+# ================= TRIALS =================
+def _build(model_name, params, n_threads):
+    template = get_models()[model_name]
+    model = template.set_params(**params, n_estimators=MAX_ESTIMATORS, n_jobs=n_threads)
+    if model_name == "XGBoost":
+        model.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    return model
+
+
+def run_trial(model_name, params, n_rows, paths, n_threads=1):
+    """Fit one configuration on the first n_rows training rows; score on validation."""
+    import lightgbm
+
+    data = _load(paths)
+    X, y = data["X_fit"][:n_rows], data["y_fit"][:n_rows]
+    X_val, y_val = data["X_val"], data["y_val"]
+
+    model = _build(model_name, params, n_threads)
+    start = time.perf_counter()
+    if model_name == "LightGBM":
+        model.set_params(verbose=-1)
+        model.fit(X, y, eval_set=[(X_val, y_val)],
+                  callbacks=[lightgbm.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        best_iteration = model.best_iteration_ or MAX_ESTIMATORS
+    else:
+        model.fit(X, y, eval_set=[(X_val, y_val)], verbose=False)
+        best_iteration = model.best_iteration + 1
+    seconds = time.perf_counter() - start
+
+    proba = model.predict_proba(X_val)[:, 1]
+    return {
+        "model": model_name,
+        "params": params,
+        "rows": int(n_rows),
+        "logloss": float(log_loss(y_val, proba, labels=[0, 1])),
+        "f1": float(f1_score(y_val, (proba >= 0.5).astype(int), zero_division=0)),
+        "n_estimators": int(best_iteration),
+        "seconds": round(seconds, 3)
+    }
+
+
+def sample_configs(space, n, random_state=42):
+    rng = np.random.default_rng(random_state)
+    configs, seen = [], set()
+    for _ in range(n * 20):
+        config = {key: values[rng.integers(len(values))] for key, values in space.items()}
+        key = json.dumps(config, sort_keys=True, default=float)
+        if key not in seen:
+            seen.add(key)
+            configs.append({k: (v.item() if hasattr(v, "item") else v) for k, v in config.items()})
+        if len(configs) == n:
+            break
+    return configs
+
+
+# ================= SUCCESSIVE HALVING =================
+def successive_halving(model_name, paths, n_rows_total, n_configs=27, eta=3,
+                       min_fraction=0.1, workers=None, random_state=42):
+    """Returns (best trial, all trials, per-rung summary)."""
+    workers = workers or os.cpu_count() or 1
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    configs = sample_configs(SEARCH_SPACES[model_name], n_configs, random_state)
+    n_rungs = max(1, int(np.floor(np.log(1 / min_fraction) / np.log(eta))) + 1)
+    trials, rungs = [], []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rung in range(n_rungs):
+            fraction = min(1.0, min_fraction * eta ** rung) if rung < n_rungs - 1 else 1.0
+            n_rows = max(1000, int(n_rows_total * fraction))
+            n_rows = min(n_rows, n_rows_total)
+
+            futures = [pool.submit(run_trial, model_name, c, n_rows, paths, n_threads) for c in configs]
+            results = [future.result() for future in as_completed(futures)]
+            elapsed = time.perf_counter() - started
+            for result in results:
+                result.update({"rung": rung, "elapsed_s": round(elapsed, 2)})
+            trials.extend(results)
+
+            results.sort(key=lambda r: r["logloss"])
+            rungs.append({
+                "rung": rung, "rows": n_rows, "configs": len(configs),
+                "elapsed_s": round(elapsed, 2),
+                "best_logloss": results[0]["logloss"], "best_f1": results[0]["f1"]
+            })
+            print(f"{model_name} rung {rung}: {len(configs)} configs on {n_rows} rows, "
+                  f"best logloss={results[0]['logloss']:.5f} F1={results[0]['f1']:.4f} "
+                  f"({elapsed:.1f}s)")
+
+            keep = max(1, len(configs) // eta)
+            configs = [r["params"] for r in results[:keep]]
+
+    return results[0], trials, rungs
+
+
+def tune(X_fit, y_fit, X_val, y_val, models=("XGBoost", "LightGBM"), n_configs=27, eta=3,
+         min_fraction=0.1, workers=None, save=True, report_dir=REPORT_DIR):
+    """
+    Tune each booster, refit the winner on the full training split with
+    its early-stopped tree count and hand it to save_model.
+    """
+    paths = cache_dataset(X_fit, y_fit, X_val, y_val)
+    feature_names = list(X_fit.columns)
+    all_trials, summary = [], {}
+
+    for model_name in models:
+        start = time.perf_counter()
+        best, trials, rungs = successive_halving(
+            model_name, paths, len(X_fit), n_configs, eta, min_fraction, workers
+        )
+        all_trials.extend(trials)
+        summary[model_name] = {
+            "best_params": {**best["params"], "n_estimators": best["n_estimators"]},
+            "validation_logloss": best["logloss"],
+            "validation_f1": best["f1"],
+            "search_seconds": round(time.perf_counter() - start, 2),
+            "trials": len(trials),
+            "rungs": rungs
+        }
+
+        if save:
+            model = get_models()[model_name].set_params(**summary[model_name]["best_params"])
+            model.fit(X_fit, y_fit)
+            save_model(model, model_name, feature_names, metrics={
+                "validation_logloss": best["logloss"], "validation_f1": best["f1"]
+            })
+
+    os.makedirs(report_dir, exist_ok=True)
+    trials_df = pd.DataFrame(all_trials)
+    trials_df["params"] = trials_df["params"].apply(json.dumps)
+    trials_df.to_csv(os.path.join(report_dir, "tuning_trials.csv"), index=False)
+    with open(os.path.join(report_dir, "tuning_report.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Tuning report saved at: {os.path.join(report_dir, 'tuning_report.json')}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving search for the boosters")
+    parser.add_argument("--models", nargs="+", default=["XGBoost", "LightGBM"], choices=list(SEARCH_SPACES))
+    parser.add_argument("--configs", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-fraction", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-save", action="store_true", help="report only, do not save the best models")
+    args = parser.parse_args()
+
+    df = load_data()
+    X_train, X_test, y_train, y_test = split_data(df)
+    X_fit, X_val, y_fit, y_val = split_validation(X_train, y_train)
+    tune(X_fit, y_fit, X_val, y_val, models=args.models, n_configs=args.configs, eta=args.eta,
+         min_fraction=args.min_fraction, workers=args.workers, save=not args.no_save)
+
+
+if __name__ == "__main__":
+    main()